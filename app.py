@@ -1,10 +1,36 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ValidationError
 import numpy as np
-import joblib
 import uvicorn
-from typing import List
+from typing import List, Optional
+import asyncio
+import contextlib
+import functools
+import json
 import os
+import random
+import time
+
+from src.inference_executor import InferenceExecutor, Overloaded
+from src.drift_sketch import StreamingDriftDetector, load_sketch
+from src.forest_engine import FLAT_MAX_ROWS, FlatForest, HybridForest
+from src.input_validation import FeatureValidator, InvalidInput, load_training_ranges
+from src.metrics import BATCH_SIZE_BUCKETS, MetricsMiddleware, MetricsRegistry
+from src.micro_batching import MicroBatcher
+from src.model_loader import probe_model_sources, source_version
+from src.model_registry import ModelRegistry, parse_aliases, parse_target, resolve_source
+from src.prediction_cache import PredictionCache
+from src.prediction_log import PredictionLogger
+from src.request_codecs import (
+    DecodeError,
+    UnsupportedMediaType,
+    decode_rows,
+    is_json,
+    media_type,
+    request_body_docs,
+)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -13,6 +39,158 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# In-process metrics exposed at /metrics in the Prometheus text format
+metrics = MetricsRegistry()
+REQUESTS_TOTAL = metrics.counter(
+    "api_requests_total", "HTTP requests by route and status"
+)
+REQUEST_LATENCY = metrics.histogram(
+    "api_request_latency_seconds", "End-to-end request latency by route"
+)
+STAGE_LATENCY = metrics.histogram(
+    "api_stage_latency_seconds",
+    "Request time by stage: routing, validation, conversion, predict, serialization",
+)
+VALIDATION_ROWS = metrics.counter(
+    "api_validation_rows_total",
+    "Request rows rejected or flagged out of distribution by input validation",
+)
+MODEL_REGISTRY_STATS = metrics.gauge(
+    "api_model_registry", "Models loaded on demand besides the primary model"
+)
+SHADOW_ROWS = metrics.counter(
+    "api_shadow_rows_total", "Rows mirrored to the shadow model by outcome"
+)
+BATCH_SIZE = metrics.histogram(
+    "api_inference_batch_size", "Rows per model call", buckets=BATCH_SIZE_BUCKETS
+)
+QUEUE_DEPTH = metrics.gauge("api_queue_depth", "Inference work waiting or running")
+MODEL_INFO = metrics.gauge("api_model_info", "Version of the model being served")
+CACHE_STATS = metrics.gauge("api_prediction_cache", "Prediction cache counters")
+FEATURE_DRIFT = metrics.gauge(
+    "api_feature_drift", "Sliding-window drift statistic per feature"
+)
+PREDICTION_LOG_STATS = metrics.gauge(
+    "api_prediction_log", "Prediction log rows written, dropped and buffered"
+)
+app.add_middleware(
+    MetricsMiddleware, requests_total=REQUESTS_TOTAL, request_latency=REQUEST_LATENCY
+)
+
+# Opt-in micro-batching for /predict: concurrent requests are coalesced into a
+# single model call of up to MICRO_BATCH_MAX_SIZE rows, waiting at most
+# MICRO_BATCH_MAX_WAIT_MS for the batch to fill.
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "false").lower() in ("1", "true", "yes")
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2"))
+
+# Inference runs off the event loop on INFERENCE_BACKEND ("thread", "process" or
+# "inline"). Requests beyond INFERENCE_MAX_PENDING queued calls get a 503.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0")) or None
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "256"))
+
+# Model loading: the source that loaded last time is recorded in
+# MODEL_SOURCE_CACHE and tried first on the next start. Joblib artifacts are
+# memory-mapped with MODEL_MMAP_MODE ("" disables) so uvicorn workers share pages.
+MODEL_SOURCE_CACHE = os.getenv("MODEL_SOURCE_CACHE", "models/.model_source.json")
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE", "r") or None
+
+# MODEL_ENGINE="flat" serves random forests from the flat-array engine, loading
+# FLAT_MODEL_PATH when it exists and otherwise compiling the loaded forest.
+# The flat engine is only faster for small batches: batches above
+# FLAT_ENGINE_MAX_ROWS rows are scored by the sklearn forest it came from.
+MODEL_ENGINE = os.getenv("MODEL_ENGINE", "sklearn")
+FLAT_MODEL_PATH = os.getenv("FLAT_MODEL_PATH", "models/iris_model_flat")
+FLAT_ENGINE_MAX_ROWS = int(os.getenv("FLAT_ENGINE_MAX_ROWS", str(FLAT_MAX_ROWS)))
+
+# Repeated feature vectors are answered from an in-process LRU cache of up to
+# PREDICTION_CACHE_SIZE entries (0 disables), optionally expiring after
+# PREDICTION_CACHE_TTL seconds. It is cleared whenever the model version changes.
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "0")) or None
+PREDICTION_CACHE_DECIMALS = int(os.getenv("PREDICTION_CACHE_DECIMALS", "6"))
+# Hashing every row of a big batch on the event loop costs more than scoring
+# it, so batches above PREDICTION_CACHE_MAX_BATCH rows skip the cache.
+PREDICTION_CACHE_MAX_BATCH = int(os.getenv("PREDICTION_CACHE_MAX_BATCH", "32"))
+
+# Live drift: served feature vectors are compared against the reference sketch
+# written by the pipeline over a sliding window of DRIFT_WINDOW_SIZE rows.
+DRIFT_SKETCH_PATH = os.getenv(
+    "DRIFT_SKETCH_PATH", "data/drift_baseline/iris_drift_sketch.json"
+)
+DRIFT_WINDOW_SIZE = int(os.getenv("DRIFT_WINDOW_SIZE", "10000"))
+
+# Prediction logging: with PREDICTION_LOG_PATH set (.jsonl, or .parquet for a
+# directory of part files) every served prediction is buffered and flushed in
+# the background every PREDICTION_LOG_FLUSH_INTERVAL seconds. Rows beyond
+# PREDICTION_LOG_MAX_BUFFER are dropped and counted instead of blocking.
+PREDICTION_LOG_PATH = os.getenv("PREDICTION_LOG_PATH", "")
+PREDICTION_LOG_MAX_BUFFER = int(os.getenv("PREDICTION_LOG_MAX_BUFFER", "100000"))
+PREDICTION_LOG_FLUSH_ROWS = int(os.getenv("PREDICTION_LOG_FLUSH_ROWS", "1000"))
+PREDICTION_LOG_FLUSH_INTERVAL = float(os.getenv("PREDICTION_LOG_FLUSH_INTERVAL", "1"))
+PREDICTION_LOG_MAX_BYTES = int(os.getenv("PREDICTION_LOG_MAX_BYTES", str(64 << 20)))
+PREDICTION_LOG_BACKUPS = int(os.getenv("PREDICTION_LOG_BACKUPS", "5"))
+
+# Input validation: rows are checked against the served model's feature count
+# and for NaN/inf before inference, failing fast with a 422. Rows outside the
+# training ranges (VALIDATION_STATS_PATH, else the drift sketch) widened by
+# VALIDATION_RANGE_MARGIN of the range are flagged in the response, or
+# rejected when VALIDATION_REJECT_OUT_OF_RANGE is on.
+VALIDATION_STATS_PATH = os.getenv(
+    "VALIDATION_STATS_PATH", "data/processed/iris_clean_stats.json"
+)
+VALIDATION_RANGE_MARGIN = float(os.getenv("VALIDATION_RANGE_MARGIN", "0.1"))
+VALIDATION_REJECT_OUT_OF_RANGE = os.getenv(
+    "VALIDATION_REJECT_OUT_OF_RANGE", "false"
+).lower() in ("1", "true", "yes")
+
+# Multi-model serving: requests may pass ?model=<alias or registered name> with
+# &version= or &stage= to use a model other than the primary one. Such models
+# are loaded on first use and the least recently used are unloaded once they
+# exceed MODEL_MEMORY_BUDGET_MB. SERVING_MODELS defines aliases as
+# "name=kind:uri,...". SHADOW_MODEL re-scores SHADOW_SAMPLE_RATE of default
+# requests in the background, and CANARY_MODEL serves CANARY_FRACTION of them.
+SERVING_MODELS = parse_aliases(os.getenv("SERVING_MODELS", ""))
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "512"))
+SHADOW_MODEL = os.getenv("SHADOW_MODEL", "")
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "1"))
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", "64"))
+CANARY_MODEL = os.getenv("CANARY_MODEL", "")
+CANARY_FRACTION = float(os.getenv("CANARY_FRACTION", "0.05"))
+
+# Hot reload: POST /admin/reload swaps in a freshly loaded model, and with
+# MODEL_WATCH_INTERVAL > 0 the local model artifact is polled for changes.
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+
+# Request bodies may be JSON or, for large batches, raw float32, .npy or
+# MessagePack (see src/request_codecs.py). /predict echoes the features back
+# unless PREDICT_ECHO_FEATURES is off or the request passes ?echo_features=false.
+PREDICT_ECHO_FEATURES = os.getenv("PREDICT_ECHO_FEATURES", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Rows sent through a newly loaded model before it starts serving
+WARMUP_ROWS = [[5.1, 3.5, 1.4, 0.2], [6.2, 2.9, 4.3, 1.3], [7.3, 2.9, 6.3, 1.8]]
+
+model = None
+model_source = None
+model_version = None
+validator = None
+executor = None
+batcher = None
+prediction_cache = None
+drift_detector = None
+prediction_logger = None
+registry = None
+shadow_source = None
+canary_source = None
+shadow_tasks = set()
+watcher = None
+reload_lock = None
+
 
 # Define input data model
 class IrisData(BaseModel):
@@ -24,46 +202,472 @@ class IrisData(BaseModel):
         }
 
 
+class IrisBatchData(BaseModel):
+    instances: List[List[float]]
+
+    class Config:
+        schema_extra = {
+            "example": {"instances": [[5.1, 3.5, 1.4, 0.2], [6.2, 2.9, 4.3, 1.3]]}
+        }
+
+
+def predict_with(current_model, features):
+    """Run a model on a 2D feature array and return a list of labels"""
+    return np.asarray(current_model.predict(features)).tolist()
+
+
+async def run_inference(features, served=None):
+    """Predict with whichever executor is current when the batch is dispatched"""
+    BATCH_SIZE.observe(len(features))
+    start = time.perf_counter()
+    try:
+        if served is not None:
+            return await served.executor.run(features)
+        return await executor.run(features)
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage="predict")
+
+
+def to_array(rows):
+    start = time.perf_counter()
+    # Decoded binary bodies are already arrays and are passed through uncopied
+    features = np.asarray(rows)
+    STAGE_LATENCY.observe(time.perf_counter() - start, stage="conversion")
+    return features
+
+
+def observe_validation(request):
+    """Record time from request arrival to the handler: body parsing and validation.
+
+    Time spent routing the request (and loading its model) is excluded.
+    """
+    start = getattr(request.state, "request_start", None)
+    if start is not None:
+        elapsed = time.perf_counter() - start
+        elapsed -= getattr(request.state, "routing_seconds", 0.0)
+        STAGE_LATENCY.observe(elapsed, stage="validation")
+
+
+async def parse_body(request, schema):
+    """Decode the request body according to its content type.
+
+    JSON is validated against ``schema`` and returns the parsed model, so
+    errors match FastAPI's usual 422s. Binary formats return a 2D array
+    decoded directly from the body bytes.
+    """
+    body = await request.body()
+    content_type = media_type(request.headers.get("content-type"))
+    if is_json(content_type):
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", 0), "msg": str(e)}]
+            )
+        try:
+            return schema.model_validate(payload)
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+            )
+
+    n_features = request.headers.get("x-feature-count")
+    try:
+        if n_features is None:
+            n_features = getattr(model, "n_features_in_", None)
+        return decode_rows(content_type, body, int(n_features or 0))
+    except UnsupportedMediaType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except (DecodeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def validate_rows(rows, served=None):
+    """Check rows against the served model; returns (array, out-of-distribution mask)"""
+    current_validator = served.validator if served is not None else validator
+    try:
+        X = np.asarray(rows)
+    except ValueError:
+        raise HTTPException(
+            status_code=422, detail="Every row must have the same number of features"
+        )
+    if current_validator is None:
+        return X, None
+    try:
+        out_of_range = current_validator.check(X)
+    except InvalidInput as e:
+        VALIDATION_ROWS.inc(max(len(X), 1), result="rejected")
+        raise HTTPException(status_code=422, detail=str(e))
+    flagged = int(out_of_range.sum())
+    if flagged:
+        VALIDATION_ROWS.inc(flagged, result="out_of_distribution")
+    return X, out_of_range
+
+
+def log_predictions(request, rows, predictions, version=None):
+    """Hand served predictions to the background prediction logger"""
+    if prediction_logger is None:
+        return
+    if isinstance(rows, np.ndarray):
+        rows = rows.tolist()
+    start = getattr(request.state, "request_start", None)
+    latency_ms = (time.perf_counter() - start) * 1000 if start is not None else None
+    prediction_logger.log(rows, predictions, latency_ms, version or model_version)
+
+
+def prepare_served_model(entry):
+    """Give a model loaded on demand its own executor and validator"""
+    if isinstance(entry.model, HybridForest):
+        entry.model.max_rows = FLAT_ENGINE_MAX_ROWS
+    entry.executor = start_executor(entry.model, entry.source)
+    entry.validator = build_validator(entry.model)
+
+
+def release_served_model(entry):
+    # The registry only releases entries no request holds any more
+    entry.executor.shutdown(cancel_pending=False)
+
+
+async def route_request(model_name, version, stage):
+    """The registry model serving a request, or None for the primary model.
+
+    Requests naming a model get that model (404 if it cannot be loaded).
+    Otherwise CANARY_FRACTION of requests go to the canary model while it is
+    loadable.
+    """
+    if model_name or version or stage:
+        try:
+            source = resolve_source(model_name, version, stage, SERVING_MODELS)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        try:
+            return await registry.get(source)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    if canary_source is not None and random.random() < CANARY_FRACTION:
+        try:
+            return await registry.get(canary_source)
+        except LookupError:
+            return None
+    return None
+
+
+@contextlib.asynccontextmanager
+async def routed_model(request, model_name, version, stage):
+    """``route_request`` holding the registry entry until the request is done.
+
+    Routing, which includes loading a model on first use, is timed as its own
+    stage and left out of the validation stage.
+    """
+    start = time.perf_counter()
+    try:
+        served = await route_request(model_name, version, stage)
+    finally:
+        request.state.routing_seconds = time.perf_counter() - start
+        STAGE_LATENCY.observe(request.state.routing_seconds, stage="routing")
+    try:
+        yield served
+    finally:
+        if served is not None:
+            registry.done(served)
+
+
+def mirror_to_shadow(X, predictions):
+    """Re-score served rows with the shadow model without delaying the response"""
+    if shadow_source is None or random.random() >= SHADOW_SAMPLE_RATE:
+        return
+    if len(shadow_tasks) >= SHADOW_MAX_PENDING:
+        SHADOW_ROWS.inc(len(X), result="dropped")
+        return
+    task = asyncio.create_task(score_shadow(X, predictions))
+    shadow_tasks.add(task)
+    task.add_done_callback(shadow_tasks.discard)
+
+
+async def score_shadow(X, predictions):
+    served = None
+    try:
+        served = await registry.get(shadow_source)
+        shadow_predictions = await served.executor.run(X)
+    except Exception:
+        SHADOW_ROWS.inc(len(X), result="error")
+        return
+    finally:
+        if served is not None:
+            registry.done(served)
+    agree = int(np.sum(np.asarray(shadow_predictions) == np.asarray(predictions)))
+    SHADOW_ROWS.inc(agree, result="agree")
+    SHADOW_ROWS.inc(len(X) - agree, result="disagree")
+
+
+def json_response(content):
+    start = time.perf_counter()
+    response = JSONResponse(content)
+    STAGE_LATENCY.observe(time.perf_counter() - start, stage="serialization")
+    return response
+
+
+async def predict_one(features):
+    """Predict a single row through the cache, micro-batcher or executor"""
+    # The cache may be swapped or cleared at shutdown while this call waits
+    cache = prediction_cache
+    key = None
+    if cache is not None:
+        key = cache.key(features)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    if batcher is not None:
+        prediction = await batcher.submit(features)
+    else:
+        prediction = (await run_inference(to_array([features])))[0]
+
+    if key is not None:
+        cache.put(key, prediction)
+    return prediction
+
+
+async def predict_many(instances):
+    """Predict many rows, only sending cache misses to the model"""
+    if prediction_cache is None or len(instances) > PREDICTION_CACHE_MAX_BATCH:
+        return await run_inference(to_array(instances))
+
+    keys = [prediction_cache.key(row) for row in instances]
+    predictions = [prediction_cache.get(key) for key in keys]
+    missing = [i for i, prediction in enumerate(predictions) if prediction is None]
+    if missing:
+        computed = await run_inference(to_array([instances[i] for i in missing]))
+        for i, prediction in zip(missing, computed):
+            predictions[i] = prediction
+            prediction_cache.put(keys[i], prediction)
+    return predictions
+
+
+def load_model_sync():
+    """Probe the configured model sources, returning (model, source)"""
+    loaded, source = None, None
+    if MODEL_ENGINE == "flat":
+        loaded, source = probe_model_sources(
+            sources=[("flat", FLAT_MODEL_PATH, "Flat forest artifact")],
+            mmap_mode=MODEL_MMAP_MODE,
+        )
+    if loaded is None:
+        loaded, source = probe_model_sources(
+            cache_path=MODEL_SOURCE_CACHE, mmap_mode=MODEL_MMAP_MODE
+        )
+    if (
+        MODEL_ENGINE == "flat"
+        and loaded is not None
+        and not isinstance(loaded, (FlatForest, HybridForest))
+        and hasattr(loaded, "estimators_")
+    ):
+        loaded = HybridForest(FlatForest.from_sklearn(loaded), loaded)
+        print("Compiled the loaded forest into the flat-array engine")
+    if isinstance(loaded, HybridForest):
+        loaded.max_rows = FLAT_ENGINE_MAX_ROWS
+    return loaded, source
+
+
+def build_validator(current_model):
+    """Input validator for a model: its feature count plus training ranges"""
+    if current_model is None:
+        return None
+    ranges, path = load_training_ranges([VALIDATION_STATS_PATH, DRIFT_SKETCH_PATH])
+    low, high = ranges if ranges is not None else (None, None)
+    new_validator = FeatureValidator(
+        getattr(current_model, "n_features_in_", None),
+        low,
+        high,
+        margin=VALIDATION_RANGE_MARGIN,
+        reject_out_of_range=VALIDATION_REJECT_OUT_OF_RANGE,
+    )
+    if new_validator.low is not None:
+        print(f"Validating feature ranges against {path}")
+    return new_validator
+
+
+def start_executor(current_model, source):
+    """Create an inference executor bound to one model"""
+    new_executor = InferenceExecutor(
+        backend=INFERENCE_BACKEND,
+        max_workers=INFERENCE_WORKERS,
+        max_pending=INFERENCE_MAX_PENDING,
+    )
+    if current_model is not None:
+        new_executor.start(
+            functools.partial(predict_with, current_model),
+            model_source=source,
+            mmap_mode=MODEL_MMAP_MODE,
+            flat_max_rows=FLAT_ENGINE_MAX_ROWS,
+        )
+    return new_executor
+
+
 # Load the model at startup
 @app.on_event("startup")
 async def load_model():
-    global model
+    global model, model_source, model_version, validator
+
+    model, model_source = load_model_sync()
+    validator = build_validator(model)
+    if model is not None:
+        model_version = source_version(*model_source)
+    else:
+        model_version = None
+        print(
+            "Warning: No model could be loaded. API will return errors for prediction requests."
+        )
+        print(
+            "Please ensure you have trained a model first by running: python simple_train.py"
+        )
 
-    # Try loading joblib model first (simple and direct)
-    if os.path.exists("models/iris_model.pkl"):
+
+@app.on_event("startup")
+async def start_workers():
+    global executor, batcher, prediction_cache, drift_detector, watcher, reload_lock
+    global prediction_logger, registry, shadow_source, canary_source
+
+    reload_lock = asyncio.Lock()
+    registry = ModelRegistry(
+        max_bytes=int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024),
+        prepare=prepare_served_model,
+        release=release_served_model,
+        mmap_mode=MODEL_MMAP_MODE,
+    )
+    shadow_source = parse_target(SHADOW_MODEL, SERVING_MODELS) if SHADOW_MODEL else None
+    canary_source = parse_target(CANARY_MODEL, SERVING_MODELS) if CANARY_MODEL else None
+    if shadow_source is not None:
+        print(f"Mirroring {SHADOW_SAMPLE_RATE:.0%} of requests to shadow {shadow_source[1]}")
+    if canary_source is not None:
+        print(f"Serving {CANARY_FRACTION:.0%} of requests from canary {canary_source[1]}")
+    if PREDICTION_LOG_PATH:
+        prediction_logger = PredictionLogger(
+            PREDICTION_LOG_PATH,
+            max_buffer_rows=PREDICTION_LOG_MAX_BUFFER,
+            flush_rows=PREDICTION_LOG_FLUSH_ROWS,
+            flush_interval=PREDICTION_LOG_FLUSH_INTERVAL,
+            max_bytes=PREDICTION_LOG_MAX_BYTES,
+            backup_count=PREDICTION_LOG_BACKUPS,
+        )
+        await prediction_logger.start()
+        print(f"Logging predictions to {PREDICTION_LOG_PATH}")
+    if os.path.exists(DRIFT_SKETCH_PATH):
+        drift_detector = StreamingDriftDetector(
+            load_sketch(DRIFT_SKETCH_PATH), window_size=DRIFT_WINDOW_SIZE
+        )
+        print(f"Live drift detection enabled against {DRIFT_SKETCH_PATH}")
+    if PREDICTION_CACHE_SIZE > 0:
+        prediction_cache = PredictionCache(
+            maxsize=PREDICTION_CACHE_SIZE,
+            ttl=PREDICTION_CACHE_TTL,
+            decimals=PREDICTION_CACHE_DECIMALS,
+        )
+        prediction_cache.set_model_version(model_version)
+
+    executor = start_executor(model, model_source)
+    if model is not None:
+        print(
+            f"Inference backend: {executor.backend} "
+            f"(workers={executor.max_workers}, max_pending={executor.max_pending})"
+        )
+
+    if MICRO_BATCHING:
+        batcher = MicroBatcher(
+            run_inference,
+            max_batch_size=MICRO_BATCH_MAX_SIZE,
+            max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+            max_queue_size=INFERENCE_MAX_PENDING * MICRO_BATCH_MAX_SIZE,
+        )
+        await batcher.start()
+        print(
+            f"Micro-batching enabled (max_batch_size={MICRO_BATCH_MAX_SIZE}, "
+            f"max_wait_ms={MICRO_BATCH_MAX_WAIT_MS})"
+        )
+
+    if MODEL_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(watch_model_source())
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    global executor, batcher, prediction_cache, drift_detector, watcher
+    global prediction_logger, registry
+
+    if watcher is not None:
+        watcher.cancel()
+        watcher = None
+    for task in list(shadow_tasks):
+        task.cancel()
+    if registry is not None:
+        registry.clear()
+        registry = None
+    # Batches still running finish with the cache and drift detector in place
+    if batcher is not None:
+        await batcher.stop()
+        batcher = None
+    prediction_cache = None
+    drift_detector = None
+    if executor is not None:
+        executor.shutdown()
+        executor = None
+    if prediction_logger is not None:
+        await prediction_logger.stop()
+        prediction_logger = None
+
+
+async def reload_model():
+    """Load, warm up and atomically swap in the current model.
+
+    The new model is loaded and warmed off the event loop while the old one
+    keeps serving. The swap itself happens without yielding to the event loop,
+    and the old executor is retired without cancelling work it has accepted, so
+    in-flight requests finish on the old model. Returns True if a model was
+    swapped in.
+    """
+    global model, model_source, model_version, validator, executor
+
+    async with reload_lock:
+        loop = asyncio.get_running_loop()
+        new_model, new_source = await loop.run_in_executor(None, load_model_sync)
+        if new_model is None:
+            print("Reload failed: no model could be loaded, keeping current model")
+            return False
+
+        new_executor = start_executor(new_model, new_source)
         try:
-            model = joblib.load("models/iris_model.pkl")
-            print("Model loaded successfully from: models/iris_model.pkl")
-            return
+            await new_executor.run(np.array(WARMUP_ROWS))
         except Exception as e:
-            print(f"Failed to load joblib model: {str(e)}")
+            new_executor.shutdown()
+            print(f"Reload failed: warm-up predictions raised {e}")
+            return False
 
-    # Fallback to MLflow approaches
-    import mlflow
+        new_validator = build_validator(new_model)
+        old_executor = executor
+        model, model_source, executor = new_model, new_source, new_executor
+        validator = new_validator
+        model_version = source_version(*new_source)
+        if prediction_cache is not None:
+            prediction_cache.set_model_version(model_version)
+        if old_executor is not None:
+            old_executor.shutdown(cancel_pending=False)
+        print(f"Model reloaded: {model_version}")
+        return True
 
-    model_approaches = [
-        ("models:/IrisRandomForest/Staging", "Model Registry - Staging"),
-        ("models:/IrisRandomForest/latest", "Model Registry - Latest"),
-        ("mlruns/models", "Local models directory"),
-        ("mlruns/0/85352b5f8d474b4f850f206501da8f7b/artifacts/model", "Run artifacts"),
-    ]
 
-    for model_uri, description in model_approaches:
+async def watch_model_source():
+    """Reload the model when its local artifact changes on disk"""
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        if model_source is None:
+            continue
         try:
-            model = mlflow.pyfunc.load_model(model_uri)
-            print(f"Model loaded successfully from: {description} ({model_uri})")
-            return
-        except Exception as e:
-            print(f"Failed to load model from {description}: {str(e)}")
+            changed = source_version(*model_source) != model_version
+        except OSError:
             continue
-
-    model = None
-    print(
-        "Warning: No model could be loaded. API will return errors for prediction requests."
-    )
-    print(
-        "Please ensure you have trained a model first by running: python simple_train.py"
-    )
+        if changed:
+            print(f"Model artifact changed: {model_source[1]}")
+            await reload_model()
 
 
 @app.get("/")
@@ -71,25 +675,152 @@ async def root():
     return {"message": "Welcome to the Iris Model Prediction API"}
 
 
-@app.post("/predict")
-async def predict(data: IrisData):
-    if model is None:
-        raise HTTPException(status_code=500, detail="Model not loaded")
+@app.post("/predict", openapi_extra=request_body_docs(IrisData))
+async def predict(
+    request: Request,
+    echo_features: Optional[bool] = None,
+    model_name: Optional[str] = Query(None, alias="model"),
+    version: Optional[str] = None,
+    stage: Optional[str] = None,
+):
+    data = await parse_body(request, IrisData)
+    if not isinstance(data, IrisData) and len(data) != 1:
+        raise HTTPException(
+            status_code=422,
+            detail=f"/predict takes one row, got {len(data)}; use /predict_batch",
+        )
+    async with routed_model(request, model_name, version, stage) as served:
+        X, out_of_range = validate_rows(
+            [data.features] if isinstance(data, IrisData) else data, served
+        )
+        # Binary bodies give an ndarray row; logging and echoing need plain floats
+        features = data.features if isinstance(data, IrisData) else X[0].tolist()
+        observe_validation(request)
+        if served is None and model is None:
+            raise HTTPException(status_code=500, detail="Model not loaded")
+
+        try:
+            if served is None:
+                prediction = await predict_one(features)
+            else:
+                prediction = (await run_inference(X, served))[0]
+            if drift_detector is not None:
+                drift_detector.add(features)
+            log_predictions(request, [features], [prediction], served and served.version)
+            # Only primary-model traffic is compared against the shadow
+            if served is None:
+                mirror_to_shadow(X, [prediction])
+            content = {"prediction": prediction}
+            if served is not None:
+                content["model_version"] = served.version
+            if PREDICT_ECHO_FEATURES if echo_features is None else echo_features:
+                content["features"] = features
+            if out_of_range is not None and out_of_range[0]:
+                content["out_of_distribution"] = True
+            return json_response(content)
+        except Overloaded as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
-    try:
-        # Convert input features to numpy array
-        features = np.array([data.features])
-        # Make prediction
-        prediction = model.predict(features)
-
-        # Convert prediction to Python type for JSON serialization
-        prediction = (
-            prediction.tolist()[0] if isinstance(prediction, np.ndarray) else prediction
+
+@app.post("/predict_batch", openapi_extra=request_body_docs(IrisBatchData))
+async def predict_batch(
+    request: Request,
+    model_name: Optional[str] = Query(None, alias="model"),
+    version: Optional[str] = None,
+    stage: Optional[str] = None,
+):
+    data = await parse_body(request, IrisBatchData)
+    async with routed_model(request, model_name, version, stage) as served:
+        instances, out_of_range = validate_rows(
+            data.instances if isinstance(data, IrisBatchData) else data, served
         )
+        observe_validation(request)
+        if served is None and model is None:
+            raise HTTPException(status_code=500, detail="Model not loaded")
+
+        try:
+            if served is None:
+                predictions = await predict_many(instances)
+            else:
+                predictions = await run_inference(to_array(instances), served)
+            if drift_detector is not None:
+                drift_detector.update(instances)
+            log_predictions(request, instances, predictions, served and served.version)
+            # Only primary-model traffic is compared against the shadow
+            if served is None:
+                mirror_to_shadow(instances, predictions)
+            content = {"predictions": predictions}
+            if served is not None:
+                content["model_version"] = served.version
+            if out_of_range is not None and out_of_range.any():
+                content["out_of_distribution"] = np.flatnonzero(out_of_range).tolist()
+            return json_response(content)
+        except Overloaded as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/admin/reload")
+async def admin_reload():
+    reloaded = await reload_model()
+    if not reloaded:
+        raise HTTPException(status_code=500, detail="Model reload failed")
+    return {"reloaded": True, "model_version": model_version}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+
+@app.get("/models")
+async def list_models():
+    return {
+        "primary": model_version,
+        "registry": registry.stats() if registry is not None else None,
+        "loaded": registry.describe() if registry is not None else [],
+        "aliases": {name: uri for name, (_, uri) in SERVING_MODELS.items()},
+        "shadow": shadow_source[1] if shadow_source else None,
+        "canary": canary_source[1] if canary_source else None,
+    }
+
+
+@app.get("/drift")
+async def drift():
+    if drift_detector is None:
+        return {"enabled": False}
+    return {"enabled": True, **drift_detector.statistics()}
+
 
-        return {"prediction": prediction, "features": data.features}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/metrics")
+async def metrics_endpoint():
+    if executor is not None:
+        QUEUE_DEPTH.set(executor.pending, queue="executor")
+    if batcher is not None:
+        QUEUE_DEPTH.set(batcher.queue_depth, queue="micro_batch")
+    MODEL_INFO.clear()
+    if model_version is not None:
+        MODEL_INFO.set(1, version=model_version)
+    if prediction_cache is not None:
+        for stat in ("hits", "misses", "evictions", "size"):
+            CACHE_STATS.set(prediction_cache.stats()[stat], stat=stat)
+    if drift_detector is not None:
+        for feature, stats in drift_detector.statistics()["features"].items():
+            FEATURE_DRIFT.set(stats["psi"], feature=feature, statistic="psi")
+            FEATURE_DRIFT.set(stats["ks"], feature=feature, statistic="ks")
+    if prediction_logger is not None:
+        for stat, value in prediction_logger.stats().items():
+            PREDICTION_LOG_STATS.set(value, stat=stat)
+    if registry is not None:
+        for stat, value in registry.stats().items():
+            if value is not None:
+                MODEL_REGISTRY_STATS.set(value, stat=stat)
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the pipeline stages and model inference.
+
+Every stage runs on synthetic iris-shaped data at each of ``--sizes`` rows,
+inside a scratch directory so models and MLflow runs of the real project are
+left alone. For each (stage, size) the best wall time of ``--repeat`` runs is
+recorded, and one extra run under tracemalloc records the peak memory
+allocated through Python (which includes NumPy and pandas buffers but not
+memory sklearn's compiled tree builders allocate directly).
+
+Results are written to ``--output``; with a baseline file present they are
+compared against it and the script exits with status 1 if any stage got
+slower or more memory hungry than ``--max-regression`` allows. The report
+also prints how each stage scales with the number of rows (1.0 = linear).
+
+Usage:
+    python -m scripts.benchmark --sizes 1000 10000 100000
+    python -m scripts.benchmark --sizes 1000000 --only clean_data predict_batch
+    python -m scripts.benchmark --save-baseline
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+
+import mlflow
+import numpy as np
+import pandas as pd
+
+from src import tracking_logger
+from src.data_preprocessing import clean_data
+from src.drift_sketch import build_drift_sketch
+from src.evaluate import evaluate_model
+from src.train import train_model
+
+BASELINE_PATH = "benchmarks/baseline.json"
+BENCHMARKS = (
+    "clean_data",
+    "drift_sketch",
+    "drift_baseline",
+    "train_model",
+    "evaluate_model",
+    "predict_single",
+    "predict_batch",
+)
+# Single-row predictions timed per size; the per-row cost is what matters
+SINGLE_ROW_CALLS = 100
+# Differences below this many seconds are timer noise, never regressions
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def synthetic_iris(rows, raw_path="data/raw/iris.csv", seed=0):
+    """``rows`` iris-like rows: real rows resampled with per-class jitter"""
+    iris = pd.read_csv(raw_path)
+    rng = np.random.default_rng(seed)
+    sample = iris.iloc[rng.integers(0, len(iris), size=rows)].reset_index(drop=True)
+    features = sample.columns.drop("target")
+    noise = rng.normal(0, 0.05, size=(rows, len(features)))
+    scale = iris.groupby("target")[features].std().loc[sample["target"]].to_numpy()
+    sample[features] = np.round(sample[features].to_numpy() + noise * scale * 10, 2)
+    return sample
+
+
+def measure(fn, repeat=3, memory=True):
+    """Best wall time of ``repeat`` calls, plus peak traced MB of one more"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    peak_mb = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    return min(times), peak_mb
+
+
+@contextmanager
+def scratch_workspace():
+    """Run inside a temporary directory with its own local MLflow store"""
+    previous_dir = os.getcwd()
+    previous_uri = mlflow.get_tracking_uri()
+    workdir = tempfile.mkdtemp(prefix="iris_bench_")
+    os.makedirs(os.path.join(workdir, "models"))
+    os.chdir(workdir)
+    mlflow.set_tracking_uri(f"file:{os.path.join(workdir, 'mlruns')}")
+    try:
+        with tracking_logger.start_run(run_name="benchmark"):
+            yield workdir
+    finally:
+        os.chdir(previous_dir)
+        mlflow.set_tracking_uri(previous_uri)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def stage_benchmarks(df, raw_path, processed_path, only=None):
+    """(name, rows processed, callable) for every stage, in pipeline order"""
+    state = {}
+
+    def train():
+        state["model"] = train_model(processed_path, df=df)[0]
+
+    def drift_baseline():
+        from src.drift_detection import generate_drift_baseline
+
+        generate_drift_baseline(processed_path, "drift_baseline.html")
+
+    X = df.drop(columns="target")
+    single_rows = X.iloc[:SINGLE_ROW_CALLS]
+
+    def predict_single():
+        model = state["model"]
+        for i in range(len(single_rows)):
+            model.predict(single_rows.iloc[i : i + 1])
+
+    stages = [
+        ("clean_data", len(df), lambda: clean_data(raw_path, processed_path)),
+        ("drift_sketch", len(df), lambda: build_drift_sketch(processed_path, "sketch.json", df=df)),
+        ("drift_baseline", len(df), drift_baseline),
+        ("train_model", len(df), train),
+        ("evaluate_model", len(df), lambda: evaluate_model(state["model"], processed_path, df=df)),
+        ("predict_single", len(single_rows), predict_single),
+        ("predict_batch", len(df), lambda: state["model"].predict(X)),
+    ]
+    needs_model = {"evaluate_model", "predict_single", "predict_batch"}
+    for name, rows, fn in stages:
+        if only and name not in only:
+            # Inference stages still need a model to time
+            if name == "train_model" and needs_model & set(only):
+                with redirect_stdout(io.StringIO()):
+                    train()
+            continue
+        yield name, rows, fn
+
+
+def run_benchmarks(sizes, repeat=3, memory=True, only=None):
+    results = []
+    for size in sizes:
+        df = synthetic_iris(size)
+        with scratch_workspace():
+            df.to_csv("raw.csv", index=False)
+            clean_data("raw.csv", "processed.csv")
+            for name, rows, fn in stage_benchmarks(df, "raw.csv", "processed.csv", only):
+                if name == "drift_baseline" and not evidently_available():
+                    print("⚠️  Skipping drift_baseline (evidently not installed)")
+                    continue
+                # Stages print progress; keep the report readable
+                with redirect_stdout(io.StringIO()):
+                    seconds, peak_mb = measure(fn, repeat, memory)
+                result = {
+                    "name": name,
+                    "rows": size,
+                    "seconds": round(seconds, 6),
+                    "per_row_us": round(seconds / rows * 1e6, 3),
+                    "peak_mb": None if peak_mb is None else round(peak_mb, 3),
+                }
+                results.append(result)
+                print(
+                    f"  {name:<16} {size:>10,} rows  {seconds:9.4f}s  "
+                    f"{result['per_row_us']:10.3f}µs/row  "
+                    + ("" if peak_mb is None else f"{peak_mb:9.1f}MB")
+                )
+    return results
+
+
+def evidently_available():
+    try:
+        import evidently  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def scaling_exponents(results):
+    """Slope of log(seconds) over log(rows) per stage; 1.0 means linear"""
+    exponents = {}
+    for name in dict.fromkeys(r["name"] for r in results):
+        points = [
+            (r["rows"], r["seconds"])
+            for r in results
+            if r["name"] == name and r["seconds"] > 0
+        ]
+        if len({rows for rows, _ in points}) < 2:
+            continue
+        rows, seconds = np.log(np.array(points, dtype=np.float64)).T
+        exponents[name] = round(float(np.polyfit(rows, seconds, 1)[0]), 3)
+    return exponents
+
+
+def compare(results, baseline, max_regression=0.2):
+    """Join results with a baseline by (stage, rows); flags regressions.
+
+    A stage regresses when its time or peak memory grows by more than
+    ``max_regression`` (a fraction) and, for time, by at least
+    ``MIN_REGRESSION_SECONDS``.
+    """
+    previous = {(r["name"], r["rows"]): r for r in baseline.get("results", [])}
+    rows = []
+    for result in results:
+        before = previous.get((result["name"], result["rows"]))
+        if before is None:
+            continue
+        time_ratio = result["seconds"] / before["seconds"] if before["seconds"] else None
+        memory_ratio = None
+        if result["peak_mb"] is not None and before.get("peak_mb"):
+            memory_ratio = result["peak_mb"] / before["peak_mb"]
+        slower = (
+            time_ratio is not None
+            and time_ratio > 1 + max_regression
+            and result["seconds"] - before["seconds"] >= MIN_REGRESSION_SECONDS
+        )
+        hungrier = memory_ratio is not None and memory_ratio > 1 + max_regression
+        rows.append(
+            {
+                "name": result["name"],
+                "rows": result["rows"],
+                "seconds": result["seconds"],
+                "baseline_seconds": before["seconds"],
+                "time_ratio": time_ratio,
+                "memory_ratio": memory_ratio,
+                "regressed": slower or hungrier,
+            }
+        )
+    return rows
+
+
+def format_report(comparison, exponents):
+    lines = []
+    if comparison:
+        lines.append(
+            f"  {'stage':<16} {'rows':>10} {'seconds':>10} {'baseline':>10} "
+            f"{'time':>7} {'memory':>7}"
+        )
+    for row in comparison:
+        memory = "" if row["memory_ratio"] is None else f"{row['memory_ratio']:.2f}x"
+        time_ratio = "" if row["time_ratio"] is None else f"{row['time_ratio']:.2f}x"
+        flag = "  ❌" if row["regressed"] else ""
+        lines.append(
+            f"  {row['name']:<16} {row['rows']:>10,} {row['seconds']:>10.4f} "
+            f"{row['baseline_seconds']:>10.4f} {time_ratio:>7} {memory:>7}{flag}"
+        )
+    if exponents:
+        lines.append("📈 Scaling exponents (time ~ rows^k):")
+        lines.extend(f"  {name:<16} k={k:.2f}" for name, k in exponents.items())
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc run")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS)
+    parser.add_argument("--output", default="benchmarks/latest.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Write results as the new baseline"
+    )
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"🚀 Benchmarking {', '.join(args.only or BENCHMARKS)} at {args.sizes} rows")
+    results = run_benchmarks(args.sizes, args.repeat, not args.no_memory, args.only)
+    exponents = scaling_exponents(results)
+    report = {
+        "python": sys.version.split()[0],
+        "timestamp": time.time(),
+        "results": results,
+        "scaling_exponents": exponents,
+    }
+
+    output = args.baseline if args.save_baseline else args.output
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {output}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        if exponents:
+            print(format_report([], exponents))
+        return
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    comparison = compare(results, baseline, args.max_regression)
+    print(f"📊 Compared with {args.baseline}:")
+    print(format_report(comparison, exponents))
+    regressed = [row for row in comparison if row["regressed"]]
+    if regressed:
+        print(f"❌ {len(regressed)} stage(s) regressed by more than {args.max_regression:.0%}")
+        sys.exit(1)
+    print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Load test for the serving API.
+Drives /predict (or /predict_batch) with concurrent async requests and
+records latency percentiles, throughput and error rate to a JSON file.
+
+Two load models are supported:
+
+- ``closed``: ``--concurrency`` clients each send a request as soon as their
+  previous one returns. Measures the maximum throughput of the server.
+- ``fixed``: requests are started at ``--rate`` per second regardless of how
+  fast the server answers. Latency is measured from the scheduled send time,
+  so queueing behind a slow server shows up in the tail instead of silently
+  lowering the offered load.
+
+With ``--baseline`` the run is compared against an earlier result file and
+the script exits with status 1 if p95/p99 latency or throughput regressed by
+more than ``--max-regression``, so it can gate serving changes in CI.
+
+Usage:
+    python -m scripts.load_test --start-server --mode closed --concurrency 32
+    python -m scripts.load_test --url http://localhost:8000 --mode fixed --rate 500 \\
+        --baseline benchmarks/load_test_baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+import numpy as np
+
+# Per-feature ranges of the iris training data, used to generate request rows
+FEATURE_LOW = np.array([4.3, 2.0, 1.0, 0.1])
+FEATURE_HIGH = np.array([7.9, 4.4, 6.9, 2.5])
+PERCENTILES = (50, 95, 99)
+
+
+def make_payloads(count, batch_size=1, seed=0):
+    """Request bodies with random iris-shaped rows, rounded like real input"""
+    rng = np.random.default_rng(seed)
+    rows = rng.uniform(FEATURE_LOW, FEATURE_HIGH, size=(count, batch_size, 4))
+    rows = np.round(rows, 1).tolist()
+    if batch_size == 1:
+        return [{"features": batch[0]} for batch in rows]
+    return [{"instances": batch} for batch in rows]
+
+
+class Recorder:
+    """Collects one (latency, status) pair per request"""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+
+    def record(self, latency, status):
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not (isinstance(status, int) and 200 <= status < 300):
+            self.errors += 1
+
+
+async def send(client, path, payload, recorder, scheduled=None):
+    start = time.perf_counter() if scheduled is None else scheduled
+    try:
+        response = await client.post(path, json=payload)
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    recorder.record(time.perf_counter() - start, status)
+
+
+async def closed_loop(client, path, payloads, concurrency, duration):
+    """``concurrency`` clients sending back-to-back until ``duration`` elapses"""
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    async def worker(offset):
+        i = offset
+        while time.perf_counter() < deadline:
+            await send(client, path, payloads[i % len(payloads)], recorder)
+            i += concurrency
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return recorder, time.perf_counter() - start
+
+
+async def fixed_rate(client, path, payloads, rate, duration):
+    """Open-loop load: one request every ``1 / rate`` seconds"""
+    recorder = Recorder()
+    tasks = []
+    start = time.perf_counter()
+    for i in range(int(rate * duration)):
+        scheduled = start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        payload = payloads[i % len(payloads)]
+        tasks.append(asyncio.create_task(send(client, path, payload, recorder, scheduled)))
+    await asyncio.gather(*tasks)
+    return recorder, time.perf_counter() - start
+
+
+def summarize(recorder, elapsed, rows_per_request=1):
+    """Latency percentiles (ms), throughput and error rate of a run"""
+    latencies = np.asarray(recorder.latencies) * 1000
+    count = len(latencies)
+    summary = {
+        "requests": count,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "rows_per_second": round(count * rows_per_request / elapsed, 2)
+        if elapsed
+        else 0.0,
+        "error_rate": round(recorder.errors / count, 6) if count else 0.0,
+        "statuses": {str(k): v for k, v in sorted(recorder.statuses.items(), key=str)},
+    }
+    if count:
+        for p, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+            summary[f"p{p}_ms"] = round(float(value), 3)
+        summary["mean_ms"] = round(float(latencies.mean()), 3)
+        summary["max_ms"] = round(float(latencies.max()), 3)
+    return summary
+
+
+def compare(result, baseline, max_regression=0.1):
+    """Regressions of ``result`` against ``baseline``, as readable strings.
+
+    Latency may grow and throughput may shrink by at most ``max_regression``
+    (a fraction); the error rate may not grow by more than 0.1 points.
+    """
+    regressions = []
+    for key in ("p95_ms", "p99_ms"):
+        if key in result and key in baseline and baseline[key] > 0:
+            change = result[key] / baseline[key] - 1
+            if change > max_regression:
+                regressions.append(
+                    f"{key} {baseline[key]:.2f} -> {result[key]:.2f} (+{change:.0%})"
+                )
+    if baseline.get("throughput_rps", 0) > 0:
+        change = result["throughput_rps"] / baseline["throughput_rps"] - 1
+        if change < -max_regression:
+            regressions.append(
+                f"throughput_rps {baseline['throughput_rps']:.1f} -> "
+                f"{result['throughput_rps']:.1f} ({change:.0%})"
+            )
+    if result["error_rate"] > baseline.get("error_rate", 0) + 0.001:
+        regressions.append(
+            f"error_rate {baseline.get('error_rate', 0):.4f} -> {result['error_rate']:.4f}"
+        )
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def wait_until_ready(url, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{url}/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready in {timeout:.0f}s")
+
+
+@contextmanager
+def running_server(port=8000, in_process=False):
+    """Serve app.py locally for the duration of the block; yields its URL.
+
+    A subprocess keeps the load generator off the server's event loop and
+    GIL; ``in_process`` runs uvicorn on a thread instead, which is quicker to
+    start but measures both sides on one interpreter.
+    """
+    url = f"http://127.0.0.1:{port}"
+    if in_process:
+        import uvicorn
+
+        server = uvicorn.Server(
+            uvicorn.Config("app:app", host="127.0.0.1", port=port, log_level="warning")
+        )
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        try:
+            wait_until_ready(url)
+            yield url
+        finally:
+            server.should_exit = True
+            thread.join()
+        return
+
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ]
+    )
+    try:
+        wait_until_ready(url)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def run_load(
+    url,
+    mode="closed",
+    concurrency=16,
+    rate=200.0,
+    duration=10.0,
+    batch_size=1,
+    warmup=1.0,
+):
+    path = "/predict" if batch_size == 1 else "/predict_batch"
+    payloads = make_payloads(1000, batch_size)
+    limits = httpx.Limits(max_connections=max(concurrency, 100))
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        if warmup > 0:
+            await closed_loop(client, path, payloads, concurrency, warmup)
+        if mode == "closed":
+            recorder, elapsed = await closed_loop(
+                client, path, payloads, concurrency, duration
+            )
+        elif mode == "fixed":
+            recorder, elapsed = await fixed_rate(client, path, payloads, rate, duration)
+        else:
+            raise ValueError(f"Unknown load mode: {mode}")
+    return summarize(recorder, elapsed, batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the prediction API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--start-server", action="store_true", help="Start app.py as a subprocess"
+    )
+    parser.add_argument(
+        "--in-process", action="store_true", help="Start app.py on a thread instead"
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--mode", choices=["closed", "fixed"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=200.0, help="Requests/s (fixed)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds")
+    parser.add_argument(
+        "--batch-size", type=int, default=1, help="Rows per request (>1 uses /predict_batch)"
+    )
+    parser.add_argument("--output", default="benchmarks/load_test.json")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.1)
+    args = parser.parse_args()
+
+    config = {
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "rate": args.rate if args.mode == "fixed" else None,
+        "duration": args.duration,
+        "batch_size": args.batch_size,
+    }
+    print(f"🚀 Load test: {config}")
+
+    def load(url):
+        return asyncio.run(
+            run_load(
+                url, args.mode, args.concurrency, args.rate, args.duration,
+                args.batch_size, args.warmup,
+            )
+        )
+
+    if args.start_server or args.in_process:
+        with running_server(args.port, in_process=args.in_process) as url:
+            summary = load(url)
+    else:
+        summary = load(args.url)
+
+    result = {"commit": git_commit(), "timestamp": time.time(), "config": config, **summary}
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(
+        f"📊 {summary['requests']} requests, {summary['throughput_rps']:.1f} req/s, "
+        f"errors {summary['error_rate']:.2%}"
+    )
+    if summary["requests"]:
+        print(
+            f"   p50 {summary['p50_ms']:.2f}ms  p95 {summary['p95_ms']:.2f}ms  "
+            f"p99 {summary['p99_ms']:.2f}ms"
+        )
+    print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print(f"⚠️  Baseline was run with a different config: {baseline.get('config')}")
+        regressions = compare(result, baseline, args.max_regression)
+        if regressions:
+            print(f"❌ Regressed against {args.baseline}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print(f"✅ No regression against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Model monitoring script for served predictions.
+Tails the JSONL prediction log written by the API and compares live traffic
+against the training baseline.
+
+Each log line is one prediction:
+
+    {"ts": 1700000000.0, "features": [5.1, 3.5, 1.4, 0.2], "prediction": 0,
+     "latency_ms": 1.7, "model_version": "joblib:models/iris_model.pkl@..."}
+
+Lines are read in batches and aggregated with vectorized numpy updates into
+tumbling windows of ``--window-seconds``. At the end of each window the class
+distribution, feature statistics and latency percentiles are written to
+``<output-dir>/metrics.json`` and any alerts are appended to
+``<output-dir>/alerts.jsonl``.
+
+Usage:
+    python -m scripts.monitor_model --log logs/predictions.jsonl
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from src.drift_sketch import EPSILON, StreamingDriftDetector, load_sketch, psi
+
+
+def parse_records(lines, n_features=None):
+    """Parse log lines into column arrays, skipping malformed records"""
+    ts, features, predictions, latencies, versions = [], [], [], [], []
+    for line in lines:
+        try:
+            record = json.loads(line)
+            row = record["features"]
+            prediction = record["prediction"]
+        except (ValueError, KeyError, TypeError):
+            continue
+        if n_features is None:
+            n_features = len(row)
+        if len(row) != n_features:
+            continue
+        ts.append(record.get("ts", time.time()))
+        features.append(row)
+        predictions.append(str(prediction))
+        latencies.append(record.get("latency_ms", np.nan))
+        versions.append(record.get("model_version"))
+    return {
+        "ts": np.asarray(ts, dtype=np.float64),
+        "features": np.asarray(features, dtype=np.float64).reshape(
+            len(features), n_features or 0
+        ),
+        "predictions": np.asarray(predictions),
+        "latency_ms": np.asarray(latencies, dtype=np.float64),
+        "model_versions": versions,
+    }
+
+
+class WindowStats:
+    """Aggregates for one monitoring window, updated a batch at a time"""
+
+    def __init__(self, start, n_features):
+        self.start = start
+        self.rows = 0
+        self.classes = {}
+        self.sum = np.zeros(n_features)
+        self.sum_sq = np.zeros(n_features)
+        self.min = np.full(n_features, np.inf)
+        self.max = np.full(n_features, -np.inf)
+        self.non_finite = 0
+        self.latencies = []
+        self.model_versions = set()
+
+    def update(self, features, predictions, latencies, versions):
+        finite = np.isfinite(features).all(axis=1)
+        self.non_finite += int((~finite).sum())
+        values = features[finite]
+        if len(values):
+            self.sum += values.sum(axis=0)
+            self.sum_sq += (values**2).sum(axis=0)
+            self.min = np.minimum(self.min, values.min(axis=0))
+            self.max = np.maximum(self.max, values.max(axis=0))
+        labels, counts = np.unique(predictions, return_counts=True)
+        for label, count in zip(labels.tolist(), counts.tolist()):
+            self.classes[label] = self.classes.get(label, 0) + count
+        self.latencies.append(latencies[np.isfinite(latencies)])
+        self.model_versions.update(v for v in versions if v is not None)
+        self.rows += len(features)
+
+    def summary(self, feature_names):
+        finite_rows = self.rows - self.non_finite
+        mean = self.sum / max(finite_rows, 1)
+        std = np.sqrt(np.maximum(self.sum_sq / max(finite_rows, 1) - mean**2, 0))
+        latencies = np.concatenate(self.latencies) if self.latencies else np.empty(0)
+        if latencies.size:
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+            latency = {"p50": p50, "p95": p95, "p99": p99, "max": latencies.max()}
+        else:
+            latency = {}
+        return {
+            "rows": self.rows,
+            "non_finite_rows": self.non_finite,
+            "classes": {
+                label: count / self.rows for label, count in sorted(self.classes.items())
+            },
+            "features": {
+                name: {
+                    "mean": float(mean[i]),
+                    "std": float(std[i]),
+                    "min": float(self.min[i]),
+                    "max": float(self.max[i]),
+                }
+                for i, name in enumerate(feature_names)
+                if finite_rows
+            },
+            "latency_ms": {key: float(value) for key, value in latency.items()},
+            "model_versions": sorted(self.model_versions),
+        }
+
+
+class PredictionMonitor:
+    """Rolls prediction log records into windows and checks them against a baseline.
+
+    ``sketch`` is the reference sketch from ``src.drift_sketch``; without it
+    only the latency check runs. Feature drift uses a streaming PSI/KS
+    detector over the last ``drift_window`` rows, so it spans windows.
+    """
+
+    def __init__(
+        self,
+        sketch=None,
+        window_seconds=60,
+        drift_window=10000,
+        latency_p95_ms=100.0,
+        class_psi_threshold=0.2,
+        min_rows=50,
+    ):
+        self.sketch = sketch
+        self.window_seconds = window_seconds
+        self.latency_p95_ms = latency_p95_ms
+        self.class_psi_threshold = class_psi_threshold
+        self.min_rows = min_rows
+        self.feature_names = list(sketch["features"]) if sketch else None
+        self.drift = (
+            StreamingDriftDetector(sketch, window_size=drift_window) if sketch else None
+        )
+        self.window = None
+
+    def _window_start(self, ts):
+        return np.floor(ts / self.window_seconds) * self.window_seconds
+
+    def process(self, lines):
+        """Add a batch of log lines; return reports for windows they closed"""
+        n_features = len(self.feature_names) if self.feature_names else None
+        batch = parse_records(lines, n_features)
+        if not len(batch["ts"]):
+            return []
+        if self.feature_names is None:
+            self.feature_names = [
+                f"feature_{i}" for i in range(batch["features"].shape[1])
+            ]
+        if self.drift is not None:
+            self.drift.update(batch["features"])
+
+        reports = []
+        starts = self._window_start(batch["ts"])
+        if self.window is not None:
+            # Late records are counted in the open window
+            starts = np.maximum(starts, self.window.start)
+        for start in np.unique(starts):
+            if self.window is not None and start > self.window.start:
+                reports.append(self.close_window())
+            if self.window is None:
+                self.window = WindowStats(float(start), len(self.feature_names))
+            mask = starts == start
+            self.window.update(
+                batch["features"][mask],
+                batch["predictions"][mask],
+                batch["latency_ms"][mask],
+                [v for v, m in zip(batch["model_versions"], mask) if m],
+            )
+        return reports
+
+    def tick(self, now=None):
+        """Close the open window once its time has passed, even without traffic"""
+        now = time.time() if now is None else now
+        if self.window is not None and now >= self.window.start + self.window_seconds:
+            return [self.close_window()]
+        return []
+
+    def close_window(self):
+        window, self.window = self.window, None
+        report = {
+            "window_start": window.start,
+            "window_end": window.start + self.window_seconds,
+            **window.summary(self.feature_names),
+        }
+        report["alerts"] = self.check(report)
+        return report
+
+    def check(self, report):
+        alerts = []
+        p95 = report["latency_ms"].get("p95")
+        if p95 is not None and p95 > self.latency_p95_ms:
+            alerts.append(
+                {
+                    "type": "latency",
+                    "message": f"p95 latency {p95:.1f}ms above {self.latency_p95_ms}ms",
+                    "value": p95,
+                }
+            )
+        if report["non_finite_rows"]:
+            alerts.append(
+                {
+                    "type": "non_finite_features",
+                    "message": f"{report['non_finite_rows']} rows with NaN/inf features",
+                    "value": report["non_finite_rows"],
+                }
+            )
+        if self.sketch is None or report["rows"] < self.min_rows:
+            return alerts
+
+        reference_classes = self.sketch.get("classes")
+        if reference_classes:
+            labels = sorted(set(reference_classes) | set(report["classes"]))
+            expected = np.array([reference_classes.get(l, EPSILON) for l in labels])
+            actual = np.array([report["classes"].get(l, 0.0) for l in labels])
+            class_psi = psi(expected, actual)
+            report["class_psi"] = class_psi
+            if class_psi > self.class_psi_threshold:
+                alerts.append(
+                    {
+                        "type": "class_distribution",
+                        "message": f"prediction class PSI {class_psi:.3f} above "
+                        f"{self.class_psi_threshold}",
+                        "value": class_psi,
+                    }
+                )
+
+        drift = self.drift.statistics()
+        report["drift"] = drift
+        for feature, stats in drift["features"].items():
+            if stats["drifted"]:
+                alerts.append(
+                    {
+                        "type": "feature_drift",
+                        "feature": feature,
+                        "message": f"{feature} drifted (PSI {stats['psi']:.3f}, "
+                        f"KS {stats['ks']:.3f})",
+                        "value": stats["psi"],
+                    }
+                )
+        return alerts
+
+
+def write_report(report, output_dir):
+    """Replace metrics.json with the report and append its alerts"""
+    os.makedirs(output_dir, exist_ok=True)
+    metrics_path = os.path.join(output_dir, "metrics.json")
+    tmp_path = metrics_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, metrics_path)
+
+    if report["alerts"]:
+        with open(os.path.join(output_dir, "alerts.jsonl"), "a") as f:
+            for alert in report["alerts"]:
+                alert = {"window_start": report["window_start"], **alert}
+                f.write(json.dumps(alert) + "\n")
+        for alert in report["alerts"]:
+            print(f"🚨 {alert['message']}")
+    print(
+        f"📊 Window {report['window_start']:.0f}: {report['rows']} predictions, "
+        f"{len(report['alerts'])} alerts"
+    )
+
+
+def follow(path, from_start=False, poll_interval=1.0, batch_lines=10000, once=False):
+    """Yield batches of complete lines appended to ``path``.
+
+    Reopens the file when it is rotated (new inode) or truncated. Yields an
+    empty batch after each idle poll so callers can close windows on time.
+    With ``once`` the existing contents are read and the generator stops.
+    """
+    f, inode, partial = None, None, ""
+    while True:
+        if f is None:
+            try:
+                f = open(path, "r")
+            except FileNotFoundError:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                yield []
+                continue
+            inode = os.fstat(f.fileno()).st_ino
+            if not from_start:
+                f.seek(0, os.SEEK_END)
+            # Files opened after rotation are always new, so read them fully
+            from_start = True
+
+        lines = f.readlines(batch_lines * 64)
+        if lines:
+            lines[0] = partial + lines[0]
+            partial = "" if lines[-1].endswith("\n") else lines.pop()
+            yield lines
+            continue
+
+        if once:
+            f.close()
+            return
+        try:
+            stat = os.stat(path)
+            if stat.st_ino != inode or stat.st_size < f.tell():
+                f.close()
+                f, partial = None, ""
+                continue
+        except FileNotFoundError:
+            pass
+        time.sleep(poll_interval)
+        yield []
+
+
+def monitor(
+    log_path,
+    sketch_path="data/drift_baseline/iris_drift_sketch.json",
+    output_dir="monitoring",
+    window_seconds=60,
+    latency_p95_ms=100.0,
+    from_start=False,
+    once=False,
+    poll_interval=1.0,
+):
+    sketch = load_sketch(sketch_path) if os.path.exists(sketch_path) else None
+    if sketch is None:
+        print(f"⚠️ No baseline sketch at {sketch_path}; only checking latency")
+    prediction_monitor = PredictionMonitor(
+        sketch, window_seconds=window_seconds, latency_p95_ms=latency_p95_ms
+    )
+    print(f"👀 Monitoring {log_path}")
+    reports = []
+    for lines in follow(log_path, from_start, poll_interval, once=once):
+        if lines:
+            closed = prediction_monitor.process(lines)
+        else:
+            closed = prediction_monitor.tick()
+        for report in closed:
+            write_report(report, output_dir)
+            reports.append(report)
+    if prediction_monitor.window is not None:
+        report = prediction_monitor.close_window()
+        write_report(report, output_dir)
+        reports.append(report)
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitor the prediction log")
+    parser.add_argument("--log", default="logs/predictions.jsonl")
+    parser.add_argument(
+        "--baseline", default="data/drift_baseline/iris_drift_sketch.json"
+    )
+    parser.add_argument("--output-dir", default="monitoring")
+    parser.add_argument("--window-seconds", type=float, default=60)
+    parser.add_argument("--latency-p95-ms", type=float, default=100.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument(
+        "--from-start", action="store_true", help="Read existing log lines first"
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="Process the current log and exit"
+    )
+    args = parser.parse_args()
+
+    try:
+        monitor(
+            args.log,
+            sketch_path=args.baseline,
+            output_dir=args.output_dir,
+            window_seconds=args.window_seconds,
+            latency_p95_ms=args.latency_p95_ms,
+            from_start=args.from_start or args.once,
+            once=args.once,
+            poll_interval=args.poll_interval,
+        )
+    except KeyboardInterrupt:
+        print("Stopped monitoring")
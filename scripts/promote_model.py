@@ -2,46 +2,45 @@
 """
 Model promotion script for MLflow models.
 Promotes models from staging to production based on performance criteria.
+
+The candidate must meet the metric thresholds and must not do worse than the
+current Production version when both are scored on the same held-out split.
+By default the decision is only reported; ``--apply`` also transitions the
+approved registry version to Production.
+
+Usage:
+    python -m scripts.promote_model [--data data/processed/iris_clean.<format>] [--apply]
 """
 
+import argparse
 import os
 import json
-import mlflow
 from mlflow.tracking import MlflowClient
 
-
-def setup_mlflow_tracking():
-    """Setup MLflow tracking with proper authentication"""
-    # Check if we have authentication credentials
-    dagshub_token = os.getenv("DAGSHUB_TOKEN")
-    mlflow_username = os.getenv("MLFLOW_TRACKING_USERNAME", "yahiaehab10")
-    mlflow_password = os.getenv("MLFLOW_TRACKING_PASSWORD", dagshub_token)
-
-    if dagshub_token and mlflow_password:
-        try:
-            # Set up DagsHub MLflow with authentication
-            mlflow.set_tracking_uri(
-                "https://dagshub.com/yahiaehab10/MLFlow_demo.mlflow"
-            )
-
-            # Try to authenticate by creating a simple connection test
-            client = MlflowClient()
-            experiments = client.search_experiments(max_results=1)
-            print("✓ Successfully connected to DagsHub MLflow")
-            return True
-
-        except Exception as e:
-            print(f"❌ DagsHub authentication failed: {e}")
-            print("🔄 Falling back to local MLflow tracking")
-            mlflow.set_tracking_uri("file:./mlruns")
-            return False
-    else:
-        print("⚠️  No DagsHub credentials found, using local MLflow")
-        mlflow.set_tracking_uri("file:./mlruns")
-        return False
-
-
-def get_latest_experiment_metrics():
+from src import tracking_logger
+from src.data_io import processed_path, read_processed
+from src.promotion import (
+    MODEL_NAME,
+    check_thresholds,
+    compare_to_production,
+    evaluate_candidates,
+    latest_run_metrics,
+    registered_version,
+    version_metrics,
+)
+from src.tracking_connection import setup_mlflow_tracking
+from src.train import split_data
+
+# Define promotion thresholds
+THRESHOLDS = {"accuracy": 0.85, "precision": 0.80, "recall": 0.80}
+LOCAL_MODEL_PATH = "models/iris_model.pkl"
+# The pipeline writes the processed dataset in PROCESSED_FORMAT (see
+# src/pipeline.py), so the default held-out data follows the same setting
+PROCESSED_FORMAT = os.getenv("PROCESSED_FORMAT", "csv")
+DEFAULT_DATA_PATH = processed_path("data/processed/iris_clean.csv", PROCESSED_FORMAT)
+
+
+def get_latest_experiment_metrics(client):
     """Get metrics from the latest experiment run"""
     try:
         # Try to read metrics from local file first
@@ -53,38 +52,85 @@ def get_latest_experiment_metrics():
     except Exception as e:
         print(f"Could not read local metrics: {e}")
 
-    # Fallback to MLflow tracking
+    # Fallback to MLflow tracking: only the newest finished pipeline run
     try:
-        client = MlflowClient()
-        experiments = client.search_experiments()
-        if experiments:
-            runs = client.search_runs(experiment_ids=[experiments[0].experiment_id])
-            if runs:
-                latest_run = runs[0]
-                metrics = latest_run.data.metrics
-                print(f"✓ Found MLflow metrics: {metrics}")
-                return metrics
+        metrics = latest_run_metrics(client)
+        if metrics:
+            print(f"✓ Found MLflow metrics: {metrics}")
+        return metrics
     except Exception as e:
         print(f"Could not read MLflow metrics: {e}")
 
     return {}
 
 
-def promote_model():
-    """Main model promotion logic"""
+def held_out_scores(candidate_uri, production_uri, data_path, workers=None):
+    """Score candidate and Production on the held-out split in parallel"""
+    if candidate_uri is None or not os.path.exists(data_path):
+        return None, None
+    _, X_test, _, y_test = split_data(read_processed(data_path))
+    uris = [candidate_uri] + ([production_uri] if production_uri else [])
+    results = evaluate_candidates(uris, X_test, y_test, workers=workers)
+    for uri, scores in results.items():
+        if scores is not None:
+            print(f"🧪 Held-out {uri}: " + ", ".join(f"{k}={v:.4f}" for k, v in scores.items()))
+    return results.get(candidate_uri), results.get(production_uri)
+
+
+def log_decision(decision, reason, metrics):
+    try:
+        with tracking_logger.start_run(run_name="model_promotion"):
+            tracking_logger.log_params(
+                {"promotion_decision": decision, "promotion_reason": reason}
+            )
+            tracking_logger.log_metrics(
+                {f"final_{name}": value for name, value in metrics.items()}
+            )
+    except Exception as e:
+        print(f"Warning: Could not log to MLflow: {e}")
+
+
+def promote_model(
+    data_path=DEFAULT_DATA_PATH,
+    min_improvement=0.0,
+    workers=None,
+    apply=False,
+):
+    """Main model promotion logic; only ``apply`` writes to the registry"""
     print("🚀 Starting model promotion process...")
 
     # Setup connections
     dagshub_connected = setup_mlflow_tracking()
+    client = MlflowClient()
 
     # Get performance metrics
-    metrics = get_latest_experiment_metrics()
+    metrics = get_latest_experiment_metrics(client)
 
     if not metrics:
         print("❌ No metrics found - cannot promote model")
         return False
 
-    # Check if model meets promotion criteria
+    # Registered candidate and Production versions (registry needs DagsHub)
+    candidate, production = None, None
+    if dagshub_connected:
+        candidate = registered_version(client, ["Staging", "None"])
+        production = registered_version(client, ["Production"])
+    if candidate is not None:
+        candidate_uri = f"models:/{MODEL_NAME}/{candidate.version}"
+    else:
+        candidate_uri = LOCAL_MODEL_PATH if os.path.exists(LOCAL_MODEL_PATH) else None
+    production_uri = (
+        f"models:/{MODEL_NAME}/{production.version}" if production else None
+    )
+
+    candidate_scores, production_scores = held_out_scores(
+        candidate_uri, production_uri, data_path, workers
+    )
+    if candidate_scores is not None:
+        metrics = {name: candidate_scores[name] for name in THRESHOLDS}
+    if production is not None and production_scores is None:
+        production_scores = version_metrics(client, production)
+
     accuracy = metrics.get("accuracy", 0)
     precision = metrics.get("precision", 0)
     recall = metrics.get("recall", 0)
@@ -94,55 +140,72 @@ def promote_model():
     print(f"   Precision: {precision:.4f}")
     print(f"   Recall: {recall:.4f}")
 
-    # Define promotion thresholds
-    min_accuracy = 0.85
-    min_precision = 0.80
-    min_recall = 0.80
-
     # Check promotion criteria
-    meets_criteria = (
-        accuracy >= min_accuracy and precision >= min_precision and recall >= min_recall
+    below = check_thresholds(metrics, THRESHOLDS)
+    regressions = compare_to_production(
+        metrics, production_scores or {}, min_improvement
     )
 
-    if meets_criteria:
+    if not below and not regressions:
         print("✅ Model meets promotion criteria!")
+        if production is not None:
+            print(f"   Not worse than Production version {production.version}")
+        if candidate is not None and not apply:
+            print(
+                f"ℹ️  Report only: rerun with --apply to move version "
+                f"{candidate.version} to Production"
+            )
+        elif candidate is not None:
+            client.transition_model_version_stage(
+                name=MODEL_NAME,
+                version=candidate.version,
+                stage="Production",
+                archive_existing_versions=True,
+            )
+            print(f"🏷️  Version {candidate.version} transitioned to Production")
         print("🎯 Model is ready for production deployment")
 
         # Log promotion decision
-        try:
-            with mlflow.start_run(run_name="model_promotion"):
-                mlflow.log_param("promotion_decision", "approved")
-                mlflow.log_param("promotion_reason", "meets_all_criteria")
-                mlflow.log_metric("final_accuracy", accuracy)
-                mlflow.log_metric("final_precision", precision)
-                mlflow.log_metric("final_recall", recall)
-        except Exception as e:
-            print(f"Warning: Could not log to MLflow: {e}")
-
+        log_decision("approved", "meets_all_criteria", metrics)
         return True
     else:
         print("❌ Model does not meet promotion criteria:")
-        if accuracy < min_accuracy:
-            print(f"   Accuracy {accuracy:.4f} < {min_accuracy}")
-        if precision < min_precision:
-            print(f"   Precision {precision:.4f} < {min_precision}")
-        if recall < min_recall:
-            print(f"   Recall {recall:.4f} < {min_recall}")
+        for name in below:
+            print(f"   {name.capitalize()} {metrics.get(name, 0):.4f} < {THRESHOLDS[name]}")
+        for name in regressions:
+            print(
+                f"   {name.capitalize()} {metrics.get(name, 0):.4f} trails Production "
+                f"({production_scores[name]:.4f})"
+            )
 
         # Log rejection
-        try:
-            with mlflow.start_run(run_name="model_promotion"):
-                mlflow.log_param("promotion_decision", "rejected")
-                mlflow.log_param("promotion_reason", "below_thresholds")
-                mlflow.log_metric("final_accuracy", accuracy)
-        except Exception as e:
-            print(f"Warning: Could not log to MLflow: {e}")
-
+        reason = "below_thresholds" if below else "worse_than_production"
+        log_decision("rejected", reason, {"accuracy": accuracy})
         return False
 
 
 if __name__ == "__main__":
-    success = promote_model()
+    parser = argparse.ArgumentParser(description="Promote the latest model")
+    parser.add_argument(
+        "--data",
+        default=DEFAULT_DATA_PATH,
+        help="Processed dataset whose held-out split scores the models",
+    )
+    parser.add_argument(
+        "--min-improvement",
+        type=float,
+        default=0.0,
+        help="Accuracy margin required over the Production version",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Transition an approved registry version to Production",
+    )
+    args = parser.parse_args()
+
+    success = promote_model(args.data, args.min_improvement, args.workers, args.apply)
     if success:
         print("🎉 Model promotion completed successfully!")
     else:
@@ -11,6 +11,8 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 
+from src.forest_engine import FlatForest
+
 
 def train_and_save_model():
     # Load data
@@ -35,8 +37,16 @@ def train_and_save_model():
     os.makedirs("models", exist_ok=True)
 
     # Save model with joblib for direct loading
-    joblib.dump(model, "models/iris_model.pkl")
-    print("Model saved to models/iris_model.pkl")
+    model_path = "models/iris_model.pkl"
+    joblib.dump(model, model_path)
+    print(f"Model saved to {model_path}")
+
+    # Export the flat-array representation served with MODEL_ENGINE=flat; the
+    # source model scores the batches too large for the flat engine
+    FlatForest.from_sklearn(model).save(
+        "models/iris_model_flat", source_model=model_path
+    )
+    print("Flat forest saved to models/iris_model_flat")
 
     # Also save with MLflow
     with mlflow.start_run():
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.model_loader import load_model_from_source
+
+# Model held by each scoring process, loaded once by the initializer
+_worker_model = None
+
+
+def infer_model_kind(model_uri):
+    if model_uri.startswith("models:/") or "://" in model_uri:
+        return "mlflow"
+    if os.path.isdir(model_uri):
+        if os.path.exists(os.path.join(model_uri, "meta.json")):
+            return "flat"
+        return "mlflow"
+    return "joblib"
+
+
+def iter_chunks(input_path, chunk_size):
+    """Yield chunks of the input without ever holding the whole file.
+
+    CSV chunks are parsed into float arrays (dropping a ``target`` column if
+    present); JSONL chunks are yielded as raw lines so that parsing happens in
+    the scoring workers.
+    """
+    if input_path.endswith((".jsonl", ".ndjson")):
+        with open(input_path, "r") as f:
+            lines = []
+            for line in f:
+                if line.strip():
+                    lines.append(line)
+                if len(lines) == chunk_size:
+                    yield lines
+                    lines = []
+            if lines:
+                yield lines
+    else:
+        import pandas as pd
+
+        for df in pd.read_csv(input_path, chunksize=chunk_size):
+            yield df.drop(columns=["target"], errors="ignore").to_numpy(np.float64)
+
+
+def parse_jsonl_chunk(lines):
+    return np.array([json.loads(line)["features"] for line in lines], dtype=np.float64)
+
+
+def score_chunk(model, chunk):
+    features = parse_jsonl_chunk(chunk) if isinstance(chunk, list) else chunk
+    return np.asarray(model.predict(features))
+
+
+def _init_worker(kind, uri):
+    global _worker_model
+    _worker_model = load_model_from_source(kind, uri, mmap_mode="r")
+
+
+def _score_in_worker(chunk):
+    return score_chunk(_worker_model, chunk)
+
+
+class PredictionWriter:
+    """Append predictions to a CSV (``prediction`` column) or JSONL file"""
+
+    def __init__(self, output_path):
+        self.jsonl = output_path.endswith((".jsonl", ".ndjson"))
+        self._file = open(output_path, "w")
+        if not self.jsonl:
+            self._file.write("prediction\n")
+
+    def write(self, predictions):
+        values = predictions.tolist()
+        if self.jsonl:
+            lines = [json.dumps({"prediction": value}) for value in values]
+        else:
+            lines = [str(value) for value in values]
+        self._file.write("\n".join(lines) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def score_file(
+    input_path,
+    output_path,
+    model_uri="models/iris_model.pkl",
+    model_kind=None,
+    chunk_size=100_000,
+    workers=1,
+):
+    """Stream ``input_path`` through the model, writing predictions in order.
+
+    Each chunk is scored with one vectorized ``predict`` call. With
+    ``workers > 1`` chunks are scored by a process pool whose workers each load
+    the model once; at most ``2 * workers`` chunks are in flight, so memory
+    stays bounded by the chunk size regardless of file size.
+    """
+    kind = model_kind or infer_model_kind(model_uri)
+    writer = PredictionWriter(output_path)
+    rows = 0
+    start = time.perf_counter()
+    try:
+        if workers <= 1:
+            model = load_model_from_source(kind, model_uri, mmap_mode="r")
+            for chunk in iter_chunks(input_path, chunk_size):
+                predictions = score_chunk(model, chunk)
+                writer.write(predictions)
+                rows += len(predictions)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(kind, model_uri),
+            ) as pool:
+                pending = deque()
+                for chunk in iter_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(_score_in_worker, chunk))
+                    if len(pending) >= 2 * workers:
+                        predictions = pending.popleft().result()
+                        writer.write(predictions)
+                        rows += len(predictions)
+                while pending:
+                    predictions = pending.popleft().result()
+                    writer.write(predictions)
+                    rows += len(predictions)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Scored {rows} rows in {elapsed:.1f}s "
+        f"({rows / elapsed if elapsed else 0:.0f} rows/s) -> {output_path}"
+    )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Score a CSV or JSONL file in streaming chunks"
+    )
+    parser.add_argument("input", help="CSV of feature columns or JSONL of {features}")
+    parser.add_argument("output", help="Output .csv or .jsonl of predictions")
+    parser.add_argument("--model", default="models/iris_model.pkl")
+    parser.add_argument("--model-kind", choices=["joblib", "flat", "mlflow"])
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    score_file(
+        args.input,
+        args.output,
+        model_uri=args.model,
+        model_kind=args.model_kind,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+    )
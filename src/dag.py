@@ -0,0 +1,119 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import mlflow
+
+
+class Step:
+    """A pipeline step: ``fn(**inputs)`` returns a dict holding its ``outputs``"""
+
+    def __init__(self, name, fn, inputs=(), outputs=()):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+
+def in_active_run(fn, run_id):
+    """Wrap ``fn`` so MLflow logging inside it goes to run ``run_id``.
+
+    The fluent API's active run may be thread-local, so a step running on a
+    worker thread would otherwise start a fresh run. The run is re-attached
+    and detached again with its status left as RUNNING, so only the thread
+    that started it finishes it.
+    """
+
+    def wrapper(**kwargs):
+        if run_id is None or mlflow.active_run() is not None:
+            return fn(**kwargs)
+        mlflow.start_run(run_id=run_id)
+        try:
+            return fn(**kwargs)
+        finally:
+            mlflow.end_run(status="RUNNING")
+
+    return wrapper
+
+
+class DagExecutor:
+    """Run steps as soon as the values they consume have been produced.
+
+    Dependencies come from matching step ``inputs`` to other steps'
+    ``outputs`` (or to the initial ``values``), so independent steps run
+    concurrently on a thread pool and hand each other in-memory objects such
+    as DataFrames. Wall time per step is recorded in ``timings``.
+    """
+
+    def __init__(self, steps, max_workers=4):
+        self.steps = list(steps)
+        self.max_workers = max_workers
+        self.timings = {}
+        producers = {}
+        for step in self.steps:
+            for output in step.outputs:
+                if output in producers:
+                    raise ValueError(
+                        f"{output!r} is produced by both {producers[output]} and {step.name}"
+                    )
+                producers[output] = step.name
+        self.producers = producers
+
+    def dependencies(self, step):
+        return {self.producers[i] for i in step.inputs if i in self.producers}
+
+    def _check(self, values):
+        available = set(values) | set(self.producers)
+        for step in self.steps:
+            missing = [i for i in step.inputs if i not in available]
+            if missing:
+                raise ValueError(f"Step {step.name} needs unknown inputs {missing}")
+        done, remaining = set(), {step.name: step for step in self.steps}
+        while remaining:
+            ready = [n for n, s in remaining.items() if self.dependencies(s) <= done]
+            if not ready:
+                raise ValueError(f"Steps {sorted(remaining)} form a cycle")
+            for name in ready:
+                done.add(name)
+                del remaining[name]
+
+    def run(self, values=None):
+        """Execute every step; returns all produced values"""
+        values = dict(values or {})
+        self._check(values)
+        active = mlflow.active_run()
+        run_id = active.info.run_id if active is not None else None
+
+        pending = {step.name: step for step in self.steps}
+        finished = set()
+        running = {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, step in list(pending.items()):
+                    if self.dependencies(step) <= finished:
+                        del pending[name]
+                        kwargs = {i: values[i] for i in step.inputs}
+                        future = pool.submit(self._timed, step, run_id, kwargs)
+                        running[future] = step
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    outputs = future.result()
+                    missing = set(step.outputs) - set(outputs or {})
+                    if missing:
+                        raise ValueError(f"Step {step.name} did not return {missing}")
+                    values.update(outputs)
+                    finished.add(step.name)
+        self.timings["total"] = time.perf_counter() - start
+        return values
+
+    def _timed(self, step, run_id, kwargs):
+        start = time.perf_counter()
+        try:
+            return in_active_run(step.fn, run_id)(**kwargs)
+        finally:
+            self.timings[step.name] = time.perf_counter() - start
+
+    def report(self):
+        lines = [f"  {name:<16} {seconds:8.2f}s" for name, seconds in self.timings.items()]
+        return "⏱️  Step timings:\n" + "\n".join(lines)
@@ -0,0 +1,114 @@
+import hashlib
+import os
+
+import pandas as pd
+
+# Processed-data formats, chosen by file extension. Arrow IPC files are written
+# uncompressed so they can be memory-mapped and read without copying.
+PARQUET_EXTENSIONS = (".parquet",)
+ARROW_EXTENSIONS = (".arrow", ".feather")
+
+
+def processed_path(base_path, data_format="csv"):
+    """Return ``base_path`` with the extension for ``data_format``"""
+    return f"{os.path.splitext(base_path)[0]}.{data_format}"
+
+
+def file_fingerprint(path):
+    """SHA-256 of a file (or of every file in a directory)"""
+    digest = hashlib.sha256()
+    paths = [path]
+    if os.path.isdir(path):
+        paths = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(path)
+            for name in names
+        )
+    for file_path in paths:
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def to_columnar_dtypes(df, target="target"):
+    """Cast feature columns to float32, keeping the target column as is"""
+    features = [column for column in df.columns if column != target]
+    return df.astype({column: "float32" for column in features})
+
+
+def write_processed(df, path):
+    if path.endswith(PARQUET_EXTENSIONS):
+        to_columnar_dtypes(df).to_parquet(path, index=False)
+    elif path.endswith(ARROW_EXTENSIONS):
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        table = pa.Table.from_pandas(to_columnar_dtypes(df), preserve_index=False)
+        feather.write_feather(table, path, compression="uncompressed")
+    else:
+        df.to_csv(path, index=False)
+
+
+class ProcessedWriter:
+    """Append DataFrame chunks to a processed dataset in any supported format.
+
+    The dtypes of the first chunk fix the schema, so later chunks are cast to
+    match (e.g. an integer column that held NaN before cleaning).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.columnar = path.endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS)
+        self.dtypes = None
+        self._writer = None
+        self._sink = None
+
+    def write(self, df):
+        if self.columnar:
+            df = to_columnar_dtypes(df)
+        first = self.dtypes is None
+        if first:
+            self.dtypes = df.dtypes.to_dict()
+        else:
+            df = df.astype(self.dtypes)
+
+        if not self.columnar:
+            df.to_csv(self.path, index=False, mode="w" if first else "a", header=first)
+            return
+
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if first:
+            if self.path.endswith(PARQUET_EXTENSIONS):
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                self._sink = pa.OSFile(self.path, "wb")
+                self._writer = pa.ipc.new_file(self._sink, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+
+def read_processed(path, columns=None):
+    """Read a processed dataset, memory-mapping columnar formats"""
+    if path.endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    if path.endswith(ARROW_EXTENSIONS):
+        import pyarrow as pa
+
+        # Table buffers reference the mapping directly, so leave it open
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+    return pd.read_csv(path, usecols=columns)
@@ -1,12 +1,85 @@
+import json
+
+import numpy as np
 import pandas as pd
 
+from src.data_io import ProcessedWriter, write_processed
+
+
+class CleaningStats:
+    """Row counts and per-column min/max/mean accumulated chunk by chunk"""
+
+    def __init__(self):
+        self.rows_in = 0
+        self.rows_out = 0
+        self.columns = {}
+
+    def update(self, raw_rows, df):
+        self.rows_in += raw_rows
+        self.rows_out += len(df)
+        for column in df.select_dtypes(include="number").columns:
+            values = df[column].to_numpy(dtype=np.float64)
+            if values.size == 0:
+                continue
+            stats = self.columns.setdefault(
+                column, {"min": np.inf, "max": -np.inf, "sum": 0.0, "count": 0}
+            )
+            stats["min"] = min(stats["min"], float(values.min()))
+            stats["max"] = max(stats["max"], float(values.max()))
+            stats["sum"] += float(values.sum())
+            stats["count"] += int(values.size)
+
+    def to_dict(self):
+        return {
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rows_dropped": self.rows_in - self.rows_out,
+            "columns": {
+                column: {
+                    "min": stats["min"],
+                    "max": stats["max"],
+                    "mean": stats["sum"] / stats["count"],
+                }
+                for column, stats in self.columns.items()
+            },
+        }
 
-def clean_data(input_path, output_path):
-    df = pd.read_csv(input_path)
+
+def clean_rows(df):
     # Example cleaning: drop NA, reset index
-    df = df.dropna().reset_index(drop=True)
-    df.to_csv(output_path, index=False)
-    return df
+    return df.dropna().reset_index(drop=True)
+
+
+def clean_data(input_path, output_path, chunksize=None, stats_path=None):
+    """Clean the raw CSV into ``output_path`` (CSV, Parquet or Arrow).
+
+    By default the whole file is cleaned in memory and the cleaned DataFrame is
+    returned. With ``chunksize`` the raw file is streamed in chunks of that many
+    rows and appended to the output, so peak memory is bounded by the chunk
+    size; the summary statistics are returned instead. Either way the
+    statistics are written to ``stats_path`` as JSON when given.
+    """
+    stats = CleaningStats()
+    if chunksize:
+        writer = ProcessedWriter(output_path)
+        try:
+            for chunk in pd.read_csv(input_path, chunksize=chunksize):
+                cleaned = clean_rows(chunk)
+                writer.write(cleaned)
+                stats.update(len(chunk), cleaned)
+        finally:
+            writer.close()
+        result = stats.to_dict()
+    else:
+        df = pd.read_csv(input_path)
+        result = clean_rows(df)
+        write_processed(result, output_path)
+        stats.update(len(df), result)
+
+    if stats_path:
+        with open(stats_path, "w") as f:
+            json.dump(stats.to_dict(), f, indent=2)
+    return result
 
 
 if __name__ == "__main__":
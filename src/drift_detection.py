@@ -1,10 +1,12 @@
-import pandas as pd
-from evidently.report import Report
-from evidently.metric_preset import DataDriftPreset
+from src.data_io import read_processed
 
 
 def generate_drift_baseline(processed_path, baseline_path):
-    df = pd.read_csv(processed_path)
+    # Evidently is heavy to import, so only load it when a report is requested
+    from evidently.report import Report
+    from evidently.metric_preset import DataDriftPreset
+
+    df = read_processed(processed_path)
     report = Report(metrics=[DataDriftPreset()])
     report.run(reference_data=df, current_data=df)
     report.save_html(baseline_path)
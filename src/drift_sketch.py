@@ -0,0 +1,168 @@
+import json
+
+import numpy as np
+
+# Floor for empty bins so PSI stays finite
+EPSILON = 1e-4
+
+
+def build_reference_sketch(df, bins=20, target="target"):
+    """Summarize each feature of ``df`` as a quantile-binned histogram.
+
+    The sketch holds the bin edges and reference bin proportions per feature
+    (plus min/max/mean/std), which is all the streaming detector needs, and
+    the class proportions of ``target`` when present.
+    """
+    features = [column for column in df.columns if column != target]
+    sketch = {"n": int(len(df)), "bins": bins, "features": {}}
+    if target in df.columns:
+        classes = df[target].value_counts(normalize=True).sort_index()
+        sketch["classes"] = {str(label): float(p) for label, p in classes.items()}
+    for feature in features:
+        values = df[feature].to_numpy(dtype=np.float64)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)))
+        counts = np.bincount(
+            np.searchsorted(edges[1:-1], values, side="right"),
+            minlength=len(edges) - 1,
+        )
+        sketch["features"][feature] = {
+            "edges": edges.tolist(),
+            "proportions": (counts / counts.sum()).tolist(),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+        }
+    return sketch
+
+
+def save_sketch(sketch, path):
+    with open(path, "w") as f:
+        json.dump(sketch, f, indent=2)
+
+
+def load_sketch(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def build_drift_sketch(processed_path, sketch_path, bins=20, df=None):
+    """Write the reference sketch for a processed dataset (or its loaded ``df``)"""
+    if df is None:
+        from src.data_io import read_processed
+
+        df = read_processed(processed_path)
+    save_sketch(build_reference_sketch(df, bins), sketch_path)
+    print(f"Drift reference sketch saved to {sketch_path}")
+
+
+def psi(expected, actual):
+    """Population stability index between two bin-proportion arrays"""
+    expected = np.maximum(expected, EPSILON)
+    actual = np.maximum(actual, EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(expected, actual):
+    """Kolmogorov-Smirnov distance between two binned distributions"""
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+class StreamingDriftDetector:
+    """Sliding-window PSI/KS drift statistics for served feature vectors.
+
+    The window of the last ``window_size`` rows is kept as ``n_buckets`` ring
+    buckets of per-bin counts, so memory per feature is fixed at
+    ``n_buckets * bins`` integers regardless of traffic. Rows added one at a
+    time are buffered and binned in vectorized batches of ``flush_rows``.
+    """
+
+    def __init__(
+        self,
+        sketch,
+        window_size=10000,
+        n_buckets=10,
+        flush_rows=256,
+        psi_threshold=0.2,
+        ks_threshold=0.1,
+    ):
+        self.features = list(sketch["features"])
+        self.interior_edges = [
+            np.asarray(sketch["features"][f]["edges"][1:-1]) for f in self.features
+        ]
+        self.reference = [
+            np.asarray(sketch["features"][f]["proportions"]) for f in self.features
+        ]
+        self.bucket_rows = max(1, window_size // n_buckets)
+        self.flush_rows = flush_rows
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self._counts = [
+            np.zeros((n_buckets, len(reference)), dtype=np.int64)
+            for reference in self.reference
+        ]
+        self._bucket_sizes = np.zeros(n_buckets, dtype=np.int64)
+        self._current = 0
+        self._pending = []
+        self.rows_seen = 0
+
+    def add(self, row):
+        """Buffer a single feature vector"""
+        if len(row) != len(self.features):
+            return
+        self._pending.append(row)
+        if len(self._pending) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            rows, self._pending = self._pending, []
+            self.update(np.asarray(rows, dtype=np.float64))
+
+    def update(self, X):
+        """Add a 2D batch of feature vectors to the window"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.features):
+            return
+        start = 0
+        while start < len(X):
+            room = self.bucket_rows - self._bucket_sizes[self._current]
+            if room == 0:
+                self._advance()
+                continue
+            part = X[start : start + room]
+            for i, edges in enumerate(self.interior_edges):
+                bins = np.searchsorted(edges, part[:, i], side="right")
+                self._counts[i][self._current] += np.bincount(
+                    bins, minlength=len(edges) + 1
+                )
+            self._bucket_sizes[self._current] += len(part)
+            self.rows_seen += len(part)
+            start += len(part)
+
+    def _advance(self):
+        self._current = (self._current + 1) % len(self._bucket_sizes)
+        self._bucket_sizes[self._current] = 0
+        for counts in self._counts:
+            counts[self._current] = 0
+
+    def statistics(self):
+        """PSI and KS per feature over the current window"""
+        self.flush()
+        window_rows = int(self._bucket_sizes.sum())
+        result = {"window_rows": window_rows, "features": {}}
+        if window_rows == 0:
+            return result
+        for feature, reference, counts in zip(
+            self.features, self.reference, self._counts
+        ):
+            actual = counts.sum(axis=0) / window_rows
+            feature_psi = psi(reference, actual)
+            feature_ks = binned_ks(reference, actual)
+            result["features"][feature] = {
+                "psi": feature_psi,
+                "ks": feature_ks,
+                "drifted": feature_psi > self.psi_threshold
+                or feature_ks > self.ks_threshold,
+            }
+        return result
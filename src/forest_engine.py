@@ -0,0 +1,266 @@
+import functools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+# Rows evaluated per lockstep pass in predict_proba
+CHUNK_ROWS = 256
+# Largest batch scored by the flat engine when the sklearn forest is at hand.
+# The lockstep walk wins for single rows and small batches, but from ~300 rows
+# on sklearn's compiled traversal is faster (about 3x at a few thousand rows).
+FLAT_MAX_ROWS = 256
+
+
+class FlatForest:
+    """A random forest flattened into contiguous NumPy arrays.
+
+    All trees share one node table. Node ``i`` splits on ``feature[i]`` at
+    ``threshold[i]`` and continues to ``left[i]`` or ``right[i]``; leaves point
+    back at themselves so every tree can be walked in lockstep for a fixed
+    ``max_depth`` steps. ``value[i]`` holds the normalized class probabilities
+    of node ``i`` and ``roots`` the index of each tree's root node.
+    """
+
+    def __init__(
+        self,
+        feature,
+        threshold,
+        left,
+        right,
+        value,
+        roots,
+        classes,
+        max_depth,
+        n_features_in,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features_in)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Flatten a fitted sklearn ``RandomForestClassifier``"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+            # Leaves loop back to themselves and compare against +inf
+            left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int32)
+            right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int32)
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(left + offset)
+            rights.append(right + offset)
+            values.append(value / normalizer)
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=forest.classes_,
+            max_depth=max_depth,
+            n_features_in=forest.n_features_in_,
+        )
+
+    def apply(self, X):
+        """Return the leaf index reached in every tree, shape (n_samples, n_trees)"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[-1] if X.ndim else 0} features, but FlatForest is "
+                f"expecting {self.n_features_in_} features as input."
+            )
+        # Index X as a flat buffer: row offset + split feature of the current node
+        X_flat = X.ravel()
+        row_offsets = (np.arange(X.shape[0], dtype=np.intp) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(
+            self.roots.astype(np.intp), (X.shape[0], self.roots.shape[0])
+        )
+        for _ in range(self.max_depth):
+            values = X_flat.take(row_offsets + self.feature.take(nodes))
+            go_left = values <= self.threshold.take(nodes)
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+        return nodes
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 2 and X.shape[0] > CHUNK_ROWS:
+            # Bound the (rows, trees) temporaries and keep them cache-sized
+            return np.concatenate(
+                [
+                    self.predict_proba(X[start : start + CHUNK_ROWS])
+                    for start in range(0, X.shape[0], CHUNK_ROWS)
+                ]
+            )
+        leaves = self.apply(X)
+        return self.value.take(leaves, axis=0).sum(axis=1) / self.roots.shape[0]
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def save(self, path, source_model=None):
+        """Write the forest as a directory of ``.npy`` files plus metadata.
+
+        ``source_model`` records the sklearn artifact the forest was compiled
+        from, so loaders can hand large batches back to it.
+
+        The files are written to a sibling temporary directory that then
+        replaces ``path``, so a server memory-mapping the previous forest
+        keeps reading intact files and never sees a half-written one.
+        """
+        path = os.path.abspath(path)
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}.", dir=parent)
+        try:
+            for name in ARRAYS:
+                np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+            meta = {
+                "classes": self.classes_.tolist(),
+                "max_depth": self.max_depth,
+                "n_features_in": self.n_features_in_,
+                "source_model": source_model,
+            }
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            if os.path.isdir(path):
+                # Directories cannot be replaced while non-empty: move the old
+                # one aside first. Open memory maps keep their unlinked files.
+                previous = f"{staging}.old"
+                os.replace(path, previous)
+                os.replace(staging, path)
+                shutil.rmtree(previous, ignore_errors=True)
+            else:
+                os.replace(staging, path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """Load a saved forest; with ``mmap_mode`` the node arrays are memory-mapped"""
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAYS
+        }
+        return cls(
+            classes=meta["classes"],
+            max_depth=meta["max_depth"],
+            n_features_in=meta["n_features_in"],
+            **arrays,
+        )
+
+
+class HybridForest:
+    """Score small batches on the flat engine and larger ones with sklearn.
+
+    Batches of up to ``max_rows`` rows go to ``flat``; anything bigger goes to
+    ``forest``, the sklearn estimator ``flat`` was compiled from. Pass
+    ``load_forest`` instead of ``forest`` to defer loading the estimator (and
+    importing sklearn) until the first batch that needs it.
+    """
+
+    def __init__(self, flat, forest=None, max_rows=FLAT_MAX_ROWS, load_forest=None):
+        if forest is None and load_forest is None:
+            raise ValueError("HybridForest needs a forest or a load_forest callable")
+        self.flat = flat
+        self.max_rows = max_rows
+        self.classes_ = flat.classes_
+        self.n_features_in_ = flat.n_features_in_
+        self._forest = forest
+        self._load_forest = load_forest
+        self._lock = threading.Lock()
+
+    @property
+    def forest(self):
+        if self._forest is None:
+            with self._lock:
+                if self._forest is None:
+                    self._forest = self._load_forest()
+        return self._forest
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _engine(self, X):
+        return self.flat if len(X) <= self.max_rows else self.forest
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        return self._engine(X).predict_proba(X)
+
+    def predict(self, X):
+        X = np.asarray(X)
+        return self._engine(X).predict(X)
+
+
+def load_flat_engine(path, mmap_mode=None, max_rows=FLAT_MAX_ROWS):
+    """Load a flat forest, paired with its sklearn source when that still exists.
+
+    The source is only loaded once a batch above ``max_rows`` arrives, so
+    serving small batches never imports sklearn. Without the source artifact
+    the flat engine scores every batch size.
+    """
+    flat = FlatForest.load(path, mmap_mode=mmap_mode)
+    with open(os.path.join(path, "meta.json"), "r") as f:
+        source_model = json.load(f).get("source_model")
+    if not source_model or not os.path.exists(source_model):
+        return flat
+    import joblib
+
+    return HybridForest(
+        flat,
+        max_rows=max_rows,
+        load_forest=functools.partial(joblib.load, source_model, mmap_mode=mmap_mode),
+    )
+
+
+def export_flat_forest(model_path, output_path):
+    """Flatten a joblib/pickle forest artifact into a FlatForest directory"""
+    import joblib
+
+    FlatForest.from_sklearn(joblib.load(model_path)).save(
+        output_path, source_model=model_path
+    )
+    print(f"Flat forest saved to {output_path}")
+
+
+if __name__ == "__main__":
+    export_flat_forest(
+        sys.argv[1] if len(sys.argv) > 1 else "models/iris_model.pkl",
+        sys.argv[2] if len(sys.argv) > 2 else "models/iris_model_flat",
+    )
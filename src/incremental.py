@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from src.data_io import file_fingerprint, read_processed
+from src.drift_sketch import load_sketch, psi
+from src.forest_engine import FlatForest
+
+MODEL_PATH = "models/iris_model.pkl"
+FLAT_MODEL_PATH = "models/iris_model_flat"
+# Which data slices each model version has been trained on
+SLICE_MANIFEST_PATH = "models/training_slices.json"
+# PSI over a handful of rows mostly measures sample size: slices smaller than
+# MIN_DRIFT_ROWS skip the drift check, and the sketch's bins are merged so that
+# each holds about ROWS_PER_DRIFT_BIN of the slice's rows.
+MIN_DRIFT_ROWS = 50
+ROWS_PER_DRIFT_BIN = 25
+
+
+def load_manifest(path=SLICE_MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {"version": 0, "base_params": None, "slices": []}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=SLICE_MANIFEST_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def record_slice(manifest, data_path, rows, mode, **details):
+    """Append a slice entry and bump the model version"""
+    manifest["version"] += 1
+    manifest["slices"].append(
+        {
+            "path": data_path,
+            "sha256": file_fingerprint(data_path),
+            "rows": int(rows),
+            "mode": mode,
+            "model_version": manifest["version"],
+            "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **details,
+        }
+    )
+    return manifest
+
+
+def start_manifest(model, data_path, rows, path=SLICE_MANIFEST_PATH):
+    """Begin a new manifest after a full training run on ``data_path``"""
+    params = model.get_params()
+    params["warm_start"] = False
+    manifest = {"version": 0, "base_params": params, "slices": []}
+    record_slice(manifest, data_path, rows, "full", trees=len(model.estimators_))
+    save_manifest(manifest, path)
+    return manifest
+
+
+def seen_slice(manifest, fingerprint):
+    return any(entry["sha256"] == fingerprint for entry in manifest["slices"])
+
+
+def slice_drift(sketch, X):
+    """Largest per-feature PSI of ``X`` against the reference sketch.
+
+    Adjacent (quantile) bins of the sketch are merged down to one bin per
+    ``ROWS_PER_DRIFT_BIN`` slice rows. Returns None for slices smaller than
+    ``MIN_DRIFT_ROWS``.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if len(X) < MIN_DRIFT_ROWS:
+        return None
+    worst = 0.0
+    for i, feature in enumerate(sketch["features"].values()):
+        edges = np.asarray(feature["edges"])
+        expected = np.asarray(feature["proportions"])
+        counts = np.bincount(
+            np.searchsorted(edges[1:-1], X[:, i], side="right"),
+            minlength=len(expected),
+        )
+        n_bins = min(len(expected), max(2, len(X) // ROWS_PER_DRIFT_BIN))
+        groups = np.array_split(np.arange(len(expected)), n_bins)
+        merged_expected = np.array([expected[group].sum() for group in groups])
+        merged_actual = np.array([counts[group].sum() for group in groups]) / len(X)
+        worst = max(worst, psi(merged_expected, merged_actual))
+    return worst
+
+
+def decide_update(
+    model,
+    X,
+    y,
+    sketch=None,
+    accuracy_threshold=0.9,
+    psi_threshold=0.2,
+    max_trees=1000,
+    n_new_trees=20,
+):
+    """Choose how to absorb a new slice: ``"grow"`` or ``"retrain"``.
+
+    The current model is scored on the slice before seeing it. Growing is
+    only possible when the slice has exactly the classes the forest was fit
+    on, since a warm-started fit recomputes ``classes_`` from the new labels.
+    """
+    accuracy = float(model.score(X, y))
+    drift_psi = slice_drift(sketch, X) if sketch is not None else None
+    if sketch is not None and drift_psi is None:
+        print(f"⚠️  Slice of {len(X)} rows is too small for a drift check")
+    checks = {"slice_accuracy": accuracy, "slice_psi": drift_psi}
+
+    reason = None
+    if accuracy < accuracy_threshold:
+        reason = f"accuracy {accuracy:.3f} below {accuracy_threshold}"
+    elif drift_psi is not None and drift_psi > psi_threshold:
+        reason = f"drift PSI {drift_psi:.3f} above {psi_threshold}"
+    elif set(np.unique(y).tolist()) != set(model.classes_.tolist()):
+        reason = "slice classes differ from the model's classes"
+    elif len(model.estimators_) + n_new_trees > max_trees:
+        reason = f"forest would exceed {max_trees} trees"
+    return ("retrain" if reason else "grow"), reason, checks
+
+
+def grow_forest(model, X, y, n_new_trees=20):
+    """Add ``n_new_trees`` trees fit on ``X``/``y`` to a fitted forest"""
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_trees)
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    return model
+
+
+def training_data(manifest, new_df):
+    """Every slice the manifest has seen, plus the new one, as one DataFrame"""
+    frames = []
+    for entry in manifest["slices"]:
+        if os.path.exists(entry["path"]):
+            frames.append(read_processed(entry["path"]))
+        else:
+            print(f"⚠️  Slice {entry['path']} is gone, retraining without it")
+    frames.append(new_df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def incremental_update(
+    slice_path,
+    model_path=MODEL_PATH,
+    manifest_path=SLICE_MANIFEST_PATH,
+    sketch_path=None,
+    n_new_trees=20,
+    accuracy_threshold=0.9,
+    psi_threshold=0.2,
+    max_trees=1000,
+    flat_model_path=FLAT_MODEL_PATH,
+):
+    """Update the saved model with one new processed data slice.
+
+    The forest is grown with ``n_new_trees`` trees fit on the slice alone,
+    unless the slice fails the accuracy/drift thresholds (or cannot be grown
+    into the forest), in which case the model is retrained from scratch on
+    every slice recorded in the manifest plus the new one. Slices already in
+    the manifest are skipped. Returns ``(model, summary)``.
+    """
+    manifest = load_manifest(manifest_path)
+    model = joblib.load(model_path)
+    fingerprint = file_fingerprint(slice_path)
+    if seen_slice(manifest, fingerprint):
+        print(f"⏭️  {slice_path} was already trained on, skipping")
+        return model, {"mode": "skip", "model_version": manifest["version"]}
+
+    df = read_processed(slice_path)
+    X = df.drop("target", axis=1)
+    y = df["target"]
+    sketch = load_sketch(sketch_path) if sketch_path and os.path.exists(sketch_path) else None
+    mode, reason, checks = decide_update(
+        model,
+        X,
+        y,
+        sketch,
+        accuracy_threshold=accuracy_threshold,
+        psi_threshold=psi_threshold,
+        max_trees=max_trees,
+        n_new_trees=n_new_trees,
+    )
+
+    start = time.perf_counter()
+    if mode == "grow":
+        model = grow_forest(model, X, y, n_new_trees)
+        details = {"trees_added": n_new_trees}
+        print(f"🌱 Grew forest to {len(model.estimators_)} trees on {slice_path}")
+    else:
+        full = training_data(manifest, df)
+        params = manifest.get("base_params") or model.get_params()
+        model = RandomForestClassifier(**{**params, "warm_start": False})
+        model.fit(full.drop("target", axis=1), full["target"])
+        details = {"retrain_reason": reason, "retrain_rows": len(full)}
+        print(f"🔁 Retrained on {len(full)} rows: {reason}")
+
+    record_slice(
+        manifest,
+        slice_path,
+        len(df),
+        mode,
+        trees=len(model.estimators_),
+        **checks,
+        **details,
+    )
+    save_manifest(manifest, manifest_path)
+    joblib.dump(model, model_path)
+    if flat_model_path:
+        FlatForest.from_sklearn(model).save(flat_model_path, source_model=model_path)
+
+    summary = {
+        "mode": mode,
+        "model_version": manifest["version"],
+        "trees": len(model.estimators_),
+        "update_seconds": time.perf_counter() - start,
+        **checks,
+    }
+    return model, summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Grow or retrain the saved forest with a new processed data slice"
+    )
+    parser.add_argument("slice", help="Processed CSV/Parquet/Arrow slice with a target column")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--manifest", default=SLICE_MANIFEST_PATH)
+    parser.add_argument(
+        "--baseline", default="data/drift_baseline/iris_drift_sketch.json"
+    )
+    parser.add_argument("--new-trees", type=int, default=20)
+    parser.add_argument("--accuracy-threshold", type=float, default=0.9)
+    parser.add_argument("--psi-threshold", type=float, default=0.2)
+    parser.add_argument("--max-trees", type=int, default=1000)
+    args = parser.parse_args()
+
+    _, summary = incremental_update(
+        args.slice,
+        model_path=args.model,
+        manifest_path=args.manifest,
+        sketch_path=args.baseline,
+        n_new_trees=args.new_trees,
+        accuracy_threshold=args.accuracy_threshold,
+        psi_threshold=args.psi_threshold,
+        max_trees=args.max_trees,
+    )
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,98 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from src.forest_engine import HybridForest
+from src.model_loader import load_model_from_source
+
+BACKENDS = ("inline", "thread", "process")
+
+# Model held by each process-pool worker, loaded once by the initializer
+_worker_model = None
+
+
+class Overloaded(Exception):
+    """Raised when the inference backlog is over its limit and work is shed"""
+
+
+def _init_process_worker(kind, uri, mmap_mode=None, flat_max_rows=None):
+    global _worker_model
+    _worker_model = load_model_from_source(kind, uri, mmap_mode=mmap_mode)
+    if flat_max_rows is not None and isinstance(_worker_model, HybridForest):
+        _worker_model.max_rows = flat_max_rows
+
+
+def _predict_in_worker(features):
+    return np.asarray(_worker_model.predict(features)).tolist()
+
+
+class InferenceExecutor:
+    """Run model inference off the event loop with a bounded backlog.
+
+    ``backend`` selects where predictions run: ``"thread"`` uses a thread pool
+    (sklearn releases the GIL while walking trees), ``"process"`` uses a process
+    pool whose workers each preload the model from ``model_source``, and
+    ``"inline"`` runs on the event loop as before. Once ``max_pending`` calls are
+    queued or running, or after :meth:`shutdown`, further calls raise
+    :class:`Overloaded`.
+    """
+
+    def __init__(self, backend="thread", max_workers=None, max_pending=256):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}")
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.pending = 0
+        self.closed = False
+        self._pool = None
+        self._predict_fn = None
+
+    def start(self, predict_fn, model_source=None, mmap_mode=None, flat_max_rows=None):
+        """Start the pool; process workers load ``model_source`` themselves.
+
+        ``mmap_mode`` and ``flat_max_rows`` are applied to the model each
+        process worker loads, as the parent applies them to its own copy.
+        """
+        self._predict_fn = predict_fn
+        if self.backend == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference"
+            )
+        elif self.backend == "process":
+            if model_source is None:
+                raise ValueError("The process backend needs a model source to preload")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_worker,
+                initargs=(*model_source, mmap_mode, flat_max_rows),
+            )
+
+    def shutdown(self, cancel_pending=True):
+        """Stop the pool; with ``cancel_pending=False`` accepted work still runs"""
+        self.closed = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=cancel_pending)
+            self._pool = None
+
+    async def run(self, features):
+        """Predict a 2D feature array, returning a list of labels"""
+        if self.closed:
+            raise Overloaded("Inference executor is shut down")
+        if self.pending >= self.max_pending:
+            raise Overloaded(
+                f"Inference backlog is full ({self.pending} pending requests)"
+            )
+        self.pending += 1
+        try:
+            if self._pool is None:
+                return self._predict_fn(features)
+            fn = _predict_in_worker if self.backend == "process" else self._predict_fn
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, fn, features)
+        finally:
+            self.pending -= 1
@@ -0,0 +1,99 @@
+import json
+import os
+
+import numpy as np
+
+
+class InvalidInput(ValueError):
+    """Request rows the model cannot score, reported as a 422"""
+
+
+def training_ranges(summary, target="target"):
+    """Per-feature (low, high) arrays from a drift sketch or cleaning stats.
+
+    Drift sketches keep min/max under ``features``; the cleaning statistics
+    written next to the processed data keep them under ``columns`` (which
+    also include the target). Features keep the file's column order.
+    """
+    columns = summary.get("features") or summary.get("columns") or {}
+    features = [name for name in columns if name != target]
+    if not features:
+        return None
+    low = np.array([columns[name]["min"] for name in features], dtype=np.float64)
+    high = np.array([columns[name]["max"] for name in features], dtype=np.float64)
+    return low, high
+
+
+def load_training_ranges(paths):
+    """Ranges from the first of ``paths`` that exists and parses, else None"""
+    for path in paths:
+        if not path or not os.path.exists(path):
+            continue
+        try:
+            with open(path, "r") as f:
+                ranges = training_ranges(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Could not read training ranges from {path}: {e}")
+            continue
+        if ranges is not None:
+            return ranges, path
+    return None, None
+
+
+class FeatureValidator:
+    """Check whole request batches before they reach the model.
+
+    Every check is a NumPy reduction over the batch: rows must be a 2D
+    numeric array with ``n_features`` columns and only finite values,
+    otherwise :class:`InvalidInput` is raised. Rows with a value outside the
+    training range, widened by ``margin`` times the range on each side, are
+    out of distribution. They are flagged but still scored, unless
+    ``reject_out_of_range`` is set.
+    """
+
+    def __init__(
+        self, n_features=None, low=None, high=None, margin=0.0, reject_out_of_range=False
+    ):
+        self.n_features = n_features
+        self.low = self.high = None
+        if low is not None and high is not None:
+            low = np.asarray(low, dtype=np.float64)
+            high = np.asarray(high, dtype=np.float64)
+            span = high - low
+            self.low, self.high = low - margin * span, high + margin * span
+            if self.n_features is None:
+                self.n_features = len(low)
+            elif len(low) != self.n_features:
+                print(
+                    f"Ignoring training ranges for {len(low)} features; "
+                    f"the model expects {self.n_features}"
+                )
+                self.low = self.high = None
+        self.reject_out_of_range = reject_out_of_range
+
+    def check(self, X):
+        """Validate a 2D batch; returns the boolean out-of-distribution mask"""
+        if X.size == 0:
+            raise InvalidInput("No rows to score")
+        if X.ndim != 2 or X.dtype.kind not in "fiu":
+            raise InvalidInput("Features must be a list of numbers per row")
+        if self.n_features is not None and X.shape[1] != self.n_features:
+            raise InvalidInput(
+                f"Expected {self.n_features} features per row, got {X.shape[1]}"
+            )
+        if X.dtype.kind == "f":
+            finite = np.isfinite(X)
+            if not finite.all():
+                rows = np.flatnonzero(~finite.all(axis=1))
+                raise InvalidInput(
+                    f"Features must be finite; NaN or infinity in rows {rows[:10].tolist()}"
+                )
+        if self.low is None:
+            return np.zeros(len(X), dtype=bool)
+        out_of_range = ((X < self.low) | (X > self.high)).any(axis=1)
+        if self.reject_out_of_range and out_of_range.any():
+            rows = np.flatnonzero(out_of_range)
+            raise InvalidInput(
+                f"Features outside the training range in rows {rows[:10].tolist()}"
+            )
+        return out_of_range
@@ -0,0 +1,109 @@
+import asyncio
+
+import numpy as np
+
+from src.inference_executor import Overloaded
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row predictions into one model call.
+
+    Requests are queued and a background task drains the queue into batches of
+    up to ``max_batch_size`` rows, waiting at most ``max_wait_ms`` for a batch to
+    fill before awaiting ``predict_fn`` once and fanning results back out. At
+    most ``max_queue_size`` rows may wait for a batch; beyond that
+    :class:`Overloaded` is raised. :meth:`stop` lets batches already sent to
+    the model finish and fails rows still waiting with :class:`Overloaded`.
+    """
+
+    def __init__(
+        self, predict_fn, max_batch_size=64, max_wait_ms=2.0, max_queue_size=0
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+        self._queue = None
+        self._task = None
+        self._inflight = set()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(Overloaded("Micro-batcher stopped"))
+
+    async def submit(self, features):
+        if self._task is None:
+            raise Overloaded("Micro-batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((features, future))
+        except asyncio.QueueFull:
+            raise Overloaded(f"Micro-batch queue is full ({self.queue_depth} rows)")
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        try:
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Rows already taken off the queue would otherwise wait forever
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(Overloaded("Micro-batcher stopped"))
+            raise
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Group by row length so one malformed request cannot fail the
+            # whole batch; it gets the same model error it would get alone.
+            groups = {}
+            for features, future in batch:
+                groups.setdefault(len(features), []).append((features, future))
+            # Batches run concurrently; the predict backend bounds the backlog.
+            for items in groups.values():
+                task = asyncio.create_task(self._predict_group(items))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+    async def _predict_group(self, items):
+        try:
+            X = np.array([features for features, _ in items])
+            predictions = np.asarray(await self.predict_fn(X)).tolist()
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), prediction in zip(items, predictions):
+            if not future.done():
+                future.set_result(prediction)
@@ -0,0 +1,105 @@
+import json
+import os
+import time
+
+# Sources probed in order when no cached source is available. Each entry is
+# (kind, uri, description).
+MODEL_SOURCES = [
+    ("joblib", "models/iris_model.pkl", "Local joblib model"),
+    ("mlflow", "models:/IrisRandomForest/Staging", "Model Registry - Staging"),
+    ("mlflow", "models:/IrisRandomForest/latest", "Model Registry - Latest"),
+    ("mlflow", "mlruns/models", "Local models directory"),
+    (
+        "mlflow",
+        "mlruns/0/85352b5f8d474b4f850f206501da8f7b/artifacts/model",
+        "Run artifacts",
+    ),
+]
+
+
+def load_model_from_source(kind, uri, mmap_mode=None):
+    """Load a model from a (kind, uri) source, importing only what it needs.
+
+    ``mmap_mode`` is passed to ``joblib.load`` (or ``FlatForest.load``) so that
+    arrays in the artifact are memory-mapped and their pages shared between
+    workers. Flat forests come back paired with their sklearn source, when it
+    still exists, so that large batches are not scored on the flat engine.
+    """
+    if kind == "flat":
+        from src.forest_engine import load_flat_engine
+
+        return load_flat_engine(uri, mmap_mode=mmap_mode)
+    if kind == "joblib":
+        import joblib
+
+        return joblib.load(uri, mmap_mode=mmap_mode)
+    if kind == "mlflow":
+        import mlflow.pyfunc
+
+        return mlflow.pyfunc.load_model(uri)
+    raise ValueError(f"Unknown model source kind: {kind}")
+
+
+def _is_local_uri(uri):
+    return "://" not in uri and not uri.startswith("models:/")
+
+
+def source_version(kind, uri):
+    """Identify a model source, including the artifact's mtime for local paths"""
+    version = f"{kind}:{uri}"
+    if _is_local_uri(uri) and os.path.exists(uri):
+        if os.path.isdir(uri):
+            mtime = max(
+                [os.path.getmtime(os.path.join(uri, name)) for name in os.listdir(uri)]
+                or [os.path.getmtime(uri)]
+            )
+        else:
+            mtime = os.path.getmtime(uri)
+        version += f"@{mtime:.0f}"
+    return version
+
+
+def read_cached_source(cache_path):
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+        return cached["kind"], cached["uri"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_cached_source(cache_path, kind, uri):
+    try:
+        with open(cache_path, "w") as f:
+            json.dump({"kind": kind, "uri": uri}, f)
+    except OSError as e:
+        print(f"Could not record model source in {cache_path}: {e}")
+
+
+def probe_model_sources(sources=None, cache_path=None, mmap_mode=None):
+    """Load the first available model, trying the last successful source first.
+
+    Local sources whose path does not exist are skipped without importing their
+    loader. Returns ``(model, (kind, uri))`` or ``(None, None)``.
+    """
+    sources = [(kind, uri) for kind, uri, _ in (sources or MODEL_SOURCES)]
+    cached = read_cached_source(cache_path) if cache_path else None
+    if cached is not None:
+        sources = [cached] + [source for source in sources if source != cached]
+
+    for kind, uri in sources:
+        if _is_local_uri(uri) and not os.path.exists(uri):
+            continue
+        start = time.perf_counter()
+        try:
+            model = load_model_from_source(kind, uri, mmap_mode=mmap_mode)
+        except Exception as e:
+            print(f"Failed to load model from {uri}: {str(e)}")
+            continue
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"Model loaded successfully from: {uri} ({elapsed_ms:.0f} ms)")
+        if cache_path and (kind, uri) != cached:
+            write_cached_source(cache_path, kind, uri)
+        return model, (kind, uri)
+
+    return None, None
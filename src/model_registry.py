@@ -0,0 +1,260 @@
+import asyncio
+import pickle
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.model_loader import load_model_from_source, source_version
+
+DEFAULT_MODEL_NAME = "IrisRandomForest"
+# Failed loads remembered at most; requests can name arbitrary models
+MAX_REMEMBERED_FAILURES = 1024
+
+
+def parse_aliases(spec):
+    """``"name=kind:uri,..."`` into ``{name: (kind, uri)}``"""
+    aliases = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, source = item.partition("=")
+        kind, _, uri = source.partition(":")
+        if not (name and kind and uri):
+            raise ValueError(f"Model alias must look like name=kind:uri, got {item!r}")
+        aliases[name.strip()] = (kind.strip(), uri.strip())
+    return aliases
+
+
+def resolve_source(model=None, version=None, stage=None, aliases=None):
+    """Map request parameters to a (kind, uri) model source.
+
+    ``model`` is an alias from ``aliases`` or a registered model name
+    (default ``IrisRandomForest``), selected by ``version`` or ``stage`` and
+    otherwise at its latest version.
+    """
+    if model in (aliases or {}):
+        if version or stage:
+            raise ValueError(f"Alias {model!r} cannot be combined with version or stage")
+        return aliases[model]
+    if version and stage:
+        raise ValueError("Pass either a version or a stage, not both")
+    name = model or DEFAULT_MODEL_NAME
+    return "mlflow", f"models:/{name}/{version or stage or 'latest'}"
+
+
+def parse_target(spec, aliases=None):
+    """An alias, ``kind:uri``, or registered ``name`` / ``name/<version or stage>``"""
+    if spec in (aliases or {}):
+        return aliases[spec]
+    kind, separator, uri = spec.partition(":")
+    if separator and kind in ("joblib", "flat", "mlflow"):
+        return kind, uri
+    name, _, selector = spec.partition("/")
+    return resolve_source(name, version=selector or None)
+
+
+def estimate_model_bytes(model):
+    """Approximate in-memory size of a loaded model.
+
+    Array-backed models (the flat forest) are measured by their arrays;
+    anything else by the size of its pickle, which for sklearn forests is
+    dominated by the tree node arrays. Unpicklable models count as 0.
+    """
+    attributes = getattr(model, "__dict__", {}).values()
+    arrays = [value for value in attributes if isinstance(value, np.ndarray)]
+    if arrays:
+        return int(sum(array.nbytes for array in arrays))
+    try:
+        return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class ServedModel:
+    """A loaded model with its executor, validator and usage counters"""
+
+    def __init__(self, source, model, nbytes):
+        self.source = source
+        self.model = model
+        self.nbytes = nbytes
+        self.version = source_version(*source)
+        self.executor = None
+        self.validator = None
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.requests = 0
+        # Requests between get() and done(); an unloaded entry is released
+        # once the last of them finishes
+        self.holds = 0
+        self.retired = False
+
+    def describe(self):
+        return {
+            "kind": self.source[0],
+            "uri": self.source[1],
+            "version": self.version,
+            "bytes": self.nbytes,
+            "requests": self.requests,
+            "in_flight": self.holds,
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+        }
+
+
+class ModelRegistry:
+    """Models loaded on first use and unloaded least recently used first.
+
+    Entries are keyed by (kind, uri). A model is loaded off the event loop
+    the first time it is requested, and concurrent requests for it wait on
+    the same load. ``prepare(entry)`` attaches an executor and validator
+    after loading. Every ``get`` must be paired with ``done(entry)``;
+    ``release(entry)`` runs once an unloaded entry is no longer held.
+    Once the models' estimated size exceeds ``max_bytes``, the least
+    recently used ones are unloaded. The newest model always stays, even
+    when it is over budget on its own. Failed loads are not retried for
+    ``retry_after`` seconds; at most ``MAX_REMEMBERED_FAILURES`` of them are
+    remembered.
+    """
+
+    def __init__(
+        self,
+        max_bytes=None,
+        prepare=None,
+        release=None,
+        mmap_mode=None,
+        retry_after=30.0,
+        loader=load_model_from_source,
+    ):
+        self.max_bytes = max_bytes
+        self.prepare = prepare
+        self.release = release
+        self.mmap_mode = mmap_mode
+        self.retry_after = retry_after
+        self.loader = loader
+        self.loads = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        # source -> (monotonic time, error), oldest failure first
+        self._failures = OrderedDict()
+
+    @property
+    def total_bytes(self):
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def __contains__(self, source):
+        return source in self._entries
+
+    async def get(self, source):
+        """The served model for ``source``, loading it if needed"""
+        entry = self._entries.get(source)
+        # A request waiting on someone else's load resumes after it; if the
+        # model was unloaded in between, load it again rather than hand out
+        # a released entry
+        while entry is None or entry.retired:
+            entry = self._entries.get(source) or await self._load(source)
+        self._entries.move_to_end(source)
+        entry.last_used = time.time()
+        entry.requests += 1
+        entry.holds += 1
+        return entry
+
+    def done(self, entry):
+        """Hand back an entry from :meth:`get`, releasing it if it was unloaded"""
+        entry.holds -= 1
+        if entry.retired and entry.holds == 0:
+            self._release(entry)
+
+    async def _load(self, source):
+        if source in self._loading:
+            return await asyncio.shield(self._loading[source])
+        failed_at, error = self._failures.get(source, (None, None))
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+            raise LookupError(f"Model {source[1]} is unavailable: {error}")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._loading[source] = future
+        try:
+            start = time.perf_counter()
+            # Sizing may pickle the whole model, so it runs off the loop too
+            model, nbytes = await loop.run_in_executor(None, self._load_sync, source)
+            entry = ServedModel(source, model, nbytes)
+            if self.prepare is not None:
+                self.prepare(entry)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(
+                f"Loaded model {source[1]} on demand "
+                f"({entry.nbytes / (1024 * 1024):.1f} MB, {elapsed_ms:.0f} ms)"
+            )
+        except Exception as e:
+            self._remember_failure(source, str(e))
+            error = LookupError(f"Model {source[1]} could not be loaded: {e}")
+            future.set_exception(error)
+            # Mark the exception retrieved when nobody else awaited the load
+            future.exception()
+            raise error
+        finally:
+            del self._loading[source]
+
+        self._failures.pop(source, None)
+        self._entries[source] = entry
+        self.loads += 1
+        future.set_result(entry)
+        self._evict(keep=source)
+        return entry
+
+    def _remember_failure(self, source, error):
+        now = time.monotonic()
+        self._failures.pop(source, None)
+        self._failures[source] = (now, error)
+        while self._failures:
+            oldest, (failed_at, _) = next(iter(self._failures.items()))
+            expired = now - failed_at >= self.retry_after
+            if not expired and len(self._failures) <= MAX_REMEMBERED_FAILURES:
+                break
+            del self._failures[oldest]
+
+    def _load_sync(self, source):
+        model = self.loader(*source, mmap_mode=self.mmap_mode)
+        return model, estimate_model_bytes(model)
+
+    def _evict(self, keep=None):
+        if self.max_bytes is None:
+            return
+        for source in list(self._entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if source != keep:
+                self.unload(source)
+                self.evictions += 1
+
+    def unload(self, source):
+        entry = self._entries.pop(source, None)
+        if entry is None:
+            return False
+        entry.retired = True
+        if entry.holds == 0:
+            self._release(entry)
+        print(f"Unloaded model {source[1]}")
+        return True
+
+    def _release(self, entry):
+        if self.release is not None:
+            self.release(entry)
+
+    def clear(self):
+        for source in list(self._entries):
+            self.unload(source)
+
+    def stats(self):
+        return {
+            "models": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+    def describe(self):
+        """Loaded models, least recently used first"""
+        return [entry.describe() for entry in self._entries.values()]
@@ -1,42 +1,90 @@
 from src.data_preprocessing import clean_data
 from src.drift_detection import generate_drift_baseline
+from src.drift_sketch import build_drift_sketch
 from src.train import train_model
 from src.evaluate import evaluate_model
+from src.data_io import file_fingerprint, processed_path, read_processed
+from src.dag import DagExecutor, Step
+from src import tracking_logger
+from src.tracking_connection import setup_mlflow_tracking
+from src.incremental import SLICE_MANIFEST_PATH, incremental_update, start_manifest
+from src.step_cache import StepCache
 
 import os
+import joblib
 import mlflow
 import json
 
+# Storage format of the processed dataset: "csv", "parquet" or "arrow"
+PROCESSED_FORMAT = os.getenv("PROCESSED_FORMAT", "csv")
+# Rows per chunk when cleaning the raw data out of core (0 cleans in memory)
+CLEAN_CHUNKSIZE = int(os.getenv("CLEAN_CHUNKSIZE", "0"))
+# The drift baseline is a compact per-feature sketch used for live drift checks;
+# the full Evidently HTML report is only rendered with DRIFT_HTML_REPORT=1.
+DRIFT_HTML_REPORT = os.getenv("DRIFT_HTML_REPORT", "0").lower() in ("1", "true", "yes")
+# Hyperparameter search before training: "" (fixed parameters), "grid" or
+# "random" (TRAIN_SEARCH_TRIALS samples), cross-validated with TRAIN_CV_FOLDS
+# folds on TRAIN_SEARCH_WORKERS processes (0 uses every core).
+TRAIN_SEARCH = os.getenv("TRAIN_SEARCH", "")
+TRAIN_SEARCH_TRIALS = int(os.getenv("TRAIN_SEARCH_TRIALS", "20"))
+TRAIN_CV_FOLDS = int(os.getenv("TRAIN_CV_FOLDS", "5"))
+TRAIN_SEARCH_WORKERS = int(os.getenv("TRAIN_SEARCH_WORKERS", "0")) or None
+# TRAIN_MODE="incremental" cleans only the raw slice at NEW_DATA_PATH and grows
+# the saved forest by INCREMENTAL_NEW_TREES trees, retraining from every
+# recorded slice when its accuracy or drift crosses the thresholds.
+TRAIN_MODE = os.getenv("TRAIN_MODE", "full")
+NEW_DATA_PATH = os.getenv("NEW_DATA_PATH", "")
+INCREMENTAL_NEW_TREES = int(os.getenv("INCREMENTAL_NEW_TREES", "20"))
+RETRAIN_ACCURACY_THRESHOLD = float(os.getenv("RETRAIN_ACCURACY_THRESHOLD", "0.9"))
+RETRAIN_PSI_THRESHOLD = float(os.getenv("RETRAIN_PSI_THRESHOLD", "0.2"))
+# Steps whose input files, code and parameters are unchanged since a cached run
+# are skipped and their outputs restored from PIPELINE_CACHE_DIR, which is kept
+# under PIPELINE_CACHE_MAX_MB. PIPELINE_CACHE=0 always runs every step.
+PIPELINE_CACHE = os.getenv("PIPELINE_CACHE", "1").lower() in ("1", "true", "yes")
+PIPELINE_CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", ".pipeline_cache")
+PIPELINE_CACHE_MAX_MB = float(os.getenv("PIPELINE_CACHE_MAX_MB", "1024"))
 
-def setup_mlflow_tracking():
-    """Setup MLflow tracking with proper authentication"""
-    # Check if we have authentication credentials
-    dagshub_token = os.getenv("DAGSHUB_TOKEN")
-    mlflow_username = os.getenv("MLFLOW_TRACKING_USERNAME", "yahiaehab10")
-    mlflow_password = os.getenv("MLFLOW_TRACKING_PASSWORD", dagshub_token)
+# Independent steps run concurrently on up to PIPELINE_WORKERS threads
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+
+MODEL_PATH = "models/iris_model.pkl"
 
-    if dagshub_token and mlflow_password:
-        try:
-            # Set up DagsHub MLflow with authentication
-            mlflow.set_tracking_uri(
-                "https://dagshub.com/yahiaehab10/MLFlow_demo.mlflow"
-            )
 
-            # Try to authenticate by creating a simple connection test
-            client = mlflow.tracking.MlflowClient()
-            experiments = client.search_experiments(max_results=1)
-            print("✓ Successfully connected to DagsHub MLflow")
-            return True
+def run_step(cache, name, step, **kwargs):
+    """Run a step through the step cache when enabled; returns (result, hit)"""
+    if cache is None:
+        return step(), False
+    return cache.run(name, step, **kwargs)
 
-        except Exception as e:
-            print(f"❌ DagsHub authentication failed: {e}")
-            print("🔄 Falling back to local MLflow tracking")
-            mlflow.set_tracking_uri("file:./mlruns")
-            return False
-    else:
-        print("⚠️  No DagsHub credentials found, using local MLflow")
-        mlflow.set_tracking_uri("file:./mlruns")
-        return False
+
+def run_incremental_pipeline():
+    """Clean one new raw slice and fold it into the saved model"""
+    # Stored slices are retrained on later, so a new file that reuses an old
+    # name must not overwrite it: name them by content as well
+    name = os.path.splitext(os.path.basename(NEW_DATA_PATH))[0]
+    name = f"{name}-{file_fingerprint(NEW_DATA_PATH)[:12]}"
+    os.makedirs("data/processed/slices", exist_ok=True)
+    slice_path = processed_path(f"data/processed/slices/{name}.csv", PROCESSED_FORMAT)
+
+    with tracking_logger.start_run(run_name="incremental_update"):
+        clean_data(NEW_DATA_PATH, slice_path, chunksize=CLEAN_CHUNKSIZE or None)
+        tracking_logger.log_param("new_data_path", NEW_DATA_PATH)
+        model, summary = incremental_update(
+            slice_path,
+            sketch_path="data/drift_baseline/iris_drift_sketch.json",
+            n_new_trees=INCREMENTAL_NEW_TREES,
+            accuracy_threshold=RETRAIN_ACCURACY_THRESHOLD,
+            psi_threshold=RETRAIN_PSI_THRESHOLD,
+        )
+        tracking_logger.log_param("update_mode", summary["mode"])
+        tracking_logger.log_metrics(
+            {
+                key: value
+                for key, value in summary.items()
+                if key != "mode" and isinstance(value, (int, float))
+            }
+        )
+        print(f"✅ Incremental update: {summary}")
 
 
 def run_pipeline():
@@ -44,31 +92,129 @@ def run_pipeline():
 
     # Setup MLflow tracking
     dagshub_connected = setup_mlflow_tracking()
+    if dagshub_connected:
+        # Send values spooled while the tracking server was unreachable
+        tracking_logger.sync_offline()
 
-    # Start MLflow run for the pipeline
-    with mlflow.start_run(run_name="full_pipeline"):
-        # Step 1: Clean data
-        clean_data("data/raw/iris.csv", "data/processed/iris_clean.csv")
-        mlflow.log_param("raw_data_path", "data/raw/iris.csv")
-        mlflow.log_param("clean_data_path", "data/processed/iris_clean.csv")
-
-        # Step 2: Drift baseline
-        drift_report_path = "data/drift_baseline/iris_drift_baseline.html"
-        generate_drift_baseline(
-            "data/processed/iris_clean.csv",
-            drift_report_path,
+    if TRAIN_MODE == "incremental":
+        if not NEW_DATA_PATH:
+            raise ValueError("TRAIN_MODE=incremental requires NEW_DATA_PATH")
+        run_incremental_pipeline()
+        return
+
+    clean_data_path = processed_path("data/processed/iris_clean.csv", PROCESSED_FORMAT)
+    clean_stats_path = "data/processed/iris_clean_stats.json"
+    cache = None
+    if PIPELINE_CACHE:
+        cache = StepCache(
+            PIPELINE_CACHE_DIR, max_bytes=int(PIPELINE_CACHE_MAX_MB * 1024 * 1024)
+        )
+
+    drift_sketch_path = "data/drift_baseline/iris_drift_sketch.json"
+    drift_artifacts = [drift_sketch_path]
+    if DRIFT_HTML_REPORT:
+        drift_artifacts.append("data/drift_baseline/iris_drift_baseline.html")
+
+    # Step 1: Clean data
+    def clean_step():
+        cleaned = {}
+
+        def run():
+            result = clean_data(
+                "data/raw/iris.csv",
+                clean_data_path,
+                chunksize=CLEAN_CHUNKSIZE or None,
+                stats_path=clean_stats_path,
+            )
+            # Chunked cleaning never holds the whole dataset in memory
+            if not CLEAN_CHUNKSIZE:
+                cleaned["df"] = result
+
+        _, hit = run_step(
+            cache,
+            "clean",
+            run,
+            inputs=["data/raw/iris.csv"],
+            outputs=[clean_data_path, clean_stats_path],
+            code=["src/data_preprocessing.py", "src/data_io.py"],
+            params={"chunksize": CLEAN_CHUNKSIZE, "format": PROCESSED_FORMAT},
         )
-        
+        tracking_logger.log_param("clean_cached", hit)
+        tracking_logger.log_param("raw_data_path", "data/raw/iris.csv")
+        tracking_logger.log_param("clean_data_path", clean_data_path)
+        if "df" not in cleaned:
+            cleaned["df"] = read_processed(clean_data_path)
+        return {"clean_df": cleaned["df"]}
+
+    # Step 2: Drift baseline
+    def drift_baseline_step(clean_df):
+        def run():
+            build_drift_sketch(clean_data_path, drift_sketch_path, df=clean_df)
+            if DRIFT_HTML_REPORT:
+                generate_drift_baseline(clean_data_path, drift_artifacts[1])
+
+        _, hit = run_step(
+            cache,
+            "drift_baseline",
+            run,
+            inputs=[clean_data_path],
+            outputs=drift_artifacts,
+            code=["src/drift_sketch.py", "src/drift_detection.py", "src/data_io.py"],
+            params={"html_report": DRIFT_HTML_REPORT},
+        )
+        tracking_logger.log_param("drift_baseline_cached", hit)
+
         # Only log artifacts if connected to DagsHub, skip for local MLflow
         if dagshub_connected:
-            mlflow.log_artifact(drift_report_path, artifact_path="drift_reports")
+            for drift_artifact in drift_artifacts:
+                mlflow.log_artifact(drift_artifact, artifact_path="drift_reports")
         else:
-            print(f"📁 Drift report saved locally at: {drift_report_path}")
+            print(f"📁 Drift baseline saved locally at: {', '.join(drift_artifacts)}")
             print("⚠️  Skipping artifact upload (local MLflow mode)")
+        return {}
 
-        # Step 3: Train model
-        model, acc = train_model("data/processed/iris_clean.csv", dagshub_connected=dagshub_connected)
-        mlflow.log_metric("accuracy", acc)
+    # Step 3: Train model
+    def train_step(clean_df):
+        trained = {}
+
+        def run():
+            trained["model"], acc = train_model(
+                clean_data_path,
+                dagshub_connected=dagshub_connected,
+                search=TRAIN_SEARCH or None,
+                n_trials=TRAIN_SEARCH_TRIALS,
+                cv=TRAIN_CV_FOLDS,
+                workers=TRAIN_SEARCH_WORKERS,
+                df=clean_df,
+            )
+            start_manifest(trained["model"], clean_data_path, len(clean_df))
+            return acc
+
+        # Registering a model with DagsHub is a remote side effect, so only
+        # local training (which writes its model files) is cached
+        acc, hit = run_step(
+            None if dagshub_connected else cache,
+            "train",
+            run,
+            inputs=[clean_data_path],
+            # The search report only describes this model when a search ran
+            outputs=[MODEL_PATH, "models/iris_model_flat", SLICE_MANIFEST_PATH]
+            + (["models/hyperparameter_search.json"] if TRAIN_SEARCH else []),
+            code=[
+                "src/train.py",
+                "src/hyperparameter_search.py",
+                "src/forest_engine.py",
+                "src/incremental.py",
+                "src/data_io.py",
+            ],
+            params={
+                "search": TRAIN_SEARCH,
+                "n_trials": TRAIN_SEARCH_TRIALS,
+                "cv": TRAIN_CV_FOLDS,
+            },
+        )
+        tracking_logger.log_param("train_cached", hit)
+        tracking_logger.log_metric("accuracy", acc)
 
         # Save metrics to JSON file for DVC
         metrics = {
@@ -78,14 +224,48 @@ def run_pipeline():
         }
         with open("metrics.json", "w") as f:
             json.dump(metrics, f)
+        return {"model": trained.get("model") or joblib.load(MODEL_PATH)}
+
+    # Example: log additional artifacts (e.g., images from analysis)
+    # Uncomment and update the path if you have analysis images to upload
+    # mlflow.log_artifact("path/to/your/analysis_image.png", artifact_path="analysis_images")
+
+    # Step 4: Evaluate model (optional)
+    def evaluate_step(model, clean_df):
+        report, hit = run_step(
+            None if dagshub_connected else cache,
+            "evaluate",
+            lambda: evaluate_model(model, clean_data_path, df=clean_df),
+            inputs=[clean_data_path, MODEL_PATH],
+            code=["src/evaluate.py", "src/data_io.py"],
+        )
+        if hit:
+            for metric in ("precision", "recall", "f1-score"):
+                tracking_logger.log_metric(metric, report["weighted avg"][metric])
+        return {"report": report}
 
-        # Example: log additional artifacts (e.g., images from analysis)
-        # Uncomment and update the path if you have analysis images to upload
-        # mlflow.log_artifact("path/to/your/analysis_image.png", artifact_path="analysis_images")
+    # Drift baseline and training only depend on the cleaned data, so they
+    # run concurrently
+    dag = DagExecutor(
+        [
+            Step("clean", clean_step, outputs=["clean_df"]),
+            Step("drift_baseline", drift_baseline_step, inputs=["clean_df"]),
+            Step("train", train_step, inputs=["clean_df"], outputs=["model"]),
+            Step(
+                "evaluate", evaluate_step, inputs=["model", "clean_df"], outputs=["report"]
+            ),
+        ],
+        max_workers=PIPELINE_WORKERS,
+    )
 
-        # Step 4: Evaluate model (optional)
-        report = evaluate_model(model, "data/processed/iris_clean.csv")
-        print(report)
+    # Start MLflow run for the pipeline
+    with tracking_logger.start_run(run_name="full_pipeline"):
+        values = dag.run()
+        print(values["report"])
+        print(dag.report())
+        tracking_logger.log_metrics(
+            {f"step_seconds_{name}": seconds for name, seconds in dag.timings.items()}
+        )
 
 
 if __name__ == "__main__":
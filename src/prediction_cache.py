@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Bounded LRU cache of predictions keyed by model version and features.
+
+    Feature values are rounded to ``decimals`` places before hashing so that
+    numerically identical rows share an entry. Entries older than ``ttl``
+    seconds are treated as misses, and the whole cache is cleared whenever
+    :meth:`set_model_version` sees a new version.
+    """
+
+    def __init__(self, maxsize=10000, ttl=None, decimals=6):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.decimals = decimals
+        self.model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, features):
+        return (self.model_version,) + tuple(
+            round(float(value), self.decimals) for value in features
+        )
+
+    def set_model_version(self, version):
+        """Record the serving model version, dropping entries of older versions"""
+        with self._lock:
+            if version != self.model_version:
+                self._entries.clear()
+                self.model_version = version
+
+    def get(self, key):
+        """Return the cached prediction for ``key`` or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                prediction, stored_at = entry
+                if self.ttl and time.monotonic() - stored_at > self.ttl:
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return prediction
+            self.misses += 1
+            return None
+
+    def put(self, key, prediction):
+        if key[0] != self.model_version:
+            return
+        with self._lock:
+            self._entries[key] = (prediction, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "model_version": self.model_version,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
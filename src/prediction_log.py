@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import time
+
+# Same extensions as src.data_io, kept here so that importing the logger does
+# not pull in pandas; pyarrow is only imported once a Parquet part is written
+PARQUET_EXTENSIONS = (".parquet",)
+
+
+class PredictionLogger:
+    """Log served predictions without blocking request handlers.
+
+    Handlers call :meth:`log`, which only appends to an in-memory buffer. A
+    background task flushes the buffer every ``flush_interval`` seconds, or
+    sooner once ``flush_rows`` rows are waiting, writing on a worker thread.
+    At most ``max_buffer_rows`` rows are buffered; rows logged beyond that are
+    dropped and counted rather than slowing the API down.
+
+    Records match the format read by ``scripts/monitor_model.py``:
+    ``{"ts", "features", "prediction", "latency_ms", "model_version"}``.
+    A ``.jsonl`` path is rotated to ``path.1`` ... ``path.<backup_count>`` once
+    it exceeds ``max_bytes``; a ``.parquet`` path is treated as a directory and
+    each flush is written as a new part file.
+    """
+
+    def __init__(
+        self,
+        path,
+        max_buffer_rows=100_000,
+        flush_rows=1000,
+        flush_interval=1.0,
+        max_bytes=64 * 1024 * 1024,
+        backup_count=5,
+    ):
+        self.path = path
+        self.columnar = path.endswith(PARQUET_EXTENSIONS)
+        self.max_buffer_rows = max_buffer_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self._buffer = []
+        self._buffered_rows = 0
+        self._parts = 0
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+
+    @property
+    def buffered(self):
+        return self._buffered_rows
+
+    def stats(self):
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "buffered": self._buffered_rows,
+            "rotations": self.rotations,
+        }
+
+    async def start(self):
+        directory = self.path if self.columnar else os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush task and write whatever is still buffered"""
+        if self._task is not None:
+            # Let the task finish a write it is in the middle of rather than
+            # cancelling it and writing concurrently
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def log(self, rows, predictions, latency_ms, model_version):
+        """Buffer one request's rows; returns False if they were dropped"""
+        if self._buffered_rows + len(rows) > self.max_buffer_rows:
+            self.dropped += len(rows)
+            return False
+        self._buffer.append((time.time(), rows, predictions, latency_ms, model_version))
+        self._buffered_rows += len(rows)
+        if self._buffered_rows >= self.flush_rows and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        entries, self._buffer = self._buffer, []
+        rows, self._buffered_rows = self._buffered_rows, 0
+        loop = asyncio.get_running_loop()
+        try:
+            skipped = await loop.run_in_executor(None, self._write, entries)
+            self.written += rows - skipped
+            self.dropped += skipped
+        except Exception as e:
+            self.dropped += rows
+            print(f"Prediction log write failed: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+            if self._stopping:
+                return
+
+    def _write(self, entries):
+        """Write buffered entries; returns the number of records skipped"""
+        if self.columnar:
+            self._write_parquet(entries)
+            return 0
+        return self._write_jsonl(entries)
+
+    def _write_jsonl(self, entries):
+        lines = []
+        skipped = 0
+        for ts, rows, predictions, latency_ms, model_version in entries:
+            for features, prediction in zip(rows, predictions):
+                record = {
+                    "ts": ts,
+                    "features": features,
+                    "prediction": prediction,
+                    "latency_ms": latency_ms,
+                    "model_version": model_version,
+                }
+                try:
+                    lines.append(json.dumps(record))
+                except (TypeError, ValueError):
+                    # One bad record must not cost the rest of the batch
+                    skipped += 1
+        if skipped:
+            print(f"Skipped {skipped} prediction log records that are not JSON serializable")
+        if not lines:
+            return skipped
+        with open(self.path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+            size = f.tell()
+        if self.max_bytes and size >= self.max_bytes:
+            self._rotate()
+        return skipped
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+
+    def _write_parquet(self, entries):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = {
+            "ts": [],
+            "features": [],
+            "prediction": [],
+            "latency_ms": [],
+            "model_version": [],
+        }
+        for ts, rows, predictions, latency_ms, model_version in entries:
+            columns["ts"] += [ts] * len(rows)
+            columns["features"] += list(rows)
+            columns["prediction"] += list(predictions)
+            columns["latency_ms"] += [latency_ms] * len(rows)
+            columns["model_version"] += [model_version] * len(rows)
+        self._parts += 1
+        part = os.path.join(
+            self.path, f"part-{int(time.time() * 1000)}-{os.getpid()}-{self._parts}.parquet"
+        )
+        pq.write_table(pa.table(columns), part)
@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sklearn.metrics import accuracy_score, precision_score, recall_score
+
+from src.bulk_score import infer_model_kind
+from src.model_loader import load_model_from_source
+
+MODEL_NAME = "IrisRandomForest"
+PIPELINE_RUN_NAME = "full_pipeline"
+PROMOTION_METRICS = ("accuracy", "precision", "recall")
+
+
+def latest_run_metrics(client, experiment_ids=None, run_name=PIPELINE_RUN_NAME):
+    """Metrics of the newest finished pipeline run, fetched as a single run.
+
+    Filtering, ordering and the limit are applied by the tracking server, so
+    the cost does not grow with the number of runs.
+    """
+    if experiment_ids is None:
+        experiments = client.search_experiments(
+            max_results=1, order_by=["last_update_time DESC"]
+        )
+        experiment_ids = [e.experiment_id for e in experiments]
+    if not experiment_ids:
+        return {}
+    runs = client.search_runs(
+        experiment_ids=experiment_ids,
+        filter_string=(
+            f"attributes.status = 'FINISHED' and tags.mlflow.runName = '{run_name}'"
+        ),
+        order_by=["attributes.start_time DESC"],
+        max_results=1,
+    )
+    return dict(runs[0].data.metrics) if runs else {}
+
+
+def registered_version(client, stages, model_name=MODEL_NAME):
+    """Newest registered version in any of ``stages``, or None"""
+    try:
+        versions = client.get_latest_versions(model_name, stages=list(stages))
+    except Exception:
+        return None
+    if not versions:
+        return None
+    return max(versions, key=lambda v: int(v.version))
+
+
+def version_metrics(client, version):
+    """Metrics logged by the run that produced a registered model version"""
+    if version is None or not version.run_id:
+        return {}
+    return dict(client.get_run(version.run_id).data.metrics)
+
+
+def check_thresholds(metrics, thresholds):
+    """Names of metrics below their minimum"""
+    return [
+        name for name, minimum in thresholds.items() if metrics.get(name, 0) < minimum
+    ]
+
+
+def compare_to_production(candidate, production, min_improvement=0.0):
+    """Metrics where the candidate trails Production by more than allowed.
+
+    A candidate may not regress any metric Production has, and must beat
+    Production's accuracy by at least ``min_improvement`` when that is set.
+    """
+    regressions = []
+    for name in PROMOTION_METRICS:
+        if name not in production:
+            continue
+        required = production[name] + (min_improvement if name == "accuracy" else 0.0)
+        if candidate.get(name, 0) < required:
+            regressions.append(name)
+    return regressions
+
+
+def evaluate_model_uri(model_uri, X, y):
+    """Load one model and score it on the held-out set"""
+    model = load_model_from_source(infer_model_kind(model_uri), model_uri)
+    y_pred = model.predict(X)
+    return {
+        "accuracy": accuracy_score(y, y_pred),
+        "precision": precision_score(y, y_pred, average="weighted", zero_division=0),
+        "recall": recall_score(y, y_pred, average="weighted", zero_division=0),
+    }
+
+
+def evaluate_candidates(model_uris, X, y, workers=None):
+    """Score several models on the same held-out set concurrently.
+
+    Time goes mostly into downloading and deserializing registry artifacts,
+    which threads overlap well. Returns ``{uri: metrics or None}``; a model
+    that fails to load or predict maps to None.
+    """
+
+    def evaluate(uri):
+        try:
+            return evaluate_model_uri(uri, X, y)
+        except Exception as e:
+            print(f"⚠️  Could not evaluate {uri}: {e}")
+            return None
+
+    uris = list(dict.fromkeys(model_uris))
+    if not uris:
+        return {}
+    with ThreadPoolExecutor(max_workers=workers or len(uris)) as pool:
+        return dict(zip(uris, pool.map(evaluate, uris)))
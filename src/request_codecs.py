@@ -0,0 +1,118 @@
+import io
+
+import numpy as np
+
+JSON_CONTENT_TYPE = "application/json"
+# Row-major little-endian float32 values; the row width comes from the
+# X-Feature-Count header or the served model's n_features_in_
+FLOAT32_CONTENT_TYPE = "application/x-float32"
+NPY_CONTENT_TYPE = "application/x-npy"
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+BINARY_CONTENT_TYPES = (FLOAT32_CONTENT_TYPE, NPY_CONTENT_TYPE) + MSGPACK_CONTENT_TYPES
+
+
+class DecodeError(ValueError):
+    """The request body does not hold a valid feature matrix"""
+
+
+class UnsupportedMediaType(ValueError):
+    """The request body's content type cannot be decoded"""
+
+
+def media_type(content_type):
+    """``Content-Type`` header without parameters; JSON when missing"""
+    return (content_type or JSON_CONTENT_TYPE).split(";")[0].strip().lower()
+
+
+def is_json(content_type):
+    return content_type == JSON_CONTENT_TYPE or content_type.endswith("+json")
+
+
+def as_matrix(rows):
+    """Rows decoded from a structured body as a 2D float array"""
+    try:
+        X = np.asarray(rows, dtype=np.float64)
+    except (TypeError, ValueError) as e:
+        raise DecodeError(f"Body is not a numeric feature matrix: {e}")
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.ndim != 2:
+        raise DecodeError(f"Expected 1 or 2 dimensions, got {X.ndim}")
+    return X
+
+
+def decode_float32(body, n_features):
+    """View the raw body bytes as float32 rows without copying"""
+    if not n_features:
+        raise DecodeError("Feature count unknown; send an X-Feature-Count header")
+    row_bytes = 4 * n_features
+    if not body or len(body) % row_bytes:
+        raise DecodeError(
+            f"Body of {len(body)} bytes is not a whole number of "
+            f"{n_features}-feature float32 rows"
+        )
+    return np.frombuffer(body, dtype="<f4").reshape(-1, n_features)
+
+
+def decode_npy(body):
+    """Parse the ``.npy`` header and view the data that follows it in place"""
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+        elif version == (3, 0):
+            # 3.0 is 2.0 with a UTF-8 header; numpy has no public reader for it
+            shape, fortran_order, dtype = np.lib.format._read_array_header(
+                stream, version=(3, 0)
+            )
+        else:
+            raise DecodeError(f"Unsupported .npy format version {version[0]}.{version[1]}")
+    except ValueError as e:
+        raise DecodeError(f"Invalid .npy body: {e}")
+    if dtype.kind not in "fiu":
+        raise DecodeError(f"Unsupported .npy dtype {dtype}")
+    if len(shape) not in (1, 2):
+        raise DecodeError(f"Expected 1 or 2 dimensions, got {len(shape)}")
+    count = int(np.prod(shape))
+    if len(body) - stream.tell() != count * dtype.itemsize:
+        raise DecodeError("Truncated .npy body")
+    X = np.frombuffer(body, dtype=dtype, count=count, offset=stream.tell())
+    X = X.reshape(shape, order="F" if fortran_order else "C")
+    return X.reshape(1, -1) if X.ndim == 1 else X
+
+
+def decode_msgpack(body):
+    """A MessagePack ``{"features": [...]}``/``{"instances": [[...]]}`` map or bare rows"""
+    try:
+        import msgpack
+    except ImportError:
+        raise UnsupportedMediaType("MessagePack bodies need the msgpack package")
+    try:
+        payload = msgpack.unpackb(body)
+    except Exception as e:
+        raise DecodeError(f"Invalid MessagePack body: {e}")
+    if isinstance(payload, dict):
+        payload = payload.get("instances", payload.get("features"))
+    return as_matrix(payload)
+
+
+def decode_rows(content_type, body, n_features=None):
+    """Decode a non-JSON request body into a 2D feature array"""
+    if content_type == FLOAT32_CONTENT_TYPE:
+        return decode_float32(body, n_features)
+    if content_type == NPY_CONTENT_TYPE:
+        return decode_npy(body)
+    if content_type in MSGPACK_CONTENT_TYPES:
+        return decode_msgpack(body)
+    raise UnsupportedMediaType(f"Unsupported content type: {content_type}")
+
+
+def request_body_docs(schema):
+    """OpenAPI ``requestBody`` listing the JSON schema and the binary formats"""
+    content = {JSON_CONTENT_TYPE: {"schema": schema.model_json_schema()}}
+    for content_type in BINARY_CONTENT_TYPES:
+        content[content_type] = {"schema": {"type": "string", "format": "binary"}}
+    return {"requestBody": {"required": True, "content": content}}
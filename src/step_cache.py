@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from src.data_io import file_fingerprint
+
+
+def path_size(path):
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(path)
+            for name in names
+        )
+    return os.path.getsize(path)
+
+
+def copy_path(source, destination):
+    """Copy a file or directory, replacing whatever is at ``destination``.
+
+    The copy is made next to ``destination`` and then swapped into place, so
+    readers (a model watcher, memory-mapped arrays) never see a missing or
+    half-written output.
+    """
+    destination = os.path.abspath(destination)
+    directory = os.path.dirname(destination)
+    os.makedirs(directory, exist_ok=True)
+    staging = os.path.join(
+        directory, f".{os.path.basename(destination)}.{uuid.uuid4().hex}.tmp"
+    )
+    try:
+        if os.path.isdir(source):
+            shutil.copytree(source, staging)
+        else:
+            shutil.copyfile(source, staging)
+        if os.path.isdir(destination):
+            # A directory cannot replace a non-empty one: move it aside first
+            previous = f"{staging}.old"
+            os.replace(destination, previous)
+            os.replace(staging, destination)
+            shutil.rmtree(previous, ignore_errors=True)
+        else:
+            os.replace(staging, destination)
+    except BaseException:
+        if os.path.isdir(staging):
+            shutil.rmtree(staging, ignore_errors=True)
+        elif os.path.exists(staging):
+            os.remove(staging)
+        raise
+
+
+class StepCache:
+    """Content-addressed cache of pipeline step outputs.
+
+    A step's key hashes its name, the contents of its input files, the source
+    files implementing it and its parameters. On a hit the step's output files
+    are copied back into place and its JSON result is returned without running
+    it. Entries are evicted least recently used first once
+    the cache holds more than ``max_bytes``.
+
+    Input fingerprints are memoized by (path, size, mtime) so unchanged large
+    inputs are not re-read on every run.
+    """
+
+    def __init__(self, root=".pipeline_cache", max_bytes=1 << 30):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+        self._fingerprints_path = os.path.join(root, "fingerprints.json")
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self._fingerprints_path):
+            with open(self._fingerprints_path, "r") as f:
+                self._fingerprints = json.load(f)
+
+    def fingerprint(self, path):
+        stat = os.stat(path)
+        if os.path.isdir(path):
+            return file_fingerprint(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        cached = self._fingerprints.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        digest = file_fingerprint(path)
+        with self._lock:
+            self._fingerprints[path] = [signature, digest]
+            with open(self._fingerprints_path, "w") as f:
+                json.dump(self._fingerprints, f)
+        return digest
+
+    def key(self, name, inputs=(), code=(), params=None):
+        digest = hashlib.sha256(name.encode())
+        for path in inputs:
+            digest.update(path.encode())
+            digest.update(self.fingerprint(path).encode())
+        for path in code:
+            digest.update(self.fingerprint(path).encode())
+        digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def _read_meta(self, key):
+        meta_path = os.path.join(self._entry_dir(key), "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r") as f:
+            return json.load(f)
+
+    def _write_meta(self, key, meta):
+        with open(os.path.join(self._entry_dir(key), "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def restore(self, key):
+        """Copy a cached step's outputs back into place; returns its meta or None"""
+        # Held throughout so that evict() on another step's thread cannot
+        # delete the entry mid-copy or read a half-written meta.json
+        with self._lock:
+            meta = self._read_meta(key)
+            if meta is None:
+                return None
+            files = os.path.join(self._entry_dir(key), "files")
+            for i, path in enumerate(meta["outputs"]):
+                copy_path(os.path.join(files, str(i)), path)
+            meta["last_used"] = time.time()
+            self._write_meta(key, meta)
+            return meta
+
+    def store(self, key, name, outputs, result=None):
+        entry = self._entry_dir(key)
+        if os.path.exists(entry):
+            shutil.rmtree(entry)
+        files = os.path.join(entry, "files")
+        os.makedirs(files)
+        outputs = [path for path in outputs if os.path.exists(path)]
+        for i, path in enumerate(outputs):
+            copy_path(path, os.path.join(files, str(i)))
+        meta = {
+            "step": name,
+            "outputs": outputs,
+            "result": result,
+            "size": sum(path_size(path) for path in outputs),
+            "created": time.time(),
+            "last_used": time.time(),
+        }
+        self._write_meta(key, meta)
+        self.evict()
+        return meta
+
+    def entries(self):
+        metas = []
+        for key in os.listdir(self.root):
+            meta = self._read_meta(key) if os.path.isdir(self._entry_dir(key)) else None
+            if meta is not None:
+                metas.append((key, meta))
+        return metas
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits ``max_bytes``"""
+        with self._lock:
+            entries = sorted(self.entries(), key=lambda item: item[1]["last_used"])
+            total = sum(meta["size"] for _, meta in entries)
+            # The newest entry is kept even if it alone exceeds the limit
+            while total > self.max_bytes and len(entries) > 1:
+                key, meta = entries.pop(0)
+                shutil.rmtree(self._entry_dir(key))
+                total -= meta["size"]
+                print(f"🧹 Evicted cached {meta['step']} step ({meta['size']} bytes)")
+
+    def run(self, name, step, inputs=(), outputs=(), code=(), params=None):
+        """Run ``step()`` unless an identical run is cached.
+
+        ``step`` must write ``outputs`` and return a JSON-serializable result.
+        Returns ``(result, hit)``.
+        """
+        key = self.key(name, inputs, code, params)
+        meta = self.restore(key)
+        if meta is not None:
+            self.hits += 1
+            print(f"⚡ {name}: unchanged, restored {len(meta['outputs'])} outputs from cache")
+            return meta["result"], True
+        self.misses += 1
+        result = step()
+        self.store(key, name, outputs, result)
+        return result, False
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+
+import mlflow
+
+DAGSHUB_TRACKING_URI = "https://dagshub.com/yahiaehab10/MLFlow_demo.mlflow"
+LOCAL_TRACKING_URI = "file:./mlruns"
+
+# Seconds the connectivity probe may take before we fall back to local logging
+CONNECT_TIMEOUT = float(os.getenv("MLFLOW_CONNECT_TIMEOUT", "5"))
+# Bounds for every later MLflow REST call, unless already set in the environment.
+# MLflow's defaults (120s timeout, 5 retries with exponential backoff) can stall
+# a job for minutes on an unreachable server.
+REQUEST_DEFAULTS = {
+    "MLFLOW_HTTP_REQUEST_TIMEOUT": "30",
+    "MLFLOW_HTTP_REQUEST_MAX_RETRIES": "3",
+    "MLFLOW_HTTP_REQUEST_BACKOFF_FACTOR": "1",
+}
+
+_session = None
+_connection = None
+_lock = threading.Lock()
+
+
+def http_session():
+    """Process-wide requests session, so probes reuse pooled connections"""
+    global _session
+    if _session is None:
+        import requests
+
+        _session = requests.Session()
+    return _session
+
+
+def probe_tracking_server(uri, username=None, password=None, timeout=CONNECT_TIMEOUT):
+    """One request to the tracking server's REST API, with no retries.
+
+    Returns ``(reachable, reason)``; authentication failures count as
+    unreachable since nothing could be logged.
+    """
+    start = time.perf_counter()
+    try:
+        response = http_session().get(
+            f"{uri.rstrip('/')}/api/2.0/mlflow/experiments/search",
+            params={"max_results": 1},
+            auth=(username, password) if password else None,
+            timeout=timeout,
+        )
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - start
+    if response.status_code in (401, 403):
+        return False, f"authentication failed (HTTP {response.status_code})"
+    if response.status_code != 200:
+        return False, f"HTTP {response.status_code}"
+    return True, f"responded in {elapsed * 1000:.0f}ms"
+
+
+def remote_tracking_uri():
+    uri = os.getenv("MLFLOW_TRACKING_URI", "")
+    return uri if uri.startswith(("http://", "https://")) else DAGSHUB_TRACKING_URI
+
+
+def setup_mlflow_tracking(force=False):
+    """Point MLflow at DagsHub when it is reachable, otherwise at ./mlruns.
+
+    The remote is probed once per process with a single request bounded by
+    ``MLFLOW_CONNECT_TIMEOUT``; later calls reuse the result. Without DagsHub
+    credentials no request is made. Returns True if logging goes to DagsHub.
+    Runs logged locally because DagsHub was unreachable are recorded by
+    ``tracking_logger.start_run`` and replayed by ``sync_offline``.
+    """
+    global _connection
+
+    with _lock:
+        if _connection is not None and not force:
+            mlflow.set_tracking_uri(_connection[1])
+            return _connection[0]
+
+        dagshub_token = os.getenv("DAGSHUB_TOKEN")
+        mlflow_username = os.getenv("MLFLOW_TRACKING_USERNAME", "yahiaehab10")
+        mlflow_password = os.getenv("MLFLOW_TRACKING_PASSWORD", dagshub_token)
+
+        connected, uri, fell_back = False, LOCAL_TRACKING_URI, False
+        if dagshub_token and mlflow_password:
+            remote_uri = remote_tracking_uri()
+            reachable, reason = probe_tracking_server(
+                remote_uri, mlflow_username, mlflow_password
+            )
+            if reachable:
+                # MLflow's REST client reads basic-auth credentials from the env
+                os.environ.setdefault("MLFLOW_TRACKING_USERNAME", mlflow_username)
+                os.environ.setdefault("MLFLOW_TRACKING_PASSWORD", mlflow_password)
+                for name, value in REQUEST_DEFAULTS.items():
+                    os.environ.setdefault(name, value)
+                connected, uri = True, remote_uri
+                print(f"✓ Successfully connected to DagsHub MLflow ({reason})")
+            else:
+                print(f"❌ DagsHub MLflow unreachable: {reason}")
+                print("🔄 Falling back to local MLflow tracking")
+                fell_back = True
+        else:
+            print("⚠️  No DagsHub credentials found, using local MLflow")
+
+        mlflow.set_tracking_uri(uri)
+        _connection = (connected, uri, fell_back)
+        return connected
+
+
+def offline_fallback():
+    """True when runs go to ./mlruns only because DagsHub was unreachable"""
+    return _connection is not None and _connection[2]
+
+
+def reset_connection():
+    """Forget the cached probe result (e.g. after changing credentials)"""
+    global _connection
+    with _lock:
+        _connection = None
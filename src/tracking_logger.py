@@ -0,0 +1,400 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import mlflow
+from mlflow.exceptions import MlflowException
+
+from src.tracking_connection import offline_fallback
+
+# log_batch request limits of the MLflow REST API
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+
+# Batches that could not be sent are spooled here and replayed by sync_offline
+OFFLINE_DIR = os.getenv("MLFLOW_OFFLINE_DIR", "mlruns_offline")
+# Runs logged to ./mlruns while DagsHub was unreachable, copied by sync_offline
+OFFLINE_RUNS_FILE = "offline_runs.json"
+# Seconds between background flushes of buffered params, metrics and tags
+FLUSH_INTERVAL = float(os.getenv("MLFLOW_LOG_FLUSH_INTERVAL", "2"))
+
+
+def split_batches(metrics, params, tags):
+    """Split entities into chunks that respect the log_batch limits"""
+    while metrics or params or tags:
+        yield (
+            metrics[:MAX_METRICS_PER_BATCH],
+            params[:MAX_PARAMS_PER_BATCH],
+            tags[:MAX_TAGS_PER_BATCH],
+        )
+        metrics = metrics[MAX_METRICS_PER_BATCH:]
+        params = params[MAX_PARAMS_PER_BATCH:]
+        tags = tags[MAX_TAGS_PER_BATCH:]
+
+
+def send_batch(client, run_id, metrics, params, tags):
+    """Log (key, value, timestamp, step) metrics and (key, value) params/tags"""
+    from mlflow.entities import Metric, Param, RunTag
+
+    for metric_chunk, param_chunk, tag_chunk in split_batches(metrics, params, tags):
+        client.log_batch(
+            run_id,
+            metrics=[Metric(*metric) for metric in metric_chunk],
+            params=[Param(key, value) for key, value in param_chunk],
+            tags=[RunTag(key, value) for key, value in tag_chunk],
+        )
+
+
+def is_invalid_value(error):
+    """True for errors where the server rejected the logged values themselves"""
+    return (
+        isinstance(error, MlflowException)
+        and error.error_code == "INVALID_PARAMETER_VALUE"
+    )
+
+
+def send_valid_entries(client, run_id, metrics, params, tags):
+    """Send a batch the server rejected, dropping only the invalid entries.
+
+    The rejected batch is split in halves until each invalid entry is alone,
+    so a few bad values cost a few extra requests rather than the whole
+    batch. Returns the dropped ``(kind, entry)`` pairs.
+    """
+    entries = (
+        [("metric", metric) for metric in metrics]
+        + [("param", param) for param in params]
+        + [("tag", tag) for tag in tags]
+    )
+
+    def send(part):
+        try:
+            send_batch(
+                client,
+                run_id,
+                [entry for kind, entry in part if kind == "metric"],
+                [entry for kind, entry in part if kind == "param"],
+                [entry for kind, entry in part if kind == "tag"],
+            )
+        except Exception as e:
+            if not is_invalid_value(e):
+                raise
+            if len(part) == 1:
+                return list(part)
+            middle = len(part) // 2
+            return send(part[:middle]) + send(part[middle:])
+        return []
+
+    return send(entries)
+
+
+def spool_batch(run_id, metrics, params, tags, offline_dir=OFFLINE_DIR):
+    """Append an unsent batch to the local spool for a later sync_offline"""
+    os.makedirs(offline_dir, exist_ok=True)
+    record = {
+        "tracking_uri": mlflow.get_tracking_uri(),
+        "run_id": run_id,
+        "metrics": metrics,
+        "params": params,
+        "tags": tags,
+    }
+    with open(os.path.join(offline_dir, f"{run_id}.jsonl"), "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def _read_offline_runs(offline_dir):
+    path = os.path.join(offline_dir, OFFLINE_RUNS_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _write_offline_runs(records, offline_dir):
+    path = os.path.join(offline_dir, OFFLINE_RUNS_FILE)
+    if not records:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, "w") as f:
+        json.dump(records, f, indent=2)
+
+
+def record_offline_run(run_id, offline_dir=OFFLINE_DIR):
+    """Remember a run logged locally in place of the remote tracking server"""
+    os.makedirs(offline_dir, exist_ok=True)
+    records = _read_offline_runs(offline_dir)
+    records.append({"tracking_uri": mlflow.get_tracking_uri(), "run_id": run_id})
+    _write_offline_runs(records, offline_dir)
+
+
+def replay_run(client, source, run_id):
+    """Copy a finished run (metric history, params, tags, artifacts) to ``client``"""
+    run = source.get_run(run_id)
+    experiment = source.get_experiment(run.info.experiment_id)
+    target = client.get_experiment_by_name(experiment.name)
+    experiment_id = (
+        target.experiment_id if target else client.create_experiment(experiment.name)
+    )
+    copy = client.create_run(
+        experiment_id,
+        start_time=run.info.start_time,
+        tags={**run.data.tags, "replayed_from_run": run_id},
+    )
+    metrics = [
+        (m.key, m.value, m.timestamp, m.step)
+        for key in run.data.metrics
+        for m in source.get_metric_history(run_id, key)
+    ]
+    send_batch(client, copy.info.run_id, metrics, list(run.data.params.items()), [])
+    artifact_dir = run.info.artifact_uri
+    if artifact_dir.startswith("file:"):
+        artifact_dir = artifact_dir[len("file:") :]
+    if os.path.isdir(artifact_dir) and os.listdir(artifact_dir):
+        client.log_artifacts(copy.info.run_id, artifact_dir)
+    client.set_terminated(copy.info.run_id, run.info.status, run.info.end_time)
+    return copy.info.run_id
+
+
+def sync_offline_runs(client, offline_dir=OFFLINE_DIR):
+    """Copy recorded offline runs to the current tracking server; returns runs copied"""
+    tracking_uri = mlflow.get_tracking_uri()
+    remaining, copied = [], 0
+    for record in _read_offline_runs(offline_dir):
+        if record["tracking_uri"] == tracking_uri:
+            remaining.append(record)
+            continue
+        source = mlflow.tracking.MlflowClient(tracking_uri=record["tracking_uri"])
+        try:
+            if source.get_run(record["run_id"]).info.status == "RUNNING":
+                remaining.append(record)
+                continue
+            replay_run(client, source, record["run_id"])
+            copied += 1
+        except Exception as e:
+            print(f"⚠️  Could not sync offline run {record['run_id']}: {e}")
+            remaining.append(record)
+    _write_offline_runs(remaining, offline_dir)
+    if copied:
+        print(f"🔄 Copied {copied} offline MLflow runs to {tracking_uri}")
+    return copied
+
+
+def sync_offline(client=None, offline_dir=OFFLINE_DIR):
+    """Replay spooled batches and offline runs for the current tracking server.
+
+    Returns the number of spooled batches sent.
+    """
+    if not os.path.isdir(offline_dir):
+        return 0
+    client = client or mlflow.tracking.MlflowClient()
+    tracking_uri = mlflow.get_tracking_uri()
+    sync_offline_runs(client, offline_dir)
+    sent = 0
+    for path in sorted(glob.glob(os.path.join(offline_dir, "*.jsonl"))):
+        with open(path, "r") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        remaining = []
+        for record in records:
+            if record["tracking_uri"] != tracking_uri:
+                remaining.append(record)
+                continue
+            try:
+                send_batch(
+                    client,
+                    record["run_id"],
+                    [tuple(metric) for metric in record["metrics"]],
+                    [tuple(param) for param in record["params"]],
+                    [tuple(tag) for tag in record["tags"]],
+                )
+                sent += 1
+            except Exception as e:
+                print(f"⚠️  Could not sync spooled MLflow batch: {e}")
+                remaining.append(record)
+        if remaining:
+            with open(path, "w") as f:
+                f.writelines(json.dumps(record) + "\n" for record in remaining)
+        else:
+            os.remove(path)
+    if sent:
+        print(f"🔄 Synced {sent} spooled MLflow batches")
+    return sent
+
+
+class BatchedRunLogger:
+    """Buffer params, metrics and tags for one run and send them with log_batch.
+
+    Calls only append to an in-memory buffer. A background thread sends the
+    buffer every ``flush_interval`` seconds as a handful of ``log_batch``
+    requests instead of one request per value. When the server rejects some
+    values, only those are dropped and the rest are sent. Batches that cannot
+    be sent are spooled to ``offline_dir`` and replayed later by
+    :func:`sync_offline`.
+    """
+
+    def __init__(
+        self,
+        run_id,
+        client=None,
+        flush_interval=FLUSH_INTERVAL,
+        offline_dir=OFFLINE_DIR,
+    ):
+        self.run_id = run_id
+        self.client = client or mlflow.tracking.MlflowClient()
+        self.flush_interval = flush_interval
+        self.offline_dir = offline_dir
+        self.sent_batches = 0
+        self.spooled_batches = 0
+        self.rejected_entries = 0
+        self._metrics = []
+        self._params = {}
+        self._tags = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log_param(self, key, value):
+        # Params are immutable in MLflow, so the first value logged is kept
+        with self._lock:
+            self._params.setdefault(key, str(value))
+
+    def log_params(self, params):
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_metric(self, key, value, step=0):
+        with self._lock:
+            self._metrics.append((key, float(value), int(time.time() * 1000), step))
+
+    def log_metrics(self, metrics, step=0):
+        for key, value in metrics.items():
+            self.log_metric(key, value, step)
+
+    def set_tag(self, key, value):
+        with self._lock:
+            self._tags[key] = str(value)
+
+    def flush(self):
+        """Send everything buffered so far, blocking until it is sent or spooled"""
+        with self._send_lock:
+            with self._lock:
+                metrics, self._metrics = self._metrics, []
+                params, self._params = list(self._params.items()), {}
+                tags, self._tags = list(self._tags.items()), {}
+            if not (metrics or params or tags):
+                return
+            try:
+                send_batch(self.client, self.run_id, metrics, params, tags)
+                self.sent_batches += 1
+            except Exception as e:
+                if not is_invalid_value(e):
+                    self._spool(metrics, params, tags, e)
+                    return
+                # Resending the batch as is would fail the same way
+                try:
+                    rejected = send_valid_entries(
+                        self.client, self.run_id, metrics, params, tags
+                    )
+                except Exception as retry_error:
+                    self._spool(metrics, params, tags, retry_error)
+                    return
+                self.sent_batches += 1
+                self.rejected_entries += len(rejected)
+                print(
+                    f"⚠️  MLflow rejected {len(rejected)} logged values ({e}): "
+                    + ", ".join(f"{kind} {entry[0]}" for kind, entry in rejected)
+                )
+
+    def _spool(self, metrics, params, tags, error):
+        print(f"⚠️  MLflow logging failed ({error}); spooling to {self.offline_dir}")
+        spool_batch(self.run_id, metrics, params, tags, self.offline_dir)
+        self.spooled_batches += 1
+
+    def close(self):
+        self._closed.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+
+_loggers = {}
+_loggers_lock = threading.Lock()
+
+
+def get_logger(run_id=None):
+    """The batched logger for ``run_id`` (default: the active run).
+
+    Like the fluent ``mlflow.log_*`` calls, a run is started when none is
+    active.
+    """
+    if run_id is None:
+        active = mlflow.active_run()
+        if active is None:
+            active = mlflow.start_run()
+            if offline_fallback():
+                record_offline_run(active.info.run_id)
+        run_id = active.info.run_id
+    with _loggers_lock:
+        logger = _loggers.get(run_id)
+        if logger is None:
+            logger = _loggers[run_id] = BatchedRunLogger(run_id)
+        return logger
+
+
+def close_logger(run_id):
+    with _loggers_lock:
+        logger = _loggers.pop(run_id, None)
+    if logger is not None:
+        logger.close()
+
+
+@atexit.register
+def close_all():
+    for run_id in list(_loggers):
+        close_logger(run_id)
+
+
+@contextmanager
+def start_run(**kwargs):
+    """``mlflow.start_run`` that flushes buffered values before the run ends.
+
+    New runs logged locally because the tracking server was unreachable are
+    recorded so that :func:`sync_offline` can copy them later.
+    """
+    with mlflow.start_run(**kwargs) as run:
+        if offline_fallback() and "run_id" not in kwargs:
+            record_offline_run(run.info.run_id)
+        try:
+            yield run
+        finally:
+            close_logger(run.info.run_id)
+
+
+# Drop-in replacements for the fluent logging calls, buffered per active run
+def log_param(key, value):
+    get_logger().log_param(key, value)
+
+
+def log_params(params):
+    get_logger().log_params(params)
+
+
+def log_metric(key, value, step=0):
+    get_logger().log_metric(key, value, step)
+
+
+def log_metrics(metrics, step=0):
+    get_logger().log_metrics(metrics, step)
+
+
+def set_tag(key, value):
+    get_logger().set_tag(key, value)
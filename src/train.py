@@ -1,28 +1,78 @@
-import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 import mlflow
 import dagshub
+import json
 
+from src import tracking_logger
+from src.data_io import read_processed
+from src.forest_engine import FlatForest
+from src.hyperparameter_search import search_hyperparameters
 
-def train_model(data_path, stage=None, dagshub_connected=False):
-    df = pd.read_csv(data_path)
+
+def split_data(df):
+    """The fixed train/held-out split used for training and promotion"""
     X = df.drop("target", axis=1)
     y = df["target"]
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def log_search_trials(trials):
+    """Log every search trial to the active run, one step per trial"""
+    tracking_logger.log_param("search_trials", len(trials))
+    for trial in trials:
+        for key in ("cv_accuracy", "cv_accuracy_std", "fit_time"):
+            tracking_logger.log_metric(f"search_{key}", trial[key], step=trial["trial"])
+
+
+def train_model(
+    data_path,
+    stage=None,
+    dagshub_connected=False,
+    search=None,
+    n_trials=None,
+    cv=5,
+    workers=None,
+    df=None,
+):
+    """Train the forest, optionally selecting its hyperparameters first.
+
+    With ``search="grid"`` (every combination) or ``search="random"``
+    (``n_trials`` sampled ones) configurations are compared by ``cv``-fold
+    cross-validation on the training split across ``workers`` processes, and
+    the best one is refit on the whole training split. An already loaded
+    ``df`` is used instead of re-reading ``data_path``.
+    """
+    if df is None:
+        df = read_processed(data_path)
+    X_train, X_test, y_train, y_test = split_data(df)
+    params = {"n_estimators": 100}
+    trials = None
+    if search:
+        trials = search_hyperparameters(
+            X_train.to_numpy(),
+            y_train.to_numpy(),
+            n_trials=n_trials if search == "random" else None,
+            cv=cv,
+            workers=workers,
+        )
+        params = trials[0]["params"]
     # Don't start a new run - use the current active run from pipeline
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
+    clf = RandomForestClassifier(random_state=42, **params)
     clf.fit(X_train, y_train)
     acc = clf.score(X_test, y_test)
-    mlflow.log_param("model_type", "RandomForestClassifier")
-    mlflow.log_param("n_estimators", 100)
-    mlflow.log_param("random_state", 42)
-    mlflow.log_metric("accuracy", acc)
+    tracking_logger.log_param("model_type", "RandomForestClassifier")
+    tracking_logger.log_params(params)
+    tracking_logger.log_param("random_state", 42)
+    tracking_logger.log_metric("accuracy", acc)
+    if trials:
+        tracking_logger.log_metric("cv_accuracy", trials[0]["cv_accuracy"])
+        log_search_trials(trials)
     
     # Only log model artifacts if connected to DagsHub
     if dagshub_connected:
+        if trials:
+            mlflow.log_dict(trials, "hyperparameter_search.json")
         model_info = mlflow.sklearn.log_model(clf, "model")
         # Register the model in the MLflow Model Registry
         model_uri = model_info.model_uri
@@ -42,19 +92,29 @@ def train_model(data_path, stage=None, dagshub_connected=False):
             )
     else:
         # For local MLflow, save model locally and skip artifact logging
-        import pickle
+        import joblib
         import os
         
         # Create models directory if it doesn't exist
         os.makedirs("models", exist_ok=True)
         
-        # Save model locally
+        # Save model locally (uncompressed joblib so the API can memory-map it)
         model_path = "models/iris_model.pkl"
-        with open(model_path, "wb") as f:
-            pickle.dump(clf, f)
+        joblib.dump(clf, model_path)
+        FlatForest.from_sklearn(clf).save(
+            "models/iris_model_flat", source_model=model_path
+        )
+        search_report = "models/hyperparameter_search.json"
+        if trials:
+            with open(search_report, "w") as f:
+                json.dump(trials, f, indent=2)
+        elif os.path.exists(search_report):
+            # A report from an earlier search would not describe this model
+            os.remove(search_report)
         
         print(f"Model trained with accuracy: {acc}")
         print(f"🗂️  Model saved locally at: {model_path}")
+        print("🗂️  Flat forest saved locally at: models/iris_model_flat")
         print("⚠️  Skipping model registration (local MLflow mode)")
     
     return clf, acc
@@ -64,5 +124,5 @@ if __name__ == "__main__":
     # When running standalone, initialize DagsHub and start an MLflow run
     dagshub.init(repo_owner="yahiaehab10", repo_name="MLFlow_demo", mlflow=True)
     stage = input("Enter model stage (None, Staging, Production): ") or None
-    with mlflow.start_run():
+    with tracking_logger.start_run():
         train_model("data/processed/iris_clean.csv", stage=stage)
@@ -0,0 +1,339 @@
+"""
+Tests for the prediction API
+"""
+
+import io
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.datasets import load_iris
+
+import app as serving
+from src.drift_sketch import build_reference_sketch, save_sketch
+from src.forest_engine import FlatForest, HybridForest
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists("models/iris_model.pkl"), reason="Model not trained yet"
+)
+
+
+@pytest.fixture
+def client():
+    with TestClient(serving.app) as c:
+        yield c
+
+
+@pytest.fixture
+def batching_client(monkeypatch):
+    monkeypatch.setattr(serving, "MICRO_BATCHING", True)
+    with TestClient(serving.app) as c:
+        yield c
+
+
+def test_predict(client):
+    """Test single-row prediction"""
+    response = client.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+    assert response.status_code == 200
+    assert response.json()["prediction"] == 0
+
+
+def test_predict_batch(client):
+    """Test that the batch endpoint scores every row"""
+    response = client.post(
+        "/predict_batch",
+        json={"instances": [[5.1, 3.5, 1.4, 0.2], [7.3, 2.9, 6.3, 1.8]]},
+    )
+    assert response.status_code == 200
+    assert response.json()["predictions"] == [0, 2]
+
+
+def test_binary_request_formats(client):
+    """Test raw float32 and .npy bodies against the JSON results"""
+    rows = np.array([[5.1, 3.5, 1.4, 0.2], [7.3, 2.9, 6.3, 1.8]])
+    response = client.post(
+        "/predict",
+        content=rows[0].astype("<f4").tobytes(),
+        headers={"Content-Type": "application/x-float32"},
+    )
+    assert response.status_code == 200
+    assert response.json()["prediction"] == 0
+    assert response.json()["features"] == pytest.approx(rows[0].tolist())
+
+    buffer = io.BytesIO()
+    np.save(buffer, rows)
+    response = client.post(
+        "/predict_batch",
+        content=buffer.getvalue(),
+        headers={"Content-Type": "application/x-npy"},
+    )
+    assert response.json()["predictions"] == [0, 2]
+
+    response = client.post(
+        "/predict",
+        content=rows.astype("<f4").tobytes(),
+        headers={"Content-Type": "application/x-float32"},
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/predict", content=b"\x00" * 6, headers={"Content-Type": "application/x-float32"}
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/predict", content=b"5.1", headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 415
+
+
+def test_predict_without_echoed_features(client):
+    """Test that echoing the request features can be switched off"""
+    response = client.post(
+        "/predict?echo_features=false", json={"features": [5.1, 3.5, 1.4, 0.2]}
+    )
+    assert response.json() == {"prediction": 0}
+    response = client.post("/predict", json={"features": "not a list"})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:2] == ["body", "features"]
+
+
+def test_invalid_rows_are_rejected_before_inference(client):
+    """Test that wrong widths, NaN and ragged batches get cheap 422s"""
+    response = client.post("/predict", json={"features": [1, 2]})
+    assert response.status_code == 422
+    assert "Expected 4 features" in response.json()["detail"]
+
+    response = client.post("/predict", json={"features": [5.1, float("nan"), 1.4, 0.2]})
+    assert response.status_code == 422
+    response = client.post(
+        "/predict_batch", json={"instances": [[5.1, 3.5, 1.4, 0.2], [5.1, 3.5]]}
+    )
+    assert response.status_code == 422
+    response = client.post("/predict_batch", json={"instances": []})
+    assert response.status_code == 422
+    assert 'api_validation_rows_total{result="rejected"}' in client.get("/metrics").text
+
+
+def test_out_of_range_rows_are_flagged(monkeypatch, tmp_path):
+    """Test that rows outside the training ranges are flagged, or rejected"""
+    X, y = load_iris(return_X_y=True, as_frame=True)
+    save_sketch(build_reference_sketch(X.assign(target=y)), tmp_path / "sketch.json")
+    monkeypatch.setattr(serving, "VALIDATION_STATS_PATH", str(tmp_path / "missing.json"))
+    monkeypatch.setattr(serving, "DRIFT_SKETCH_PATH", str(tmp_path / "sketch.json"))
+
+    with TestClient(serving.app) as c:
+        response = c.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+        assert "out_of_distribution" not in response.json()
+        response = c.post("/predict", json={"features": [50.0, 3.5, 1.4, 0.2]})
+        assert response.json()["out_of_distribution"] is True
+        response = c.post(
+            "/predict_batch",
+            json={"instances": [[5.1, 3.5, 1.4, 0.2], [5.1, 3.5, 1.4, -9.0]]},
+        )
+        assert response.json()["out_of_distribution"] == [1]
+
+    monkeypatch.setattr(serving, "VALIDATION_REJECT_OUT_OF_RANGE", True)
+    with TestClient(serving.app) as c:
+        response = c.post("/predict", json={"features": [50.0, 3.5, 1.4, 0.2]})
+    assert response.status_code == 422
+
+
+def test_predict_micro_batched(batching_client):
+    """Test that /predict returns the same result through the micro-batcher"""
+    response = batching_client.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+    assert response.status_code == 200
+    assert response.json()["prediction"] == 0
+
+    response = batching_client.post("/predict", json={"features": [1, 2]})
+    assert response.status_code != 200
+
+
+def test_predict_sheds_load_when_backlog_full(monkeypatch):
+    """Test that requests beyond the inference backlog limit get a 503"""
+    monkeypatch.setattr(serving, "INFERENCE_MAX_PENDING", 0)
+    with TestClient(serving.app) as c:
+        response = c.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+    assert response.status_code == 503
+
+
+def test_predict_with_flat_engine(monkeypatch, tmp_path):
+    """Test that the flat-array engine serves the same predictions"""
+    monkeypatch.setattr(serving, "MODEL_ENGINE", "flat")
+    monkeypatch.setattr(serving, "FLAT_MODEL_PATH", str(tmp_path / "missing"))
+    with TestClient(serving.app) as c:
+        assert isinstance(serving.model, HybridForest)
+        assert isinstance(serving.model.flat, FlatForest)
+        response = c.post(
+            "/predict_batch",
+            json={"instances": [[5.1, 3.5, 1.4, 0.2], [7.3, 2.9, 6.3, 1.8]]},
+        )
+    assert response.json()["predictions"] == [0, 2]
+
+
+def test_repeated_predictions_hit_cache(client):
+    """Test that repeat requests are answered from the prediction cache"""
+    for _ in range(3):
+        response = client.post("/predict", json={"features": [6.2, 2.9, 4.3, 1.3]})
+        assert response.json()["prediction"] == 1
+
+    stats = client.get("/cache/stats").json()
+    assert stats["enabled"]
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_large_batches_bypass_cache(monkeypatch):
+    """Test that batches above PREDICTION_CACHE_MAX_BATCH skip the cache"""
+    monkeypatch.setattr(serving, "PREDICTION_CACHE_MAX_BATCH", 2)
+    with TestClient(serving.app) as c:
+        for _ in range(2):
+            response = c.post(
+                "/predict_batch", json={"instances": [[6.2, 2.9, 4.3, 1.3]] * 3}
+            )
+            assert response.json()["predictions"] == [1, 1, 1]
+        stats = c.get("/cache/stats").json()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (0, 0, 0)
+
+
+def test_admin_reload_swaps_model(monkeypatch, tmp_path):
+    """Test that reloading picks up a changed artifact and resets the cache"""
+    model_path = tmp_path / "iris_model.pkl"
+    shutil.copy("models/iris_model.pkl", model_path)
+    source_cache = tmp_path / "source.json"
+    source_cache.write_text(json.dumps({"kind": "joblib", "uri": str(model_path)}))
+    monkeypatch.setattr(serving, "MODEL_SOURCE_CACHE", str(source_cache))
+
+    with TestClient(serving.app) as c:
+        old_model, old_version = serving.model, serving.model_version
+        c.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+        mtime = os.path.getmtime(model_path) + 60
+        os.utime(model_path, (mtime, mtime))
+
+        response = c.post("/admin/reload")
+        assert response.status_code == 200
+        assert response.json()["model_version"] != old_version
+        assert serving.model is not old_model
+        assert c.get("/cache/stats").json()["size"] == 0
+        response = c.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+        assert response.json()["prediction"] == 0
+
+
+def test_metrics_endpoint(client):
+    """Test that /metrics reports request counts and per-stage latency"""
+    client.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+    body = client.get("/metrics").text
+
+    assert 'api_requests_total{path="/predict",status="200"}' in body
+    for stage in ("routing", "validation", "conversion", "predict", "serialization"):
+        assert f'api_stage_latency_seconds_count{{stage="{stage}"}}' in body
+    assert "api_inference_batch_size_bucket" in body
+    assert "api_model_info{version=" in body
+
+
+def test_drift_endpoint_tracks_served_features(monkeypatch, tmp_path):
+    """Test that served features feed the live drift detector"""
+    X, y = load_iris(return_X_y=True, as_frame=True)
+    save_sketch(build_reference_sketch(X.assign(target=y)), tmp_path / "sketch.json")
+    monkeypatch.setattr(serving, "DRIFT_SKETCH_PATH", str(tmp_path / "sketch.json"))
+
+    with TestClient(serving.app) as c:
+        c.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+        c.post("/predict_batch", json={"instances": X.values[:20].tolist()})
+        stats = c.get("/drift").json()
+
+    assert stats["enabled"]
+    assert stats["window_rows"] == 21
+    assert set(stats["features"]) == set(X.columns)
+
+
+def test_predictions_are_logged_in_background(monkeypatch, tmp_path):
+    """Test that served predictions are flushed to the JSONL log on shutdown"""
+    log_path = tmp_path / "predictions.jsonl"
+    monkeypatch.setattr(serving, "PREDICTION_LOG_PATH", str(log_path))
+
+    with TestClient(serving.app) as c:
+        c.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+        c.post("/predict_batch", json={"instances": [[6.2, 2.9, 4.3, 1.3]] * 3})
+        c.post(
+            "/predict",
+            content=np.array([5.1, 3.5, 1.4, 0.2], dtype="<f4").tobytes(),
+            headers={"Content-Type": "application/x-float32"},
+        )
+        assert "api_prediction_log{stat=" in c.get("/metrics").text
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert len(records) == 5
+    assert records[0]["features"] == [5.1, 3.5, 1.4, 0.2]
+    assert records[0]["prediction"] == 0
+    assert records[0]["latency_ms"] >= 0
+    assert records[0]["model_version"]
+    assert records[4]["features"] == pytest.approx([5.1, 3.5, 1.4, 0.2])
+
+
+def test_requests_can_target_other_models(monkeypatch, tmp_path):
+    """Test per-request model selection, lazy loading and unknown models"""
+    shutil.copy("models/iris_model.pkl", tmp_path / "candidate.pkl")
+    monkeypatch.setattr(
+        serving,
+        "SERVING_MODELS",
+        {
+            "candidate": ("joblib", str(tmp_path / "candidate.pkl")),
+            "gone": ("joblib", str(tmp_path / "gone.pkl")),
+        },
+    )
+    with TestClient(serving.app) as c:
+        assert c.get("/models").json()["loaded"] == []
+        response = c.post(
+            "/predict?model=candidate", json={"features": [5.1, 3.5, 1.4, 0.2]}
+        )
+        assert response.json()["prediction"] == 0
+        assert "candidate.pkl" in response.json()["model_version"]
+        response = c.post(
+            "/predict_batch?model=candidate",
+            json={"instances": [[5.1, 3.5, 1.4, 0.2], [7.3, 2.9, 6.3, 1.8]]},
+        )
+        assert response.json()["predictions"] == [0, 2]
+        response = c.post("/predict?model=candidate", json={"features": [5.1, 3.5]})
+        assert response.status_code == 422
+        loaded = c.get("/models").json()["loaded"]
+        assert [m["requests"] for m in loaded] == [3]
+        assert [m["in_flight"] for m in loaded] == [0]
+
+        response = c.post("/predict?model=gone", json={"features": [5.1, 3.5, 1.4, 0.2]})
+        assert response.status_code == 404
+        response = c.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+        assert "model_version" not in response.json()
+
+
+def test_shadow_and_canary_traffic(monkeypatch, tmp_path):
+    """Test that shadow scoring runs in the background and canaries serve traffic"""
+    shutil.copy("models/iris_model.pkl", tmp_path / "candidate.pkl")
+    monkeypatch.setattr(
+        serving, "SERVING_MODELS", {"candidate": ("joblib", str(tmp_path / "candidate.pkl"))}
+    )
+    monkeypatch.setattr(serving, "SHADOW_MODEL", "candidate")
+    with TestClient(serving.app) as c:
+        response = c.post(
+            "/predict_batch",
+            json={"instances": [[5.1, 3.5, 1.4, 0.2], [7.3, 2.9, 6.3, 1.8]]},
+        )
+        assert "model_version" not in response.json()
+        for _ in range(100):
+            if 'api_shadow_rows_total{result="agree"} 2' in c.get("/metrics").text:
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("Shadow predictions were not recorded")
+
+    monkeypatch.setattr(serving, "SHADOW_MODEL", "")
+    monkeypatch.setattr(serving, "CANARY_MODEL", "candidate")
+    monkeypatch.setattr(serving, "CANARY_FRACTION", 1.0)
+    # Canary-served rows are not compared against the shadow
+    mirrored = []
+    monkeypatch.setattr(serving, "mirror_to_shadow", lambda X, p: mirrored.append(p))
+    with TestClient(serving.app) as c:
+        response = c.post("/predict", json={"features": [5.1, 3.5, 1.4, 0.2]})
+    assert "candidate.pkl" in response.json()["model_version"]
+    assert mirrored == []
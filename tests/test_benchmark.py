@@ -0,0 +1,70 @@
+"""
+Tests for the pipeline micro-benchmarks
+"""
+
+import os
+
+import pytest
+
+from scripts.benchmark import compare, run_benchmarks, scaling_exponents, synthetic_iris
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists("data/raw/iris.csv"), reason="Raw data not available"
+)
+
+
+def test_synthetic_iris_keeps_schema_and_classes():
+    """Test that scaled data looks like the iris dataset"""
+    df = synthetic_iris(3000)
+    assert len(df) == 3000
+    assert list(df.columns)[-1] == "target"
+    assert sorted(df["target"].unique()) == [0, 1, 2]
+    assert df.drop(columns="target").notna().all().all()
+
+
+def test_benchmarks_run_outside_the_project(tmp_path):
+    """Test one small run, leaving the working directory untouched"""
+    cwd = os.getcwd()
+    model_mtime = (
+        os.path.getmtime("models/iris_model.pkl")
+        if os.path.exists("models/iris_model.pkl")
+        else None
+    )
+    results = run_benchmarks(
+        [200, 400], repeat=1, only=["clean_data", "predict_batch"]
+    )
+    assert os.getcwd() == cwd
+    if model_mtime is not None:
+        assert os.path.getmtime("models/iris_model.pkl") == model_mtime
+    assert [(r["name"], r["rows"]) for r in results] == [
+        ("clean_data", 200),
+        ("predict_batch", 200),
+        ("clean_data", 400),
+        ("predict_batch", 400),
+    ]
+    assert all(r["seconds"] > 0 and r["peak_mb"] > 0 for r in results)
+    assert set(scaling_exponents(results)) == {"clean_data", "predict_batch"}
+
+
+def test_compare_flags_time_and_memory_regressions():
+    """Test the baseline comparison"""
+    baseline = {
+        "results": [
+            {"name": "train_model", "rows": 1000, "seconds": 1.0, "peak_mb": 10.0},
+            {"name": "predict_batch", "rows": 1000, "seconds": 0.001, "peak_mb": 1.0},
+            {"name": "clean_data", "rows": 1000, "seconds": 0.1, "peak_mb": 5.0},
+        ]
+    }
+    results = [
+        {"name": "train_model", "rows": 1000, "seconds": 1.5, "peak_mb": 10.0},
+        # Tripled, but by less than the timer noise floor
+        {"name": "predict_batch", "rows": 1000, "seconds": 0.003, "peak_mb": 1.0},
+        {"name": "clean_data", "rows": 1000, "seconds": 0.1, "peak_mb": 8.0},
+        {"name": "clean_data", "rows": 5000, "seconds": 0.5, "peak_mb": 8.0},
+    ]
+    comparison = compare(results, baseline, max_regression=0.2)
+    assert [(row["name"], row["regressed"]) for row in comparison] == [
+        ("train_model", True),
+        ("predict_batch", False),
+        ("clean_data", True),
+    ]
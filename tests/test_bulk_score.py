@@ -0,0 +1,57 @@
+"""
+Tests for streaming bulk scoring
+"""
+
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import load_iris
+
+from src.bulk_score import score_file
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists("models/iris_model.pkl"), reason="Model not trained yet"
+)
+
+
+@pytest.fixture(scope="module")
+def expected():
+    X = load_iris().data
+    return X, joblib.load("models/iris_model.pkl").predict(X)
+
+
+def test_score_csv_in_chunks(expected, tmp_path):
+    """Test that chunked CSV scoring matches a single predict call"""
+    X, y_pred = expected
+    pd.DataFrame(X).assign(target=0).to_csv(tmp_path / "in.csv", index=False)
+
+    rows = score_file(
+        str(tmp_path / "in.csv"), str(tmp_path / "out.csv"), chunk_size=40
+    )
+
+    assert rows == len(X)
+    scored = pd.read_csv(tmp_path / "out.csv")["prediction"].to_numpy()
+    np.testing.assert_array_equal(scored, y_pred)
+
+
+def test_score_jsonl_with_process_pool(expected, tmp_path):
+    """Test that JSONL scoring across workers keeps the input order"""
+    X, y_pred = expected
+    with open(tmp_path / "in.jsonl", "w") as f:
+        for row in X:
+            f.write(json.dumps({"features": row.tolist()}) + "\n")
+
+    score_file(
+        str(tmp_path / "in.jsonl"),
+        str(tmp_path / "out.jsonl"),
+        chunk_size=25,
+        workers=2,
+    )
+
+    with open(tmp_path / "out.jsonl") as f:
+        scored = [json.loads(line)["prediction"] for line in f]
+    assert scored == y_pred.tolist()
@@ -0,0 +1,77 @@
+"""
+Tests for the pipeline step graph executor
+"""
+
+import threading
+
+import mlflow
+import pytest
+
+from src.dag import DagExecutor, Step
+
+
+def test_independent_steps_run_concurrently():
+    """Test that steps sharing only an upstream input overlap in time"""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def branch(name):
+        def fn(data):
+            barrier.wait()  # Deadlocks unless both branches run at once
+            return {name: data + [name]}
+
+        return fn
+
+    dag = DagExecutor(
+        [
+            Step("load", lambda: {"data": [1]}, outputs=["data"]),
+            Step("left", branch("left"), inputs=["data"], outputs=["left"]),
+            Step("right", branch("right"), inputs=["data"], outputs=["right"]),
+            Step(
+                "join",
+                lambda left, right: {"joined": left + right},
+                inputs=["left", "right"],
+                outputs=["joined"],
+            ),
+        ]
+    )
+    values = dag.run()
+    assert values["joined"] == [1, "left", 1, "right"]
+    assert set(dag.timings) == {"load", "left", "right", "join", "total"}
+
+
+def test_invalid_graphs_are_rejected():
+    """Test that cycles, unknown inputs and missing outputs raise"""
+    cycle = DagExecutor(
+        [
+            Step("a", lambda b: {"a": b}, inputs=["b"], outputs=["a"]),
+            Step("b", lambda a: {"b": a}, inputs=["a"], outputs=["b"]),
+        ]
+    )
+    with pytest.raises(ValueError, match="cycle"):
+        cycle.run()
+    with pytest.raises(ValueError, match="unknown inputs"):
+        DagExecutor([Step("a", lambda x: {}, inputs=["x"])]).run()
+    with pytest.raises(ValueError, match="did not return"):
+        DagExecutor([Step("a", lambda: {}, outputs=["y"])]).run()
+
+
+def test_steps_log_to_the_parent_run(tmp_path):
+    """Test that MLflow calls on worker threads land in the caller's run"""
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+
+    def log_step(name):
+        def fn():
+            mlflow.log_param(name, 1)
+            return {}
+
+        return Step(name, fn)
+
+    try:
+        dag = DagExecutor([log_step("a"), log_step("b")])
+        with mlflow.start_run() as run:
+            dag.run()
+        params = mlflow.get_run(run.info.run_id).data.params
+        assert params == {"a": "1", "b": "1"}
+        assert len(mlflow.search_runs([run.info.experiment_id])) == 1
+    finally:
+        mlflow.set_tracking_uri("")
@@ -0,0 +1,53 @@
+"""
+Tests for the streaming drift detector
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.drift_sketch import StreamingDriftDetector, build_reference_sketch
+
+
+@pytest.fixture
+def sketch():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(5000, 2)), columns=["a", "b"])
+    return build_reference_sketch(df.assign(target=0))
+
+
+def test_no_drift_on_reference_distribution(sketch):
+    """Test that traffic from the reference distribution is not flagged"""
+    detector = StreamingDriftDetector(sketch, window_size=2000)
+    detector.update(np.random.default_rng(1).normal(size=(2000, 2)))
+
+    stats = detector.statistics()
+    assert stats["window_rows"] == 2000
+    assert not any(feature["drifted"] for feature in stats["features"].values())
+
+
+def test_drift_detected_on_shifted_feature(sketch):
+    """Test that a shifted feature is flagged while the other is not"""
+    detector = StreamingDriftDetector(sketch, window_size=2000)
+    X = np.random.default_rng(1).normal(size=(2000, 2))
+    X[:, 0] += 1.5
+    for row in X:
+        detector.add(row.tolist())
+
+    stats = detector.statistics()["features"]
+    assert stats["a"]["drifted"] and stats["a"]["psi"] > 0.2
+    assert not stats["b"]["drifted"]
+
+
+def test_window_slides_out_old_rows(sketch):
+    """Test that the window only reflects the most recent rows"""
+    detector = StreamingDriftDetector(sketch, window_size=1000, n_buckets=10)
+    rng = np.random.default_rng(2)
+    shifted = rng.normal(size=(1000, 2)) + 3
+    detector.update(shifted)
+    assert detector.statistics()["features"]["a"]["drifted"]
+
+    detector.update(rng.normal(size=(1000, 2)))
+    stats = detector.statistics()
+    assert stats["window_rows"] <= 1000
+    assert not stats["features"]["a"]["drifted"]
@@ -0,0 +1,123 @@
+"""
+Tests for the flat-array forest inference engine
+"""
+
+import subprocess
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+from src.forest_engine import FlatForest, HybridForest, load_flat_engine
+
+
+@pytest.fixture(scope="module")
+def forest():
+    X, y = load_iris(return_X_y=True)
+    return RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y), X
+
+
+def test_flat_forest_matches_sklearn(forest):
+    """Test predict/predict_proba parity with the sklearn forest"""
+    clf, X = forest
+    flat = FlatForest.from_sklearn(clf)
+    rng = np.random.default_rng(0)
+    X_all = np.vstack([X, rng.uniform(0, 8, size=(500, 4))])
+
+    np.testing.assert_allclose(flat.predict_proba(X_all), clf.predict_proba(X_all))
+    np.testing.assert_array_equal(flat.predict(X_all), clf.predict(X_all))
+
+
+def test_flat_forest_save_and_load(forest, tmp_path):
+    """Test that a saved forest loads memory-mapped and predicts the same"""
+    clf, X = forest
+    FlatForest.from_sklearn(clf).save(tmp_path / "flat")
+    flat = FlatForest.load(tmp_path / "flat", mmap_mode="r")
+
+    assert isinstance(flat.threshold, np.memmap)
+    np.testing.assert_array_equal(flat.predict(X), clf.predict(X))
+
+
+def test_flat_forest_save_replaces_mapped_forest(forest, tmp_path):
+    """Test that re-saving leaves an already memory-mapped forest readable"""
+    clf, X = forest
+    FlatForest.from_sklearn(clf).save(tmp_path / "flat")
+    mapped = FlatForest.load(tmp_path / "flat", mmap_mode="r")
+    expected = mapped.predict_proba(X)
+
+    other = RandomForestClassifier(n_estimators=5, random_state=1).fit(X, clf.predict(X))
+    FlatForest.from_sklearn(other).save(tmp_path / "flat")
+
+    np.testing.assert_allclose(mapped.predict_proba(X), expected)
+    assert FlatForest.load(tmp_path / "flat").roots.shape[0] == 5
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["flat"]
+
+
+def test_flat_forest_rejects_wrong_feature_count(forest):
+    """Test that rows with the wrong number of features raise ValueError"""
+    clf, _ = forest
+    with pytest.raises(ValueError):
+        FlatForest.from_sklearn(clf).predict([[1.0, 2.0]])
+
+
+def test_hybrid_forest_routes_by_batch_size(forest, tmp_path):
+    """Test that large batches go to sklearn and small ones to the flat engine"""
+    clf, X = forest
+    joblib.dump(clf, tmp_path / "model.pkl")
+    FlatForest.from_sklearn(clf).save(
+        tmp_path / "flat", source_model=str(tmp_path / "model.pkl")
+    )
+    hybrid = load_flat_engine(str(tmp_path / "flat"), max_rows=10)
+
+    assert isinstance(hybrid, HybridForest)
+    assert hybrid._engine(X[:10]) is hybrid.flat
+    # The sklearn source is loaded by the first batch too big for the flat engine
+    assert hybrid._forest is None
+    assert hybrid._engine(X) is hybrid.forest
+    np.testing.assert_array_equal(hybrid.predict(X), clf.predict(X))
+    np.testing.assert_array_equal(hybrid.predict(X[:3]), clf.predict(X[:3]))
+
+
+def test_simple_train_artifact_loads_as_hybrid(monkeypatch, tmp_path):
+    """Test that the flat forest written by simple_train keeps its source model"""
+    import mlflow
+
+    import simple_train
+
+    monkeypatch.chdir(tmp_path)
+    previous_uri = mlflow.get_tracking_uri()
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    monkeypatch.setattr(simple_train.mlflow.sklearn, "log_model", lambda *a, **k: None)
+    try:
+        simple_train.train_and_save_model()
+    finally:
+        mlflow.set_tracking_uri(previous_uri)
+
+    engine = load_flat_engine("models/iris_model_flat")
+    assert isinstance(engine, HybridForest)
+    X = load_iris().data
+    np.testing.assert_array_equal(
+        engine.predict(X), joblib.load("models/iris_model.pkl").predict(X)
+    )
+
+
+def test_small_batches_do_not_import_sklearn(forest, tmp_path):
+    """Test that serving small batches from a flat artifact leaves sklearn unloaded"""
+    clf, _ = forest
+    joblib.dump(clf, tmp_path / "model.pkl")
+    FlatForest.from_sklearn(clf).save(
+        tmp_path / "flat", source_model=str(tmp_path / "model.pkl")
+    )
+    code = (
+        "import sys; from src.forest_engine import load_flat_engine; "
+        f"engine = load_flat_engine({str(tmp_path / 'flat')!r}); "
+        "engine.predict([[5.1, 3.5, 1.4, 0.2]]); "
+        "print('sklearn' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
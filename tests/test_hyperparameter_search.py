@@ -0,0 +1,49 @@
+"""
+Tests for the parallel hyperparameter search
+"""
+
+import numpy as np
+from sklearn.datasets import load_iris
+
+from src.hyperparameter_search import (
+    SharedArrays,
+    attach_shared,
+    candidate_params,
+    search_hyperparameters,
+)
+
+GRID = {"n_estimators": [5, 20], "max_depth": [1, None]}
+
+
+def test_candidate_params_grid_and_random():
+    """Test full grid enumeration and random sampling"""
+    assert len(candidate_params(GRID)) == 4
+    sampled = candidate_params(GRID, n_trials=3)
+    assert len(sampled) == 3
+    assert all(params in candidate_params(GRID) for params in sampled)
+
+
+def test_shared_arrays_round_trip():
+    """Test that workers see the same data through shared memory"""
+    X = np.arange(12, dtype=np.float64).reshape(4, 3)
+    shared = SharedArrays(X=X)
+    try:
+        arrays, blocks = attach_shared(shared.specs)
+        np.testing.assert_array_equal(arrays["X"], X)
+        for block in blocks:
+            block.close()
+    finally:
+        shared.close()
+
+
+def test_search_parallel_matches_serial():
+    """Test that the process pool gives the same ranking as a serial run"""
+    X, y = load_iris(return_X_y=True)
+    serial = search_hyperparameters(X, y, GRID, cv=3, workers=1)
+    parallel = search_hyperparameters(X, y, GRID, cv=3, workers=2)
+
+    assert len(serial) == 4
+    assert [t["params"] for t in serial] == [t["params"] for t in parallel]
+    assert serial[0]["cv_accuracy"] == parallel[0]["cv_accuracy"]
+    scores = [t["cv_accuracy"] for t in serial]
+    assert scores == sorted(scores, reverse=True)
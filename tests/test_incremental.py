@@ -0,0 +1,101 @@
+"""
+Tests for incremental retraining on new data slices
+"""
+
+import joblib
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+from src.drift_sketch import build_reference_sketch, save_sketch
+from src.incremental import (
+    decide_update,
+    incremental_update,
+    load_manifest,
+    slice_drift,
+    start_manifest,
+)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    X, y = load_iris(return_X_y=True, as_frame=True)
+    df = X.assign(target=y).sample(frac=1, random_state=0).reset_index(drop=True)
+    base_path = tmp_path / "base.csv"
+    df.iloc[:100].to_csv(base_path, index=False)
+
+    model = RandomForestClassifier(n_estimators=10, random_state=42)
+    model.fit(df.iloc[:100].drop(columns="target"), df.iloc[:100]["target"])
+    model_path = tmp_path / "model.pkl"
+    joblib.dump(model, model_path)
+    manifest_path = tmp_path / "slices.json"
+    start_manifest(model, str(base_path), 100, path=str(manifest_path))
+    sketch_path = tmp_path / "sketch.json"
+    save_sketch(build_reference_sketch(df.iloc[:100]), sketch_path)
+    return {
+        "df": df,
+        "tmp": tmp_path,
+        "paths": {
+            "model_path": str(model_path),
+            "manifest_path": str(manifest_path),
+            "sketch_path": str(sketch_path),
+            "flat_model_path": None,
+        },
+    }
+
+
+def test_slice_grows_forest_and_is_recorded(workspace):
+    """Test that a clean slice adds trees and is recorded once"""
+    slice_path = workspace["tmp"] / "slice.csv"
+    workspace["df"].iloc[:100].sample(60, random_state=1).to_csv(slice_path, index=False)
+
+    model, summary = incremental_update(
+        str(slice_path), n_new_trees=5, accuracy_threshold=0.5, **workspace["paths"]
+    )
+    assert summary["mode"] == "grow"
+    assert len(model.estimators_) == 15
+    manifest = load_manifest(workspace["paths"]["manifest_path"])
+    assert [entry["mode"] for entry in manifest["slices"]] == ["full", "grow"]
+    assert manifest["version"] == 2
+
+    _, again = incremental_update(str(slice_path), **workspace["paths"])
+    assert again["mode"] == "skip"
+
+
+def test_drifted_slice_triggers_retrain(workspace):
+    """Test that a slice past the drift threshold retrains on all slices"""
+    shifted = workspace["df"].iloc[100:].copy()
+    shifted["petal length (cm)"] += 3
+    slice_path = workspace["tmp"] / "shifted.csv"
+    shifted.to_csv(slice_path, index=False)
+
+    model, summary = incremental_update(
+        str(slice_path), accuracy_threshold=0.0, **workspace["paths"]
+    )
+    assert summary["mode"] == "retrain"
+    assert len(model.estimators_) == 10
+    entry = load_manifest(workspace["paths"]["manifest_path"])["slices"][-1]
+    assert entry["retrain_rows"] == 150
+    assert "drift" in entry["retrain_reason"]
+
+
+def test_missing_class_prevents_growing(workspace):
+    """Test that a slice without every class is not warm-started into the forest"""
+    df = workspace["df"]
+    model = joblib.load(workspace["paths"]["model_path"])
+    subset = df[df["target"] != 2].iloc[:20]
+    mode, reason, _ = decide_update(
+        model, subset.drop(columns="target"), subset["target"], accuracy_threshold=0.0
+    )
+    assert mode == "retrain"
+    assert "classes" in reason
+
+
+def test_slice_drift_ignores_sample_size(workspace):
+    """Test that small clean slices score low PSI and tiny ones are skipped"""
+    df = workspace["df"].iloc[:100].drop(columns="target")
+    sketch = build_reference_sketch(workspace["df"].iloc[:100])
+    for rows in (50, 100, 400):
+        sample = df.sample(rows, replace=True, random_state=rows)
+        assert slice_drift(sketch, sample) < 0.2
+    assert slice_drift(sketch, df.iloc[:10]) is None
@@ -0,0 +1,44 @@
+"""
+Tests for the bounded inference executor
+"""
+
+import asyncio
+
+import joblib
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+from src import inference_executor
+from src.forest_engine import FlatForest, HybridForest
+from src.inference_executor import InferenceExecutor, Overloaded
+
+
+@pytest.mark.parametrize("backend", ["thread", "inline"])
+def test_executor_rejects_work_after_shutdown(backend):
+    """Test that a shut down executor sheds calls instead of running them inline"""
+    executor = InferenceExecutor(backend=backend, max_workers=1)
+    executor.start(lambda features: [len(features)])
+
+    async def run():
+        assert await executor.run([[1.0], [2.0]]) == [2]
+        executor.shutdown(cancel_pending=False)
+        with pytest.raises(Overloaded):
+            await executor.run([[1.0]])
+
+    asyncio.run(run())
+
+
+def test_process_workers_apply_the_flat_row_limit(monkeypatch, tmp_path):
+    """Test that process workers route flat forests with the configured row limit"""
+    X, y = load_iris(return_X_y=True)
+    clf = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    joblib.dump(clf, tmp_path / "model.pkl")
+    FlatForest.from_sklearn(clf).save(
+        tmp_path / "flat", source_model=str(tmp_path / "model.pkl")
+    )
+    monkeypatch.setattr(inference_executor, "_worker_model", None)
+
+    inference_executor._init_process_worker("flat", str(tmp_path / "flat"), None, 8)
+    assert isinstance(inference_executor._worker_model, HybridForest)
+    assert inference_executor._worker_model.max_rows == 8
@@ -0,0 +1,60 @@
+"""
+Tests for request input validation
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.input_validation import (
+    FeatureValidator,
+    InvalidInput,
+    load_training_ranges,
+    training_ranges,
+)
+
+
+def test_batches_are_checked_in_one_pass():
+    """Test feature count, finiteness and range checks on whole batches"""
+    validator = FeatureValidator(2, low=[0.0, 0.0], high=[10.0, 1.0], margin=0.1)
+    X = np.array([[5.0, 0.5], [10.5, 0.5], [5.0, -0.2]])
+    np.testing.assert_array_equal(validator.check(X), [False, False, True])
+
+    with pytest.raises(InvalidInput, match="Expected 2 features"):
+        validator.check(np.ones((3, 3)))
+    with pytest.raises(InvalidInput, match=r"rows \[1\]"):
+        validator.check(np.array([[1.0, 0.5], [np.inf, 0.5]]))
+    with pytest.raises(InvalidInput):
+        validator.check(np.empty((0, 2)))
+
+    strict = FeatureValidator(2, low=[0.0, 0.0], high=[10.0, 1.0], reject_out_of_range=True)
+    with pytest.raises(InvalidInput, match="training range"):
+        strict.check(X)
+
+
+def test_ranges_without_matching_width_are_ignored():
+    """Test that only the feature count is checked when ranges do not fit"""
+    validator = FeatureValidator(4, low=[0.0], high=[1.0])
+    assert validator.low is None
+    assert not validator.check(np.full((2, 4), 100.0)).any()
+
+
+def test_ranges_from_stats_or_sketch(tmp_path):
+    """Test reading ranges from cleaning stats, skipping the target"""
+    stats = {
+        "columns": {
+            "a": {"min": 1.0, "max": 2.0, "mean": 1.5},
+            "b": {"min": 0.0, "max": 5.0, "mean": 2.0},
+            "target": {"min": 0, "max": 2, "mean": 1},
+        }
+    }
+    low, high = training_ranges(stats)
+    np.testing.assert_array_equal(low, [1.0, 0.0])
+    np.testing.assert_array_equal(high, [2.0, 5.0])
+
+    path = tmp_path / "stats.json"
+    path.write_text(json.dumps(stats))
+    ranges, source = load_training_ranges([str(tmp_path / "missing.json"), str(path)])
+    assert source == str(path) and len(ranges[0]) == 2
+    assert load_training_ranges([str(tmp_path / "missing.json")]) == (None, None)
@@ -0,0 +1,54 @@
+"""
+Tests for the API load test harness
+"""
+
+import asyncio
+
+import httpx
+
+from scripts.load_test import (
+    Recorder,
+    closed_loop,
+    compare,
+    fixed_rate,
+    make_payloads,
+    summarize,
+)
+
+
+def test_summary_and_baseline_comparison():
+    """Test percentiles, error rate and the regression gate"""
+    recorder = Recorder()
+    for i in range(100):
+        recorder.record((i + 1) / 1000, 200 if i < 98 else 503)
+    summary = summarize(recorder, elapsed=2.0)
+    assert summary["requests"] == 100
+    assert summary["throughput_rps"] == 50.0
+    assert summary["error_rate"] == 0.02
+    assert summary["statuses"] == {"200": 98, "503": 2}
+    assert summary["p50_ms"] < summary["p95_ms"] < summary["p99_ms"] <= 100
+
+    assert compare(summary, summary) == []
+    slower = {**summary, "p99_ms": summary["p99_ms"] * 1.5, "throughput_rps": 40.0}
+    regressions = compare(slower, summary, max_regression=0.1)
+    assert [r.split()[0] for r in regressions] == ["p99_ms", "throughput_rps"]
+
+
+def test_closed_and_fixed_rate_load():
+    """Test both load models against an in-memory transport"""
+
+    def handler(request):
+        return httpx.Response(200, json={"prediction": 0})
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            payloads = make_payloads(10)
+            closed, _ = await closed_loop(client, "/predict", payloads, 4, 0.1)
+            fixed, elapsed = await fixed_rate(client, "/predict", payloads, 100, 0.2)
+        return closed, fixed, elapsed
+
+    closed, fixed, elapsed = asyncio.run(run())
+    assert len(closed.latencies) > 4 and closed.errors == 0
+    assert len(fixed.latencies) == 20 and elapsed >= 0.19
+    assert make_payloads(2, batch_size=3)[0]["instances"][2][3] <= 2.5
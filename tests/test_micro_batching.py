@@ -0,0 +1,44 @@
+"""
+Tests for coalescing single-row predictions into batches
+"""
+
+import asyncio
+
+import pytest
+
+from src.inference_executor import Overloaded
+from src.micro_batching import MicroBatcher
+
+
+def test_stop_finishes_running_batches_and_fails_waiting_rows():
+    """Test that stop drains in-flight batches and fails rows still waiting"""
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def predict(X):
+        started.set()
+        await release.wait()
+        return [0] * len(X)
+
+    batcher = MicroBatcher(predict, max_batch_size=2, max_wait_ms=10_000)
+
+    async def run():
+        await batcher.start()
+        running = [asyncio.create_task(batcher.submit([float(i)])) for i in range(2)]
+        await started.wait()
+        # Taken by the collector, which then waits for a second row
+        waiting = asyncio.create_task(batcher.submit([2.0]))
+        await asyncio.sleep(0.01)
+
+        stopping = asyncio.create_task(batcher.stop())
+        await asyncio.sleep(0.01)
+        assert not stopping.done()
+        release.set()
+        await stopping
+
+        assert await asyncio.gather(*running) == [0, 0]
+        with pytest.raises(Overloaded):
+            await waiting
+        with pytest.raises(Overloaded):
+            await batcher.submit([3.0])
+
+    asyncio.run(run())
@@ -0,0 +1,176 @@
+"""
+Tests for on-demand multi-model loading
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from src import model_registry
+from src.model_registry import (
+    ModelRegistry,
+    estimate_model_bytes,
+    parse_aliases,
+    parse_target,
+    resolve_source,
+)
+
+
+class FakeModel:
+    def __init__(self, nbytes):
+        self.weights = np.zeros(nbytes, dtype=np.uint8)
+
+
+class PickleProbe:
+    """Records the thread it is pickled on"""
+
+    threads = []
+
+    def __reduce__(self):
+        PickleProbe.threads.append(threading.current_thread())
+        return PickleProbe, ()
+
+
+def test_request_targets_resolve_to_sources():
+    """Test aliases, registered names, versions and stages"""
+    aliases = parse_aliases("candidate=joblib:models/candidate.pkl, flat=flat:models/flat")
+    assert aliases["candidate"] == ("joblib", "models/candidate.pkl")
+    assert resolve_source("candidate", aliases=aliases) == aliases["candidate"]
+    assert resolve_source() == ("mlflow", "models:/IrisRandomForest/latest")
+    assert resolve_source(version="3") == ("mlflow", "models:/IrisRandomForest/3")
+    assert resolve_source("Other", stage="Production") == (
+        "mlflow",
+        "models:/Other/Production",
+    )
+    with pytest.raises(ValueError):
+        resolve_source(version="3", stage="Production")
+    with pytest.raises(ValueError):
+        parse_aliases("broken")
+
+    assert parse_target("flat", aliases) == ("flat", "models/flat")
+    assert parse_target("mlflow:models:/IrisRandomForest/2") == (
+        "mlflow",
+        "models:/IrisRandomForest/2",
+    )
+    assert parse_target("IrisRandomForest/Staging") == (
+        "mlflow",
+        "models:/IrisRandomForest/Staging",
+    )
+
+
+def test_models_load_once_and_unload_least_recently_used():
+    """Test lazy loading, load deduplication and the memory budget"""
+    calls, released = [], []
+
+    def loader(kind, uri, mmap_mode=None):
+        calls.append(uri)
+        return FakeModel(400)
+
+    registry = ModelRegistry(
+        max_bytes=1000, loader=loader, release=lambda entry: released.append(entry.source)
+    )
+    a, b, c = ("joblib", "a"), ("joblib", "b"), ("joblib", "c")
+
+    async def run():
+        first = await asyncio.gather(registry.get(a), registry.get(a))
+        assert first[0] is first[1]
+        registry.done(first[0])
+        registry.done(first[1])
+        held = await registry.get(b)
+        registry.done(await registry.get(a))
+        registry.done(await registry.get(c))
+        # b was unloaded while a request still held it
+        assert b not in registry and released == []
+        registry.done(held)
+
+    asyncio.run(run())
+    assert calls == ["a", "b", "c"]
+    assert released == [b]
+    assert a in registry and c in registry and b not in registry
+    assert registry.stats()["bytes"] == 800
+    assert registry.stats()["evictions"] == 1
+
+
+def test_failed_loads_are_not_retried_immediately():
+    """Test that a missing model fails fast on repeated requests"""
+    calls = []
+
+    def loader(kind, uri, mmap_mode=None):
+        calls.append(uri)
+        raise FileNotFoundError(uri)
+
+    registry = ModelRegistry(loader=loader, retry_after=60)
+
+    async def run():
+        for _ in range(3):
+            with pytest.raises(LookupError):
+                await registry.get(("joblib", "missing.pkl"))
+
+    asyncio.run(run())
+    assert calls == ["missing.pkl"]
+
+
+def test_model_size_estimate():
+    """Test array-backed and pickled size estimates"""
+    assert estimate_model_bytes(FakeModel(1234)) == 1234
+    assert estimate_model_bytes({"a": list(range(100))}) > 100
+
+
+def test_models_are_sized_off_the_event_loop():
+    """Test that the pickle-based size estimate runs on a worker thread"""
+    registry = ModelRegistry(loader=lambda kind, uri, mmap_mode=None: PickleProbe())
+    asyncio.run(registry.get(("joblib", "probe")))
+    assert PickleProbe.threads
+    assert threading.main_thread() not in PickleProbe.threads
+
+
+def test_waiters_do_not_receive_an_unloaded_model():
+    """Test that a model unloaded before a waiting request resumes is reloaded"""
+    calls, released = [], []
+
+    def loader(kind, uri, mmap_mode=None):
+        calls.append(uri)
+        return FakeModel(10)
+
+    registry = ModelRegistry(loader=loader, release=lambda entry: released.append(entry))
+    a = ("joblib", "a")
+
+    async def loading():
+        entry = await registry.get(a)
+        registry.done(entry)
+        # Runs before the waiting request gets to resume
+        registry.unload(a)
+        return entry
+
+    async def run():
+        return await asyncio.gather(loading(), registry.get(a))
+
+    first, waiting = asyncio.run(run())
+    assert calls == ["a", "a"]
+    assert released == [first]
+    assert waiting is not first and not waiting.retired
+    assert a in registry and waiting.holds == 1
+
+
+def test_remembered_failures_are_bounded(monkeypatch):
+    """Test that failed loads are forgotten once expired or over the cap"""
+    monkeypatch.setattr(model_registry, "MAX_REMEMBERED_FAILURES", 2)
+
+    def loader(kind, uri, mmap_mode=None):
+        raise FileNotFoundError(uri)
+
+    registry = ModelRegistry(loader=loader, retry_after=60)
+
+    async def fail(*uris):
+        for uri in uris:
+            with pytest.raises(LookupError):
+                await registry.get(("joblib", uri))
+
+    asyncio.run(fail("a", "b", "c"))
+    assert list(registry._failures) == [("joblib", "b"), ("joblib", "c")]
+
+    registry.retry_after = 0
+    asyncio.run(fail("d"))
+    assert not registry._failures
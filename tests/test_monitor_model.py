@@ -0,0 +1,97 @@
+"""
+Tests for the prediction log monitor
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.monitor_model import PredictionMonitor, monitor
+from src.drift_sketch import build_reference_sketch, save_sketch
+
+
+@pytest.fixture
+def sketch():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(3000, 2)), columns=["a", "b"])
+    return build_reference_sketch(df.assign(target=rng.integers(0, 3, 3000)))
+
+
+def make_lines(X, predictions, start_ts=0.0, latency_ms=1.0):
+    return [
+        json.dumps(
+            {
+                "ts": start_ts + i * 0.001,
+                "features": row.tolist(),
+                "prediction": int(prediction),
+                "latency_ms": latency_ms,
+                "model_version": "v1",
+            }
+        )
+        + "\n"
+        for i, (row, prediction) in enumerate(zip(X, predictions))
+    ]
+
+
+def test_reference_traffic_raises_no_alerts(sketch):
+    """Test that traffic matching the baseline produces a clean window report"""
+    rng = np.random.default_rng(1)
+    monitor_ = PredictionMonitor(sketch, window_seconds=60)
+    lines = make_lines(rng.normal(size=(1000, 2)), rng.integers(0, 3, 1000))
+    assert monitor_.process(lines) == []
+
+    report = monitor_.close_window()
+    assert report["rows"] == 1000
+    assert set(report["classes"]) == {"0", "1", "2"}
+    assert report["latency_ms"]["p95"] == pytest.approx(1.0)
+    assert report["model_versions"] == ["v1"]
+    assert report["alerts"] == []
+
+
+def test_drift_skew_and_latency_alerts(sketch):
+    """Test that shifted features, a skewed class mix and slow requests alert"""
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(1000, 2))
+    X[:, 0] += 2
+    monitor_ = PredictionMonitor(sketch, window_seconds=60, latency_p95_ms=50)
+    monitor_.process(make_lines(X, np.zeros(1000), latency_ms=80.0))
+
+    alerts = {alert["type"] for alert in monitor_.close_window()["alerts"]}
+    assert {"feature_drift", "class_distribution", "latency"} <= alerts
+
+
+def test_windows_close_on_time_boundaries(sketch):
+    """Test that records past the window end close the previous window"""
+    rng = np.random.default_rng(3)
+    monitor_ = PredictionMonitor(sketch, window_seconds=10)
+    first = make_lines(rng.normal(size=(100, 2)), np.zeros(100), start_ts=0.0)
+    second = make_lines(rng.normal(size=(50, 2)), np.zeros(50), start_ts=10.0)
+
+    reports = monitor_.process(first + second + ["not json\n"])
+    assert [report["rows"] for report in reports] == [100]
+    assert monitor_.tick(now=25.0)[0]["rows"] == 50
+
+
+def test_monitor_once_writes_metrics_and_alerts(tmp_path, sketch):
+    """Test the file-based run over an existing log"""
+    sketch_path = tmp_path / "sketch.json"
+    save_sketch(sketch, sketch_path)
+    log_path = tmp_path / "predictions.jsonl"
+    rng = np.random.default_rng(4)
+    log_path.write_text(
+        "".join(make_lines(rng.normal(size=(200, 2)) + 3, np.zeros(200)))
+    )
+
+    reports = monitor(
+        str(log_path),
+        sketch_path=str(sketch_path),
+        output_dir=str(tmp_path / "out"),
+        once=True,
+        from_start=True,
+    )
+    assert len(reports) == 1
+    metrics = json.loads((tmp_path / "out" / "metrics.json").read_text())
+    assert metrics["rows"] == 200
+    assert (tmp_path / "out" / "alerts.jsonl").read_text().strip()
@@ -51,3 +51,31 @@ def test_basic_math():
     """Simple test to ensure pytest works"""
     assert 1 + 1 == 2
     assert "hello" == "hello"
+
+
+def test_incremental_slices_with_reused_names_are_kept(monkeypatch, tmp_path):
+    """Test that a new raw file reusing an old name gets its own stored slice"""
+    import mlflow
+
+    import src.pipeline as pipeline
+
+    raw = pd.read_csv("data/raw/iris.csv")
+    monkeypatch.chdir(tmp_path)
+    previous_uri = mlflow.get_tracking_uri()
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    stored = []
+    monkeypatch.setattr(
+        pipeline,
+        "incremental_update",
+        lambda path, **kwargs: (stored.append(path), (None, {"mode": "grow"}))[1],
+    )
+    monkeypatch.setattr(pipeline, "NEW_DATA_PATH", "batch.csv")
+    try:
+        for part in (raw.iloc[:75], raw.iloc[75:]):
+            part.to_csv("batch.csv", index=False)
+            pipeline.run_incremental_pipeline()
+    finally:
+        mlflow.set_tracking_uri(previous_uri)
+
+    assert len(set(stored)) == 2
+    assert all(os.path.exists(path) for path in stored)
@@ -0,0 +1,58 @@
+"""
+Tests for the prediction cache
+"""
+
+from src.prediction_cache import PredictionCache
+
+
+def test_cache_hit_and_miss():
+    """Test that repeated features are served from the cache"""
+    cache = PredictionCache(maxsize=10)
+    cache.set_model_version("v1")
+    key = cache.key([5.1, 3.5, 1.4, 0.2])
+
+    assert cache.get(key) is None
+    cache.put(key, 0)
+    assert cache.get(cache.key([5.1, 3.5, 1.4, 0.2])) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that the cache stays within maxsize by evicting the LRU entry"""
+    cache = PredictionCache(maxsize=2)
+    first, second, third = (cache.key([float(i)] * 4) for i in range(3))
+    cache.put(first, 0)
+    cache.put(second, 1)
+    cache.get(first)
+    cache.put(third, 2)
+
+    assert len(cache) == 2
+    assert cache.get(second) is None
+    assert cache.get(first) == 0
+    assert cache.evictions == 1
+
+
+def test_cache_expires_entries_after_ttl(monkeypatch):
+    """Test that entries older than the TTL are treated as misses"""
+    now = [100.0]
+    monkeypatch.setattr("src.prediction_cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(ttl=5)
+    key = cache.key([1.0, 2.0, 3.0, 4.0])
+    cache.put(key, 1)
+
+    now[0] += 10
+    assert cache.get(key) is None
+
+
+def test_cache_invalidated_on_model_change():
+    """Test that a new model version drops cached predictions"""
+    cache = PredictionCache()
+    cache.set_model_version("v1")
+    stale_key = cache.key([1.0, 2.0, 3.0, 4.0])
+    cache.put(stale_key, 1)
+
+    cache.set_model_version("v2")
+    assert len(cache) == 0
+    assert cache.get(cache.key([1.0, 2.0, 3.0, 4.0])) is None
+    cache.put(stale_key, 1)
+    assert len(cache) == 0
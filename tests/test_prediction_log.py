@@ -0,0 +1,124 @@
+"""
+Tests for the background prediction logger
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from src.prediction_log import PredictionLogger
+
+
+def test_logger_drops_rows_beyond_buffer(tmp_path):
+    """Test that a full buffer drops and counts rows instead of blocking"""
+    logger = PredictionLogger(str(tmp_path / "log.jsonl"), max_buffer_rows=3)
+    assert logger.log([[1.0], [2.0]], [0, 1], 1.0, "v1")
+    assert not logger.log([[3.0], [4.0]], [0, 1], 1.0, "v1")
+
+    asyncio.run(logger.flush())
+    assert logger.stats() == {
+        "written": 2,
+        "dropped": 2,
+        "buffered": 0,
+        "rotations": 0,
+    }
+
+
+def test_logger_skips_unserializable_records(tmp_path):
+    """Test that one unserializable row is dropped without losing the batch"""
+    path = tmp_path / "log.jsonl"
+    logger = PredictionLogger(str(path))
+    logger.log([[1.0], [object()], [3.0]], [0, 1, 2], 1.0, "v1")
+
+    asyncio.run(logger.flush())
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["prediction"] for record in records] == [0, 2]
+    assert logger.stats()["written"] == 2
+    assert logger.stats()["dropped"] == 1
+
+
+def test_logger_rotates_jsonl(tmp_path):
+    """Test that the log is rotated once it exceeds max_bytes"""
+    path = tmp_path / "log.jsonl"
+    logger = PredictionLogger(str(path), max_bytes=200, backup_count=2)
+
+    async def run():
+        await logger.start()
+        for _ in range(3):
+            logger.log([[5.1, 3.5, 1.4, 0.2]] * 3, [0, 0, 0], 2.0, "v1")
+            await logger.flush()
+        await logger.stop()
+
+    asyncio.run(run())
+    assert logger.rotations == 3
+    assert not path.with_name("log.jsonl.3").exists()
+    backups = [path.with_name("log.jsonl.1"), path.with_name("log.jsonl.2")]
+    records = [json.loads(line) for line in backups[0].read_text().splitlines()]
+    assert records[0]["features"] == [5.1, 3.5, 1.4, 0.2]
+    assert all(backup.exists() for backup in backups)
+
+
+def test_logger_writes_parquet_parts(tmp_path):
+    """Test that a .parquet path collects one part file per flush"""
+    path = tmp_path / "log.parquet"
+    logger = PredictionLogger(str(path))
+
+    async def run():
+        await logger.start()
+        logger.log([[1.0, 2.0], [3.0, 4.0]], [0, 1], 1.5, "v1")
+        await logger.stop()
+
+    asyncio.run(run())
+    df = pd.read_parquet(path)
+    assert df["prediction"].tolist() == [0, 1]
+    assert df["model_version"].unique().tolist() == ["v1"]
+
+
+def test_logger_import_does_not_load_pandas():
+    """Test that importing the logger leaves pandas and pyarrow unloaded"""
+    code = (
+        "import sys, src.prediction_log; "
+        "print(any(m in sys.modules for m in ('pandas', 'pyarrow')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_stop_waits_for_an_in_progress_write(tmp_path):
+    """Test that stopping mid-write neither interrupts nor overlaps the write"""
+    path = tmp_path / "log.jsonl"
+
+    class SlowLogger(PredictionLogger):
+        writing = 0
+        overlapped = False
+
+        def _write(self, entries):
+            SlowLogger.writing += 1
+            SlowLogger.overlapped |= SlowLogger.writing > 1
+            time.sleep(0.2)
+            try:
+                return super()._write(entries)
+            finally:
+                SlowLogger.writing -= 1
+
+    logger = SlowLogger(str(path), flush_rows=1)
+
+    async def run():
+        await logger.start()
+        logger.log([[1.0]], [0], 1.0, "v1")
+        # Let the flush task pick the row up, then log more mid-write
+        await asyncio.sleep(0.05)
+        logger.log([[2.0]], [1], 1.0, "v1")
+        await logger.stop()
+
+    asyncio.run(run())
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["prediction"] for record in records] == [0, 1]
+    assert not SlowLogger.overlapped
+    assert logger.stats()["written"] == 2
@@ -0,0 +1,107 @@
+"""
+Tests for the model promotion engine
+"""
+
+import joblib
+import mlflow
+import pytest
+from mlflow.tracking import MlflowClient
+from sklearn.datasets import load_iris
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import RandomForestClassifier
+
+from src.promotion import (
+    check_thresholds,
+    compare_to_production,
+    evaluate_candidates,
+    latest_run_metrics,
+)
+
+
+@pytest.fixture
+def client(tmp_path):
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    yield MlflowClient()
+    mlflow.set_tracking_uri("")
+
+
+def test_latest_run_metrics_uses_newest_finished_pipeline_run(client):
+    """Test that only the newest finished full_pipeline run is read"""
+    for name, accuracy in [("full_pipeline", 0.8), ("model_promotion", 0.1)]:
+        with mlflow.start_run(run_name=name):
+            mlflow.log_metric("accuracy", accuracy)
+    with mlflow.start_run(run_name="full_pipeline"):
+        mlflow.log_metric("accuracy", 0.9)
+    failed = mlflow.start_run(run_name="full_pipeline")
+    mlflow.log_metric("accuracy", 0.5)
+    mlflow.end_run(status="FAILED")
+
+    assert latest_run_metrics(client, [failed.info.experiment_id]) == {"accuracy": 0.9}
+
+
+def test_thresholds_and_production_comparison():
+    """Test the promotion rules"""
+    candidate = {"accuracy": 0.9, "precision": 0.95, "recall": 0.7}
+    assert check_thresholds(candidate, {"accuracy": 0.85, "recall": 0.8}) == ["recall"]
+    assert compare_to_production(candidate, {}) == []
+    assert compare_to_production(candidate, {"accuracy": 0.92}) == ["accuracy"]
+    assert compare_to_production(candidate, {"accuracy": 0.88}, 0.05) == ["accuracy"]
+    assert compare_to_production(candidate, {"precision": 0.9}) == []
+
+
+def test_candidates_are_scored_on_the_same_held_out_set(tmp_path):
+    """Test parallel held-out evaluation, tolerating models that fail to load"""
+    X, y = load_iris(return_X_y=True)
+    good = tmp_path / "good.pkl"
+    weak = tmp_path / "weak.pkl"
+    joblib.dump(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y), good)
+    joblib.dump(DummyClassifier().fit(X, y), weak)
+
+    results = evaluate_candidates([str(good), str(weak), str(tmp_path / "gone.pkl")], X, y)
+    assert results[str(good)]["accuracy"] > results[str(weak)]["accuracy"]
+    assert results[str(tmp_path / "gone.pkl")] is None
+
+
+def test_promote_model_only_writes_to_registry_with_apply(monkeypatch):
+    """Test that promotion is report-only unless apply is set"""
+    from types import SimpleNamespace
+
+    from scripts import promote_model as script
+
+    transitions = []
+    scores = {"accuracy": 0.97, "precision": 0.97, "recall": 0.97}
+    fake_client = SimpleNamespace(
+        transition_model_version_stage=lambda **kwargs: transitions.append(kwargs)
+    )
+    monkeypatch.setattr(script, "setup_mlflow_tracking", lambda: True)
+    monkeypatch.setattr(script, "MlflowClient", lambda: fake_client)
+    monkeypatch.setattr(script, "get_latest_experiment_metrics", lambda client: scores)
+    candidate = SimpleNamespace(version="3")
+    monkeypatch.setattr(
+        script,
+        "registered_version",
+        lambda client, stages: None if stages == ["Production"] else candidate,
+    )
+    monkeypatch.setattr(script, "held_out_scores", lambda *args: (scores, None))
+    monkeypatch.setattr(script, "log_decision", lambda *args: None)
+
+    assert script.promote_model()
+    assert transitions == []
+    assert script.promote_model(apply=True)
+    assert [t["version"] for t in transitions] == ["3"]
+
+
+def test_promote_model_default_data_follows_processed_format(monkeypatch):
+    """Test that the default held-out dataset uses PROCESSED_FORMAT"""
+    import importlib
+
+    from scripts import promote_model as script
+
+    monkeypatch.setenv("PROCESSED_FORMAT", "parquet")
+    try:
+        importlib.reload(script)
+        assert script.DEFAULT_DATA_PATH == "data/processed/iris_clean.parquet"
+    finally:
+        monkeypatch.delenv("PROCESSED_FORMAT")
+        importlib.reload(script)
+    assert script.DEFAULT_DATA_PATH == "data/processed/iris_clean.csv"
@@ -0,0 +1,76 @@
+"""
+Tests for the binary request body decoders
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from src.request_codecs import (
+    DecodeError,
+    decode_float32,
+    decode_msgpack,
+    decode_npy,
+    media_type,
+)
+
+
+def test_float32_bodies_are_viewed_in_place():
+    """Test that raw float32 rows are decoded without copying"""
+    rows = np.arange(8, dtype="<f4").reshape(2, 4)
+    body = rows.tobytes()
+    X = decode_float32(body, 4)
+    assert X.shape == (2, 4) and not X.flags.owndata
+    np.testing.assert_array_equal(X, rows)
+    with pytest.raises(DecodeError):
+        decode_float32(body[:-4], 4)
+    with pytest.raises(DecodeError):
+        decode_float32(body, None)
+
+
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_npy_bodies_keep_shape_and_dtype(order):
+    """Test .npy decoding for both memory layouts and single rows"""
+    rows = np.asarray(np.arange(12, dtype=np.float64).reshape(3, 4), order=order)
+    buffer = io.BytesIO()
+    np.save(buffer, rows)
+    X = decode_npy(buffer.getvalue())
+    assert not X.flags.owndata
+    np.testing.assert_array_equal(X, rows)
+
+    buffer = io.BytesIO()
+    np.save(buffer, rows[0])
+    assert decode_npy(buffer.getvalue()).shape == (1, 4)
+    with pytest.raises(DecodeError):
+        decode_npy(buffer.getvalue()[:-8])
+    with pytest.raises(DecodeError):
+        decode_npy(b"not numpy")
+
+
+@pytest.mark.parametrize("version", [(1, 0), (2, 0), (3, 0)])
+def test_npy_format_versions(version):
+    """Test that every .npy format version decodes and unknown ones are rejected"""
+    rows = np.arange(8, dtype=np.float32).reshape(2, 4)
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, rows, version=version)
+    np.testing.assert_array_equal(decode_npy(buffer.getvalue()), rows)
+
+    body = bytearray(buffer.getvalue())
+    body[6] = 9
+    with pytest.raises(DecodeError, match="version 9.0"):
+        decode_npy(bytes(body))
+
+
+def test_msgpack_bodies():
+    """Test MessagePack maps of features or instances"""
+    msgpack = pytest.importorskip("msgpack")
+    body = msgpack.packb({"instances": [[5.1, 3.5, 1.4, 0.2], [7.3, 2.9, 6.3, 1.8]]})
+    assert decode_msgpack(body).shape == (2, 4)
+    assert decode_msgpack(msgpack.packb({"features": [1.0, 2.0]})).shape == (1, 2)
+
+
+def test_media_type_defaults_to_json():
+    """Test content type normalization"""
+    assert media_type(None) == "application/json"
+    assert media_type("Application/X-NPY; charset=binary") == "application/x-npy"
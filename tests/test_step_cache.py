@@ -0,0 +1,96 @@
+"""
+Tests for the content-addressed pipeline step cache
+"""
+
+from src.step_cache import StepCache
+
+
+def test_unchanged_step_is_restored(tmp_path):
+    """Test that a rerun with the same inputs skips the step and restores outputs"""
+    cache = StepCache(str(tmp_path / "cache"))
+    source = tmp_path / "in.txt"
+    source.write_text("raw")
+    output = tmp_path / "out.txt"
+    calls = []
+
+    def step():
+        calls.append(1)
+        output.write_text(source.read_text().upper())
+        return {"rows": 1}
+
+    kwargs = {"inputs": [str(source)], "outputs": [str(output)], "params": {"a": 1}}
+    assert cache.run("clean", step, **kwargs) == ({"rows": 1}, False)
+    output.unlink()
+    assert cache.run("clean", step, **kwargs) == ({"rows": 1}, True)
+    assert output.read_text() == "RAW"
+    assert len(calls) == 1
+
+    source.write_text("changed")
+    assert cache.run("clean", step, **kwargs)[1] is False
+    assert cache.run("clean", step, **{**kwargs, "params": {"a": 2}})[1] is False
+    assert len(calls) == 3
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Test that the cache stays under its size limit"""
+    cache = StepCache(str(tmp_path / "cache"), max_bytes=250)
+    output = tmp_path / "out.bin"
+
+    def step():
+        output.write_bytes(b"x" * 100)
+
+    for i in range(3):
+        cache.run("step", step, outputs=[str(output)], params={"i": i})
+    assert len(cache.entries()) == 2
+    assert cache.run("step", step, outputs=[str(output)], params={"i": 0})[1] is False
+
+
+def test_directory_outputs_are_swapped_into_place(tmp_path):
+    """Test that restoring a directory replaces it whole, leaving open files intact"""
+    cache = StepCache(str(tmp_path / "cache"))
+    output = tmp_path / "model"
+
+    def step():
+        output.mkdir(exist_ok=True)
+        (output / "weights.npy").write_text("cached")
+
+    cache.run("train", step, outputs=[str(output)])
+    (output / "weights.npy").write_text("newer")
+    (output / "extra.npy").write_text("stale")
+    with open(output / "weights.npy") as reader:
+        assert cache.run("train", step, outputs=[str(output)])[1] is True
+        assert reader.read() == "newer"
+
+    assert (output / "weights.npy").read_text() == "cached"
+    assert not (output / "extra.npy").exists()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cache", "model"]
+
+
+def test_restore_and_evict_do_not_interleave(tmp_path):
+    """Test that concurrent restores and evictions never see a torn entry"""
+    import threading
+
+    cache = StepCache(str(tmp_path / "cache"), max_bytes=10_000_000)
+    output = tmp_path / "out.bin"
+    output.write_bytes(b"x" * 1000)
+    key = cache.key("step")
+    cache.store(key, "step", [str(output)])
+    errors = []
+
+    def hammer(fn):
+        try:
+            for _ in range(200):
+                fn()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=hammer, args=(lambda: cache.restore(key),)),
+        threading.Thread(target=hammer, args=(cache.evict,)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert output.read_bytes() == b"x" * 1000
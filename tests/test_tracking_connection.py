@@ -0,0 +1,83 @@
+"""
+Tests for the cached tracking-server connection setup
+"""
+
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import mlflow
+import pytest
+
+from src import tracking_connection
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        status = 200 if self.headers.get("Authorization") else 401
+        self.send_response(status)
+        self.end_headers()
+        self.wfile.write(b'{"experiments": []}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(("127.0.0.1", 0), SearchHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    SearchHandler.requests = 0
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def fresh_connection():
+    tracking_connection.reset_connection()
+    yield
+    tracking_connection.reset_connection()
+    mlflow.set_tracking_uri("")
+
+
+def test_probe_reports_reachability_and_auth(server):
+    """Test the single-request probe against a live and a closed endpoint"""
+    assert tracking_connection.probe_tracking_server(server, "user", "token")[0]
+    reachable, reason = tracking_connection.probe_tracking_server(server)
+    assert not reachable and "401" in reason
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed = f"http://127.0.0.1:{s.getsockname()[1]}"
+    start = time.perf_counter()
+    assert not tracking_connection.probe_tracking_server(closed, timeout=1)[0]
+    assert time.perf_counter() - start < 2
+
+
+def test_setup_probes_once_per_process(monkeypatch, server):
+    """Test that the probe result is cached and reused"""
+    monkeypatch.setenv("DAGSHUB_TOKEN", "token")
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", server)
+    # Set so the values setup fills in are restored afterwards
+    monkeypatch.setenv("MLFLOW_TRACKING_USERNAME", "user")
+    for name, value in tracking_connection.REQUEST_DEFAULTS.items():
+        monkeypatch.setenv(name, value)
+
+    assert tracking_connection.setup_mlflow_tracking()
+    assert tracking_connection.setup_mlflow_tracking()
+    assert SearchHandler.requests == 1
+    assert mlflow.get_tracking_uri() == server
+
+
+def test_setup_without_credentials_is_local(monkeypatch):
+    """Test that no request is made without credentials"""
+    monkeypatch.delenv("DAGSHUB_TOKEN", raising=False)
+    monkeypatch.delenv("MLFLOW_TRACKING_PASSWORD", raising=False)
+
+    assert not tracking_connection.setup_mlflow_tracking()
+    assert mlflow.get_tracking_uri() == tracking_connection.LOCAL_TRACKING_URI
@@ -0,0 +1,140 @@
+"""
+Tests for the batched MLflow logging client
+"""
+
+import mlflow
+import pytest
+from mlflow.exceptions import MlflowException
+from mlflow.protos.databricks_pb2 import INVALID_PARAMETER_VALUE
+
+from src import tracking_logger
+
+
+class RecordingClient:
+    """Stands in for MlflowClient, recording log_batch calls"""
+
+    def __init__(self, fail=False, reject=()):
+        self.fail = fail
+        self.reject = set(reject)
+        self.batches = []
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        if self.fail:
+            raise ConnectionError("tracking server unreachable")
+        keys = {entity.key for entity in [*metrics, *params, *tags]}
+        if keys & self.reject:
+            raise MlflowException("invalid value", INVALID_PARAMETER_VALUE)
+        self.batches.append((run_id, list(metrics), list(params), list(tags)))
+
+
+@pytest.fixture
+def local_tracking(tmp_path):
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    yield tmp_path
+    mlflow.set_tracking_uri("")
+
+
+def test_values_are_sent_in_few_batches():
+    """Test that many log calls become log_batch requests within API limits"""
+    client = RecordingClient()
+    logger = tracking_logger.BatchedRunLogger("run", client=client, flush_interval=60)
+    logger.log_params({f"p{i}": i for i in range(150)})
+    logger.log_param("p0", "ignored")
+    for step in range(1500):
+        logger.log_metric("loss", 1.0 / (step + 1), step=step)
+    logger.close()
+
+    assert len(client.batches) == 2
+    assert [len(batch[1]) for batch in client.batches] == [1000, 500]
+    assert [len(batch[2]) for batch in client.batches] == [100, 50]
+    assert client.batches[0][2][0].value == "0"
+
+
+def test_rejected_values_are_dropped_individually():
+    """Test that only the entries the server rejects are lost"""
+    client = RecordingClient(reject={"bad_param", "bad_metric"})
+    logger = tracking_logger.BatchedRunLogger("run", client=client, flush_interval=60)
+    logger.log_params({f"p{i}": i for i in range(10)})
+    logger.log_param("bad_param", "x")
+    logger.log_metrics({"accuracy": 0.9, "bad_metric": 1.0})
+    logger.set_tag("stage", "test")
+    logger.close()
+
+    sent = {
+        entity.key for batch in client.batches for part in batch[1:] for entity in part
+    }
+    assert sent == {f"p{i}" for i in range(10)} | {"accuracy", "stage"}
+    assert logger.rejected_entries == 2
+    assert logger.spooled_batches == 0
+
+
+def test_unreachable_server_spools_and_syncs(local_tracking):
+    """Test that failed batches are spooled locally and replayed later"""
+    offline_dir = str(local_tracking / "offline")
+    with mlflow.start_run() as run:
+        pass
+    logger = tracking_logger.BatchedRunLogger(
+        run.info.run_id,
+        client=RecordingClient(fail=True),
+        flush_interval=60,
+        offline_dir=offline_dir,
+    )
+    logger.log_param("a", 1)
+    logger.log_metric("accuracy", 0.9)
+    logger.close()
+    assert logger.spooled_batches == 1
+
+    assert tracking_logger.sync_offline(offline_dir=offline_dir) == 1
+    data = mlflow.get_run(run.info.run_id).data
+    assert data.params == {"a": "1"}
+    assert data.metrics == {"accuracy": 0.9}
+    assert tracking_logger.sync_offline(offline_dir=offline_dir) == 0
+
+
+def test_start_run_flushes_fluent_calls(local_tracking):
+    """Test the drop-in fluent functions against a local file store"""
+    with tracking_logger.start_run() as run:
+        tracking_logger.log_params({"n_estimators": 100})
+        tracking_logger.log_metrics({"precision": 1.0, "recall": 0.5})
+        tracking_logger.set_tag("stage", "test")
+
+    data = mlflow.get_run(run.info.run_id).data
+    assert data.params == {"n_estimators": "100"}
+    assert data.metrics == {"precision": 1.0, "recall": 0.5}
+    assert data.tags["stage"] == "test"
+
+
+
+def test_fluent_calls_start_a_run_when_none_is_active(local_tracking):
+    """Test that logging outside a run starts one, as mlflow.log_param does"""
+    assert mlflow.active_run() is None
+    tracking_logger.log_param("a", 1)
+    run = mlflow.active_run()
+    assert run is not None
+    tracking_logger.close_logger(run.info.run_id)
+    mlflow.end_run()
+    assert mlflow.get_run(run.info.run_id).data.params == {"a": "1"}
+
+
+def test_offline_runs_are_copied_once_the_server_is_back(local_tracking, monkeypatch):
+    """Test that runs logged during a fallback are replayed to the remote store"""
+    monkeypatch.chdir(local_tracking)
+    monkeypatch.setattr(tracking_logger, "offline_fallback", lambda: True)
+    with tracking_logger.start_run(run_name="offline") as run:
+        tracking_logger.log_param("a", 1)
+        for step in range(3):
+            tracking_logger.log_metric("loss", 1.0 / (step + 1), step=step)
+    assert (local_tracking / tracking_logger.OFFLINE_DIR).is_dir()
+
+    mlflow.set_tracking_uri(f"file:{local_tracking / 'remote'}")
+    tracking_logger.sync_offline()
+    tracking_logger.sync_offline()
+    client = mlflow.tracking.MlflowClient()
+    copies = mlflow.search_runs(experiment_ids=["0"], output_format="list")
+    assert len(copies) == 1
+    copy = copies[0]
+    assert copy.data.tags["replayed_from_run"] == run.info.run_id
+    assert copy.data.tags["mlflow.runName"] == "offline"
+    assert copy.data.params == {"a": "1"}
+    assert len(client.get_metric_history(copy.info.run_id, "loss")) == 3
+    assert copy.info.status == "FINISHED"